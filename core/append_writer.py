@@ -0,0 +1,211 @@
+"""
+Group-Commit Append Writer
+One background thread that owns every JSONL append
+
+Request threads used to open, append and close a log file per record.
+Now they enqueue the record and return; the writer thread collects
+whatever arrives within a short window (or up to max_batch records),
+groups it per file and commits each file with a single open/write,
+optionally followed by fsync.
+
+fsync policies:
+- 'none'      leave durability to the OS page cache (default)
+- 'batch'     fsync every file touched by a group commit
+- 'interval'  fsync at most once every fsync_interval seconds per file
+
+Callers that need to know where a record landed (e.g. offset indexes)
+pass on_commit(path, offset, length), called on the writer thread after
+the bytes are written. flush() blocks until everything queued before it
+is on disk, which readers use for read-your-writes.
+"""
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+FSYNC_POLICIES = ('none', 'batch', 'interval')
+
+_STOP = object()
+
+
+class AppendWriter:
+    """Shared asynchronous, batching appender for line-oriented files"""
+
+    def __init__(self, flush_interval: float = 0.02, max_batch: int = 512,
+                 fsync: str = 'none', fsync_interval: float = 1.0):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}")
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._last_fsync: Dict[Path, float] = {}
+        self._latencies = deque(maxlen=1000)
+        self.metrics = {
+            'records': 0,
+            'batches': 0,
+            'bytes': 0,
+            'fsyncs': 0,
+            'errors': 0,
+            'max_batch_seen': 0
+        }
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="novaforge-append-writer", daemon=True
+                )
+                self._thread.start()
+
+    def append(self, path, record: Any, on_commit: Optional[Callable] = None):
+        """
+        Queue one record for appending
+
+        Args:
+            path: Target file (parent directories are created); relative
+                paths are resolved now, not when the batch is written
+            record: dict/list (written as one JSON line), str or bytes
+            on_commit: Optional callback(path, offset, length) after the write
+        """
+        if isinstance(record, bytes):
+            data = record
+        elif isinstance(record, str):
+            data = record.encode()
+        else:
+            data = (json.dumps(record) + '\n').encode()
+
+        self._ensure_thread()
+        self._queue.put((Path(path).resolve(), data, time.monotonic(), on_commit))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far is written"""
+        if self._thread is None or threading.current_thread() is self._thread:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while batch[-1] is not _STOP and not isinstance(batch[-1], threading.Event) \
+                    and len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            records = [item for item in batch if isinstance(item, tuple)]
+            if records:
+                self._commit(records)
+
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if batch[-1] is _STOP:
+                return
+
+    def _commit(self, records):
+        """Write one group: a single open/write (and maybe fsync) per file"""
+        by_file = defaultdict(list)
+        for record in records:
+            by_file[record[0]].append(record)
+
+        committed_at = time.monotonic()
+        for path, items in by_file.items():
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(path, 'ab') as f:
+                    offset = f.tell()
+                    f.write(b''.join(item[1] for item in items))
+                    f.flush()
+                    if self._should_fsync(path, committed_at):
+                        os.fsync(f.fileno())
+                        self.metrics['fsyncs'] += 1
+            except Exception as e:
+                self.metrics['errors'] += 1
+                print(f"❌ Append to {path} failed: {e}")
+                continue
+
+            for _, data, queued_at, on_commit in items:
+                self._latencies.append(committed_at - queued_at)
+                if on_commit:
+                    try:
+                        on_commit(path, offset, len(data))
+                    except Exception as e:
+                        self.metrics['errors'] += 1
+                        print(f"⚠️ Append callback for {path} failed: {e}")
+                offset += len(data)
+                self.metrics['bytes'] += len(data)
+
+        self.metrics['records'] += len(records)
+        self.metrics['batches'] += 1
+        self.metrics['max_batch_seen'] = max(self.metrics['max_batch_seen'], len(records))
+
+    def _should_fsync(self, path: Path, now: float) -> bool:
+        if self.fsync == 'batch':
+            return True
+        if self.fsync == 'interval':
+            if now - self._last_fsync.get(path, 0) >= self.fsync_interval:
+                self._last_fsync[path] = now
+                return True
+        return False
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth, batch sizes and enqueue-to-disk latency"""
+        latencies = sorted(self._latencies)
+        stats = dict(self.metrics)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['fsync_policy'] = self.fsync
+        stats['avg_batch'] = round(stats['records'] / stats['batches'], 2) if stats['batches'] else 0
+        if latencies:
+            stats['latency_ms_avg'] = round(sum(latencies) / len(latencies) * 1000, 3)
+            stats['latency_ms_p99'] = round(latencies[int(len(latencies) * 0.99) - 1 if len(latencies) >= 100 else -1] * 1000, 3)
+        else:
+            stats['latency_ms_avg'] = stats['latency_ms_p99'] = 0.0
+        return stats
+
+    def close(self, timeout: float = 5.0):
+        """Write everything still queued and stop the thread"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+
+# Global writer instance
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_append_writer(**kwargs) -> AppendWriter:
+    """
+    Get global append writer
+
+    kwargs (flush_interval, max_batch, fsync, fsync_interval) only apply
+    on first use; NOVAFORGE_FSYNC sets the default fsync policy.
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            kwargs.setdefault('fsync', os.environ.get('NOVAFORGE_FSYNC', 'none'))
+            _writer = AppendWriter(**kwargs)
+            atexit.register(_writer.close)
+    return _writer
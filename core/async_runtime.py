@@ -0,0 +1,95 @@
+"""
+Shared Async Runtime
+One long-lived asyncio event loop for async tools and engines
+
+Running every coroutine through asyncio.run() creates and tears down a
+fresh loop per call, which throws away connection pools, browser
+sessions and anything else bound to the loop. Instead, a single loop
+runs forever on a daemon thread and sync code submits coroutines to it.
+"""
+
+import asyncio
+import atexit
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, Optional
+
+
+class AsyncRuntime:
+    """Background event loop that sync code can hand coroutines to"""
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        """Get the shared loop, starting its thread on first use"""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                ready = threading.Event()
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._run_loop,
+                    args=(self._loop, ready),
+                    name="novaforge-async-tools",
+                    daemon=True
+                )
+                self._thread.start()
+                ready.wait()
+            return self._loop
+
+    def _run_loop(self, loop: asyncio.AbstractEventLoop, ready: threading.Event):
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        loop.run_forever()
+
+    def in_loop_thread(self) -> bool:
+        """True when called from the runtime's own loop thread"""
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule a coroutine on the shared loop, returning a concurrent Future"""
+        if self.in_loop_thread():
+            # Blocking on .result() here would deadlock the loop
+            raise RuntimeError("Cannot submit to the async runtime from its own loop thread")
+        return asyncio.run_coroutine_threadsafe(coro, self.get_loop())
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the shared loop and block for its result"""
+        return self.submit(coro).result(timeout)
+
+    def shutdown(self):
+        """Stop the loop and join its thread"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = None
+            self._thread = None
+
+        if loop is None or loop.is_closed():
+            return
+
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+        if not loop.is_running():
+            loop.close()
+
+
+# Global runtime instance
+_runtime = None
+_runtime_lock = threading.Lock()
+
+def get_async_runtime() -> AsyncRuntime:
+    """Get global async runtime"""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = AsyncRuntime()
+            atexit.register(_runtime.shutdown)
+    return _runtime
+
+
+def run_async(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """Run a coroutine on the shared loop from sync code"""
+    return get_async_runtime().run(coro, timeout)
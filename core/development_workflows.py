@@ -43,30 +43,22 @@ class DevelopmentWorkflow:
             "findings": {}
         }
         
-        # Step 1: Get project context
+        # One walk of the tree feeds the project analysis, TODO search and line count
         try:
             from core.project_context import ProjectContextAnalyzer
+            from core.repo_scanner import LineCountVisitor, TodoVisitor
+            todos, lines = TodoVisitor(), LineCountVisitor()
             analyzer = ProjectContextAnalyzer(self.project_root)
-            context = analyzer.analyze_project()
-            results["steps"].append({"step": "project_analysis", "status": "success"})
+            context = analyzer.analyze_project(visitors=[todos, lines])
             results["findings"]["project_context"] = context
+            results["findings"]["todos"] = todos.result()["todos"]
+            results["findings"]["code_stats"] = {"success": True, "directory": self.project_root, **lines.result()}
+            results["findings"]["scan"] = analyzer.scan_stats
+            for step in ("project_analysis", "find_todos", "count_lines"):
+                results["steps"].append({"step": step, "status": "success"})
         except Exception as e:
             results["steps"].append({"step": "project_analysis", "status": "failed", "error": str(e)})
         
-        # Step 2: Find TODOs
-        if self.tool_executor:
-            todo_result = self.tool_executor.execute_tool("find_todos", {"directory": self.project_root})
-            if todo_result.get("status") == "success":
-                results["steps"].append({"step": "find_todos", "status": "success"})
-                results["findings"]["todos"] = todo_result.get("result", {}).get("todos", [])
-        
-        # Step 3: Count lines of code
-        if self.tool_executor:
-            loc_result = self.tool_executor.execute_tool("count_lines", {"directory": self.project_root})
-            if loc_result.get("status") == "success":
-                results["steps"].append({"step": "count_lines", "status": "success"})
-                results["findings"]["code_stats"] = loc_result.get("result", {})
-        
         return results
     
     def workflow_implement_feature(self, params: Dict[str, Any]) -> Dict[str, Any]:
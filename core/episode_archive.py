@@ -0,0 +1,244 @@
+"""
+Episodic Archive Reader
+Offset-indexed, memory-mapped access to memory/episodic/YYYY-MM.jsonl
+
+Every monthly JSONL file gets a sidecar YYYY-MM.idx of fixed-width
+records (byte offset, length, timestamp, session id). With it:
+- episode k of a month is one record lookup plus one mmap slice
+- "recent N" reads records from the end of the newest files
+- date ranges binary-search the timestamps and only parse lines inside
+
+Sidecars are appended alongside each episode and caught up from the
+JSONL (reading only the unindexed tail) if another writer got ahead.
+"""
+
+import bisect
+import json
+import mmap
+import struct
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+# offset (u64), length (u32), timestamp (f64), session id (32 bytes, NUL-padded)
+RECORD = struct.Struct('<QId32s')
+
+
+def episode_timestamp(episode: Dict) -> float:
+    """Epoch seconds of an episode's stored_at (0 when missing)"""
+    try:
+        return datetime.fromisoformat(episode['stored_at']).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+
+
+def to_timestamp(value) -> Optional[float]:
+    """Accept epoch seconds, datetimes or ISO strings"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return datetime.fromisoformat(value).timestamp()
+
+
+def end_of_day(until):
+    """An upper bound given as a bare ISO date means through the end of that day"""
+    if isinstance(until, str) and len(until) == 10:
+        return until + "T23:59:59.999999"
+    return until
+
+
+class MonthIndex:
+    """Sidecar offset index for one monthly JSONL file"""
+
+    def __init__(self, jsonl_path: Path):
+        self.path = jsonl_path
+        self.idx_path = jsonl_path.with_suffix('.idx')
+        self.offsets: List[int] = []
+        self.lengths: List[int] = []
+        self.timestamps: List[float] = []
+        self.sessions: List[str] = []
+        self._map = None
+        self._map_size = 0
+        self._load()
+        self.catch_up()
+
+    def _load(self):
+        if not self.idx_path.exists():
+            return
+        data = self.idx_path.read_bytes()
+        usable = len(data) - len(data) % RECORD.size  # drop a torn record
+        for offset, length, ts, session in RECORD.iter_unpack(data[:usable]):
+            self._remember(offset, length, ts, session.rstrip(b'\0').decode(errors='ignore'))
+
+        # Sidecar points past the data (file replaced/truncated) - rebuild
+        if self.end > self._file_size():
+            self.offsets, self.lengths, self.timestamps, self.sessions = [], [], [], []
+            self.idx_path.unlink()
+
+    def _remember(self, offset: int, length: int, ts: float, session: str):
+        self.offsets.append(offset)
+        self.lengths.append(length)
+        self.timestamps.append(ts)
+        self.sessions.append(session)
+
+    def _file_size(self) -> int:
+        return self.path.stat().st_size if self.path.exists() else 0
+
+    @property
+    def end(self) -> int:
+        """First byte not covered by the index"""
+        return self.offsets[-1] + self.lengths[-1] if self.offsets else 0
+
+    def append(self, offset: int, length: int, episode: Dict):
+        """Record an episode that was just written at offset"""
+        if offset < self.end:
+            return  # already picked up by catch_up
+        if offset > self.end:
+            self.catch_up(stop=offset)
+        self._write(offset, length, episode)
+
+    def _write(self, offset: int, length: int, episode: Dict):
+        ts = episode_timestamp(episode)
+        session = str((episode.get('metadata') or {}).get('session_id') or '')
+        with open(self.idx_path, 'ab') as f:
+            f.write(RECORD.pack(offset, length, ts, session.encode()[:32]))
+        self._remember(offset, length, ts, session.encode()[:32].decode(errors='ignore'))
+
+    def catch_up(self, stop: Optional[int] = None):
+        """Index complete lines written after the last indexed byte"""
+        size = stop if stop is not None else self._file_size()
+        if size <= self.end:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self.end)
+            offset = self.end
+            for raw in f:
+                if offset >= size or not raw.endswith(b'\n'):
+                    break
+                try:
+                    episode = json.loads(raw)
+                except ValueError:
+                    episode = {}
+                self._write(offset, len(raw), episode)
+                offset += len(raw)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _mapped(self) -> mmap.mmap:
+        """mmap of the JSONL, remapped when the file has grown"""
+        if self._map is None or self._map_size < self.end:
+            if self._map is not None:
+                self._map.close()
+            with open(self.path, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._map_size = len(self._map)
+        return self._map
+
+    def read(self, k: int) -> Dict:
+        """Episode k of this month (negative k counts from the end)"""
+        offset, length = self.offsets[k], self.lengths[k]
+        return json.loads(self._mapped()[offset:offset + length])
+
+    def range(self, since: Optional[float], until: Optional[float]) -> Tuple[int, int]:
+        """Record slice [lo, hi) within since..until (timestamps are append-ordered)"""
+        lo = bisect.bisect_left(self.timestamps, since) if since is not None else 0
+        hi = bisect.bisect_right(self.timestamps, until) if until is not None else len(self)
+        return lo, hi
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+class EpisodeArchive:
+    """Random, tail and date-range reads over all monthly episode files"""
+
+    def __init__(self, storage_path: str = "memory/episodic"):
+        self.storage_path = Path(storage_path)
+        self._months: Dict[str, MonthIndex] = {}
+        self._lock = threading.RLock()
+
+    def month(self, name: str) -> MonthIndex:
+        """Index for a month ('2026-01' or '2026-01.jsonl')"""
+        name = name[:-len('.jsonl')] if name.endswith('.jsonl') else name
+        with self._lock:
+            index = self._months.get(name)
+            if index is None:
+                index = MonthIndex(self.storage_path / f"{name}.jsonl")
+                self._months[name] = index
+            return index
+
+    def months(self) -> List[str]:
+        """Month names, oldest first"""
+        return sorted(p.stem for p in self.storage_path.glob("*.jsonl"))
+
+    def append(self, file_name: str, offset: int, length: int, episode: Dict):
+        """Record a freshly written episode in its month's sidecar"""
+        with self._lock:
+            self.month(file_name).append(offset, length, episode)
+
+    def get(self, month: str, k: int) -> Dict:
+        """Episode k of a month, O(1)"""
+        with self._lock:
+            return self.month(month).read(k)
+
+    def tail(self, count: int) -> List[Dict]:
+        """Most recent `count` episodes, oldest first"""
+        episodes = []
+        with self._lock:
+            for name in reversed(self.months()):
+                index = self.month(name)
+                index.catch_up()
+                take = min(count - len(episodes), len(index))
+                for k in range(len(index) - 1, len(index) - 1 - take, -1):
+                    episodes.append(index.read(k))
+                if len(episodes) >= count:
+                    break
+        episodes.reverse()
+        return episodes
+
+    def scan(self, since=None, until=None, session_id: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Episodes stored within since..until (epoch, datetime or ISO), oldest first
+
+        Whole months outside the range are skipped by name, and inside a
+        month only the matching slice of lines is parsed.
+        """
+        since_ts, until_ts = to_timestamp(since), to_timestamp(end_of_day(until))
+        first = datetime.fromtimestamp(since_ts).strftime("%Y-%m") if since_ts is not None else None
+        last = datetime.fromtimestamp(until_ts).strftime("%Y-%m") if until_ts is not None else None
+
+        for name in self.months():
+            if (first and name < first) or (last and name > last):
+                continue
+            with self._lock:
+                index = self.month(name)
+                index.catch_up()
+                lo, hi = index.range(since_ts, until_ts)
+                wanted = session_id.encode()[:32].decode(errors='ignore') if session_id else None
+                matches = [
+                    k for k in range(lo, hi)
+                    if wanted is None or index.sessions[k] == wanted
+                ]
+                episodes = [index.read(k) for k in matches]
+            yield from episodes
+
+    def count(self) -> int:
+        with self._lock:
+            total = 0
+            for name in self.months():
+                index = self.month(name)
+                index.catch_up()
+                total += len(index)
+            return total
+
+    def close(self):
+        with self._lock:
+            for index in self._months.values():
+                index.close()
+            self._months.clear()
@@ -0,0 +1,228 @@
+"""
+Episodic Archive Search
+SQLite FTS5 index over every memory/episodic/*.jsonl file
+
+The JSONL files stay the source of truth. The index only stores where
+each episode lives (file, byte offset, length) plus the fields we filter
+on, and a contentless FTS5 table ranks matches with BM25. Episodes are
+indexed as they are stored; anything written by another process (or
+before the index existed) is picked up by sync(), which only reads the
+bytes past each file's last indexed offset.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from core.episode_archive import end_of_day
+
+
+def episode_text(episode: Dict) -> str:
+    """Searchable text for an episode: message contents, summary, metadata"""
+    parts = []
+    for message in episode.get('conversation', []) or []:
+        if isinstance(message, dict):
+            parts.append(str(message.get('content', '')))
+        else:
+            parts.append(str(message))
+    if episode.get('summary'):
+        parts.append(str(episode['summary']))
+    for value in (episode.get('metadata') or {}).values():
+        if isinstance(value, (str, int, float)):
+            parts.append(str(value))
+    # Episodes that aren't conversations are indexed as plain JSON
+    if not parts:
+        parts.append(json.dumps(episode, default=str))
+    return "\n".join(parts)
+
+
+def fts_query(query: str) -> Optional[str]:
+    """Turn free text into a safe FTS5 query (all terms must match)"""
+    terms = re.findall(r'\w+', query.lower())
+    if not terms:
+        return None
+    return " ".join(f'"{term}"' for term in terms)
+
+
+class EpisodeSearchIndex:
+    """Inverted index over the episodic JSONL archive"""
+
+    def __init__(self, archive_dir: Path, index_path: Optional[Path] = None):
+        self.archive_dir = Path(archive_dir)
+        self.index_path = Path(index_path or self.archive_dir / "search_index.db")
+        self._lock = threading.RLock()
+        self._behind = False  # an add() landed past the watermark; sync() fills the gap
+
+        self._conn = sqlite3.connect(str(self.index_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS episodes (
+                id INTEGER PRIMARY KEY,
+                file TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                stored_at TEXT,
+                session_id TEXT,
+                metadata TEXT,
+                UNIQUE (file, offset)
+            );
+            CREATE INDEX IF NOT EXISTS idx_episodes_stored_at ON episodes(stored_at);
+            CREATE INDEX IF NOT EXISTS idx_episodes_session ON episodes(session_id);
+            CREATE VIRTUAL TABLE IF NOT EXISTS episodes_fts USING fts5(text, content='');
+            CREATE TABLE IF NOT EXISTS files (
+                name TEXT PRIMARY KEY,
+                indexed_bytes INTEGER NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def add(self, file_name: str, offset: int, length: int, episode: Dict):
+        """
+        Index one episode that was just appended at file_name:offset
+
+        The file's watermark only moves when the episode directly follows
+        it; bytes another process appended in between are left for sync().
+        """
+        with self._lock, self._conn:
+            self._insert(file_name, offset, length, episode)
+            row = self._conn.execute("SELECT indexed_bytes FROM files WHERE name = ?", (file_name,)).fetchone()
+            watermark = row[0] if row else 0
+            if offset == watermark:
+                self._conn.execute(
+                    "INSERT INTO files (name, indexed_bytes) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET indexed_bytes = excluded.indexed_bytes",
+                    (file_name, offset + length)
+                )
+            elif offset > watermark:
+                self._behind = True
+
+    def _insert(self, file_name: str, offset: int, length: int, episode: Dict):
+        metadata = episode.get('metadata') or {}
+        cursor = self._conn.execute(
+            "INSERT OR IGNORE INTO episodes (file, offset, length, stored_at, session_id, metadata) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (file_name, offset, length, episode.get('stored_at'),
+             metadata.get('session_id') if isinstance(metadata, dict) else None,
+             json.dumps(metadata, default=str))
+        )
+        if cursor.rowcount:
+            self._conn.execute(
+                "INSERT INTO episodes_fts (rowid, text) VALUES (?, ?)",
+                (cursor.lastrowid, episode_text(episode))
+            )
+
+    def sync(self) -> int:
+        """Index any archive bytes not seen yet. Returns episodes added."""
+        added = 0
+        with self._lock:
+            self._behind = False
+            known = dict(self._conn.execute("SELECT name, indexed_bytes FROM files"))
+            for path in sorted(self.archive_dir.glob("*.jsonl")):
+                start = known.get(path.name, 0)
+                if path.stat().st_size <= start:
+                    continue
+                with self._conn:
+                    added += self._index_file(path, start)
+        if added:
+            print(f"🔎 Indexed {added} archived episodes")
+        return added
+
+    def _index_file(self, path: Path, start: int) -> int:
+        added = 0
+        offset = start
+        with open(path, 'rb') as f:
+            f.seek(start)
+            for raw in f:
+                # Stop at a half-written trailing line; the next sync gets it
+                if not raw.endswith(b'\n'):
+                    break
+                line = raw.strip()
+                if line:
+                    try:
+                        self._insert(path.name, offset, len(raw), json.loads(line))
+                        added += 1
+                    except ValueError:
+                        pass
+                offset += len(raw)
+        self._conn.execute(
+            "INSERT INTO files (name, indexed_bytes) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET indexed_bytes = excluded.indexed_bytes",
+            (path.name, offset)
+        )
+        return added
+
+    def search(self, query: str, limit: int = 10, since: Optional[str] = None,
+               until: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """
+        BM25-ranked search over all archived episodes
+
+        Args:
+            query: Free text; every term must match
+            limit: Max results
+            since / until: ISO timestamps (inclusive) on stored_at
+            metadata: Exact-match filters on episode metadata fields
+
+        Returns:
+            Episodes (best match first), each with a '_score' field
+        """
+        if self._behind:
+            self.sync()
+        match = fts_query(query)
+        if not match:
+            return []
+
+        sql = [
+            "SELECT e.file, e.offset, e.length, bm25(episodes_fts) AS score",
+            "FROM episodes_fts JOIN episodes e ON e.id = episodes_fts.rowid",
+            "WHERE episodes_fts MATCH ?"
+        ]
+        params: List[Any] = [match]
+        if since:
+            sql.append("AND e.stored_at >= ?")
+            params.append(since)
+        if until:
+            sql.append("AND e.stored_at <= ?")
+            params.append(end_of_day(until))
+        for key, value in (metadata or {}).items():
+            if key == 'session_id':
+                sql.append("AND e.session_id = ?")
+            else:
+                sql.append("AND json_extract(e.metadata, ?) = ?")
+                params.append(f"$.{key}")
+            params.append(value)
+        sql.append("ORDER BY score LIMIT ?")
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(" ".join(sql), params).fetchall()
+
+        results = []
+        for file_name, offset, length, score in rows:
+            episode = self._read(file_name, offset, length)
+            if episode is not None:
+                episode['_score'] = round(-score, 4)
+                results.append(episode)
+        return results
+
+    def _read(self, file_name: str, offset: int, length: int) -> Optional[Dict]:
+        """Load one episode back from the archive"""
+        try:
+            with open(self.archive_dir / file_name, 'rb') as f:
+                f.seek(offset)
+                return json.loads(f.read(length))
+        except (OSError, ValueError):
+            return None
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM episodes").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,244 @@
+"""
+Filesystem Change Detection
+Watch a project tree and report what changed
+
+Two backends, same callback:
+- inotify (Linux, through libc): one watch per directory, events read
+  by a background thread; new directories are watched as they appear
+- polling: every poll_interval, stat each known directory and a few
+  named files. A directory's mtime moves when an entry is created,
+  deleted or renamed in it, so only changed directories are re-listed.
+  Edits to other files' contents are not seen by this backend.
+
+The callback gets {path: kind} with kind one of 'created', 'deleted',
+'modified' or 'changed' (a directory whose entries changed, when the
+backend can't say which). Ignored directories (.git, node_modules, ...)
+are never watched or walked.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+IGNORED_DIRS = {'node_modules', '.git', 'venv', '__pycache__', 'dist', 'build', '.next'}
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+
+def _load_libc():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    except OSError:
+        return None
+    return libc if hasattr(libc, 'inotify_init1') else None  # Linux only
+
+
+class ChangeDetector:
+    """Report changes under a directory tree to a callback"""
+
+    def __init__(self, root, on_change: Callable[[Dict[str, str]], None],
+                 ignored_dirs: Iterable[str] = IGNORED_DIRS, watch_files: Iterable[str] = (),
+                 poll_interval: float = 2.0, use_inotify: bool = True):
+        self.root = os.path.abspath(root)
+        self.on_change = on_change
+        self.ignored_dirs = set(ignored_dirs)
+        self.watch_files = [os.path.join(self.root, name) for name in watch_files]
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.backend = None  # 'inotify' or 'polling' once started
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._fd = None
+        self._watches: Dict[int, str] = {}  # inotify wd -> directory
+        self._dirs: Dict[str, int] = {}      # polling: directory -> mtime_ns
+        self._files: Dict[str, Optional[int]] = {}
+
+    def start(self) -> str:
+        """Start watching; returns the backend in use"""
+        if self._thread:
+            return self.backend
+        self._stop.clear()
+        if self.use_inotify and self._start_inotify():
+            self.backend = 'inotify'
+            target = self._read_loop
+        else:
+            self.backend = 'polling'
+            self._snapshot()
+            target = self._poll_loop
+        self._thread = threading.Thread(target=target, daemon=True, name="change-detector")
+        self._thread.start()
+        return self.backend
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            self._watches.clear()
+
+    def _subdirs(self, path: str):
+        try:
+            with os.scandir(path) as entries:
+                return [entry.path for entry in entries
+                        if entry.is_dir(follow_symlinks=False) and entry.name not in self.ignored_dirs]
+        except OSError:
+            return []
+
+    def _walk(self, top: str):
+        """Directories under top (inclusive), skipping ignored ones"""
+        stack = [top]
+        while stack:
+            path = stack.pop()
+            yield path
+            stack.extend(self._subdirs(path))
+
+    def _emit(self, changes: Dict[str, str]):
+        if not changes:
+            return
+        try:
+            self.on_change(changes)
+        except Exception as e:
+            print(f"⚠️ Change handler failed: {e}")
+
+    def _start_inotify(self) -> bool:
+        libc = _load_libc()
+        if libc is None:
+            return False
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return False
+        self._libc, self._fd = libc, fd
+        if not self._add_watches(self.root):
+            # Typically ENOSPC: fs.inotify.max_user_watches is too low for this tree
+            print(f"⚠️ inotify watch failed ({os.strerror(ctypes.get_errno())}), polling instead")
+            os.close(fd)
+            self._fd = None
+            self._watches.clear()
+            return False
+        return True
+
+    def _add_watches(self, top: str) -> bool:
+        for path in self._walk(top):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+            if wd < 0:
+                if ctypes.get_errno() in (errno.ENOENT, errno.ENOTDIR):  # gone already
+                    continue
+                return False
+            self._watches[wd] = path
+        return True
+
+    def _read_loop(self):
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self._fd], [], [], 0.5)
+            if not ready:
+                continue
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            except OSError:
+                return
+            self._emit(self._parse(data))
+
+    def _parse(self, data: bytes) -> Dict[str, str]:
+        changes = {}
+        offset = 0
+        while offset + EVENT.size <= len(data):
+            wd, mask, _, length = EVENT.unpack_from(data, offset)
+            name = data[offset + EVENT.size:offset + EVENT.size + length].rstrip(b'\0')
+            offset += EVENT.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                changes[self.root] = 'changed'  # events were lost: everything is suspect
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                changes[directory] = 'deleted'
+                continue
+
+            path = os.path.join(directory, os.fsdecode(name))
+            is_dir = bool(mask & IN_ISDIR)
+            if is_dir and os.path.basename(path) in self.ignored_dirs:
+                continue
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                changes[path] = 'created'
+                if is_dir:
+                    self._add_watches(path)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                changes[path] = 'deleted'
+            elif changes.get(path) != 'created':
+                changes[path] = 'modified'
+        return changes
+
+    def _mtime(self, path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _snapshot(self):
+        self._dirs = {path: self._mtime(path) for path in self._walk(self.root)}
+        self._files = {path: self._mtime(path) for path in self.watch_files}
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            self._emit(self.poll())
+
+    def poll(self) -> Dict[str, str]:
+        """One polling pass (the polling backend runs this every poll_interval)"""
+        changes = {}
+        for path, mtime in list(self._dirs.items()):
+            if path not in self._dirs:
+                continue  # dropped with a deleted parent this pass
+            current = self._mtime(path)
+            if current == mtime:
+                continue
+            if current is None:
+                changes[path] = 'deleted'
+                prefix = path + os.sep
+                for child in [p for p in self._dirs if p == path or p.startswith(prefix)]:
+                    del self._dirs[child]
+                continue
+            changes[path] = 'changed'
+            self._dirs[path] = current
+            for subdir in self._subdirs(path):
+                if subdir not in self._dirs:
+                    for child in self._walk(subdir):
+                        self._dirs[child] = self._mtime(child)
+                        changes[child] = 'created'
+
+        for path, mtime in self._files.items():
+            current = self._mtime(path)
+            if current != mtime:
+                self._files[path] = current
+                changes[path] = 'deleted' if current is None else ('created' if mtime is None else 'modified')
+        return changes
@@ -0,0 +1,209 @@
+"""
+Fast-Path Intent Router
+Answers trivially answerable requests without calling the model
+
+"What time is it?" normally costs two full generations: one to declare
+<TOOLS>datetime</TOOLS> and one to phrase the answer. For a handful of
+high-confidence patterns (date/time, system info, user info) we run the
+tool directly - or reuse known facts from ContextMemory - and answer
+from a template instead.
+
+A request only takes the fast path when BOTH a strict whole-message
+pattern matches AND scripts/intent_parser.py agrees on the same single
+tool. Anything ambiguous falls through to the model.
+"""
+
+import re
+import threading
+from typing import Any, Dict, Optional
+
+from scripts.intent_parser import parse_ai_intent
+
+
+# Intent parser tool names -> registry tool names
+PARSER_TOOL_MAP = {
+    'current_datetime': 'datetime',
+    'current_date': 'datetime',
+    'current_time': 'datetime',
+    'system_info': 'system_info',
+    'user_info': 'user_info',
+}
+
+_Q = r"(?:\s*(?:please|right now|now|today))?\s*[?.!]*\s*$"
+
+# Whole-message patterns - deliberately narrow
+PATTERNS = {
+    'datetime': [
+        r"^(?:hey\s+|hi\s+)?what(?:'s| is)?\s+(?:the\s+)?(?:current\s+)?time(?:\s+is\s+it)?" + _Q,
+        r"^(?:hey\s+|hi\s+)?what\s+time\s+is\s+it" + _Q,
+        r"^(?:hey\s+|hi\s+)?what(?:'s| is)\s+(?:the\s+)?(?:current\s+|today'?s\s+)?date(?:\s+today)?" + _Q,
+        r"^(?:hey\s+|hi\s+)?what\s+day\s+is\s+(?:it|today)" + _Q,
+        r"^(?:tell me\s+)?the\s+(?:current\s+)?(?:date|time)(?:\s+and\s+(?:date|time))?" + _Q,
+        r"^(?:current\s+)?(?:date|time)" + _Q,
+    ],
+    'system_info': [
+        r"^what(?:'s| is)\s+my\s+(?:system|os|operating system|computer|pc|machine)(?:\s+(?:info|information|specs))?" + _Q,
+        r"^(?:show|tell|give)(?:\s+me)?\s+my\s+(?:system|computer|pc|machine)\s+(?:info|information|specs)" + _Q,
+        r"^what\s+(?:os|operating system)\s+am\s+i\s+(?:running|using|on)" + _Q,
+    ],
+    'user_info': [
+        r"^who\s+am\s+i" + _Q,
+        r"^what(?:'s| is)\s+my\s+(?:user\s*name|username|login)" + _Q,
+    ],
+}
+
+SYSTEM_FACTS = ['system_os', 'system_cpu', 'system_ram', 'system_kernel', 'system_arch']
+USER_FACTS = ['username', 'home_dir', 'shell']
+
+
+class FastPathRouter:
+    """Deterministic router for high-confidence, tool-only requests"""
+
+    def __init__(self, max_words: int = 10):
+        self.max_words = max_words
+        self.patterns = {
+            intent: [re.compile(p, re.IGNORECASE) for p in patterns]
+            for intent, patterns in PATTERNS.items()
+        }
+        self._lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'fired': 0,
+            'from_facts': 0,
+            'tool_failures': 0,
+            'by_intent': {intent: 0 for intent in PATTERNS}
+        }
+
+    def is_enabled(self, project_config: Optional[Dict]) -> bool:
+        """Per-project switch: project.json {"fast_path": {"enabled": false}}"""
+        settings = (project_config or {}).get('fast_path', {})
+        if isinstance(settings, bool):
+            return settings
+        return settings.get('enabled', True)
+
+    def classify(self, message: str) -> Optional[str]:
+        """Return the intent when message and intent parser agree, else None"""
+        text = (message or '').strip()
+        if not text or len(text.split()) > self.max_words:
+            return None
+
+        matched = [
+            intent for intent, patterns in self.patterns.items()
+            if any(p.match(text) for p in patterns)
+        ]
+        if len(matched) != 1:
+            return None
+
+        # Cross-check with the keyword intent parser
+        parsed = parse_ai_intent(text, "")
+        tools = {PARSER_TOOL_MAP.get(t['tool'], t['tool']) for t in parsed}
+        if tools != {matched[0]}:
+            return None
+
+        return matched[0]
+
+    def route(self, message: str, tool_executor, context=None,
+              project_config: Optional[Dict] = None) -> Optional[Dict[str, Any]]:
+        """
+        Try to answer without the model
+
+        Returns {'intent', 'answer', 'result', 'from_facts'} or None to
+        fall through to normal generation.
+        """
+        with self._lock:
+            self.stats['requests'] += 1
+
+        if not self.is_enabled(project_config):
+            return None
+
+        intent = self.classify(message)
+        if not intent:
+            return None
+
+        facts = context.facts if context is not None else {}
+        from_facts = False
+        result = None
+
+        if intent == 'system_info' and all(facts.get(k) for k in SYSTEM_FACTS):
+            from_facts = True
+        elif intent == 'user_info' and all(facts.get(k) for k in USER_FACTS):
+            from_facts = True
+        else:
+            result = tool_executor.execute_tool(intent)
+            if not result.get('success'):
+                with self._lock:
+                    self.stats['tool_failures'] += 1
+                return None
+            if context is not None:
+                context.add_tool_result(intent, {}, result)
+                facts = context.facts
+
+        answer = self._render(intent, message, result, facts)
+        if not answer:
+            return None
+
+        with self._lock:
+            self.stats['fired'] += 1
+            self.stats['by_intent'][intent] += 1
+            if from_facts:
+                self.stats['from_facts'] += 1
+
+        return {
+            'intent': intent,
+            'answer': answer,
+            'result': result,
+            'from_facts': from_facts
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """How often the fast path fires"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['by_intent'] = dict(self.stats['by_intent'])
+        requests = stats['requests']
+        stats['fire_rate'] = round(stats['fired'] / requests, 3) if requests else 0.0
+        return stats
+
+    def _render(self, intent: str, message: str, result: Optional[Dict], facts: Dict) -> Optional[str]:
+        """Fill the answer template for an intent"""
+        if intent == 'datetime':
+            lower = message.lower()
+            wants_time = 'time' in lower
+            wants_date = 'date' in lower or 'day' in lower
+            tz = result.get('timezone', '')
+            tz_suffix = f" ({tz})" if tz else ""
+            if wants_time and not wants_date:
+                return f"🕒 It's {result['time']}{tz_suffix}."
+            if wants_date and not wants_time:
+                return f"📅 Today is {result['date']}."
+            return f"🕒 It's {result['time']} on {result['date']}{tz_suffix}."
+
+        if intent == 'system_info':
+            if result is not None:
+                os_name, cpu = result.get('os'), result.get('cpu')
+                ram, kernel = result.get('memory_gb'), result.get('kernel')
+                arch = result.get('architecture')
+            else:
+                os_name, cpu = facts['system_os'], facts['system_cpu']
+                ram, kernel = facts['system_ram'], facts['system_kernel']
+                arch = facts['system_arch']
+            return (f"💻 You're running {os_name} (kernel {kernel}) on {arch}, "
+                    f"with a {cpu} and {ram} GB of RAM.")
+
+        if intent == 'user_info':
+            source = result if result is not None else facts
+            return (f"👤 You're logged in as {source['username']} "
+                    f"(home: {source['home_dir']}, shell: {source['shell']}).")
+
+        return None
+
+
+# Global router instance
+_router = None
+
+def get_fast_path_router() -> FastPathRouter:
+    """Get global fast-path router"""
+    global _router
+    if _router is None:
+        _router = FastPathRouter()
+    return _router
@@ -2,22 +2,245 @@
 """
 💾 Improved Logging - Save EVERY Message Immediately!
 Graceful shutdown, organized by date, error tracking
+
+Sessions are an append-only journal (sessions/<date>/<sid>.jsonl, one
+event per line) plus a compacted snapshot (<sid>.json, the full session
+in the original shape with the journal offset it covers). Each message
+costs one small append; snapshots are rewritten only once the journal
+tail outgrows the last snapshot, so total bytes written stay linear.
+Loading reads the snapshot and replays the journal tail after it.
+
+Sessions older than archive_after_days move to a cold tier: one
+compressed archive per month (see core/session_archive.py). Loading,
+listing, deleting and exporting read through it transparently.
+
+Live sessions sit in a registry keyed by session id, each with its own
+lock, so concurrent users log independently. Idle sessions are saved
+and evicted, then resumed from disk on their next message.
 """
 
-import json, os, signal, sys, atexit, hashlib
+import json, os, signal, sys, atexit, hashlib, itertools, threading, time
+from collections import OrderedDict
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from core.append_writer import get_append_writer
+from core.session_archive import SessionArchive, session_summary
+from core.session_index import SessionMessageIndex, page_bounds
+
+SNAPSHOT_OFFSET_KEY = '_journal_offset'
+
+_session_counter = itertools.count()
+
+
+def apply_event(session, event):
+    """Replay one journal event onto a session dict"""
+    op = event.get('op')
+    if op == 'start':
+        session.update(event['session'])
+        session.setdefault('messages', [])
+        session.setdefault('errors', [])
+        session.setdefault('stats', {'total_messages': 0, 'user_messages': 0, 'assistant_messages': 0, 'errors': 0})
+    elif op == 'message':
+        msg = event['message']
+        session['messages'].append(msg)
+        session['last_updated'] = msg['timestamp']
+        session['stats']['total_messages'] += 1
+        if msg['role'] == 'user':
+            session['stats']['user_messages'] += 1
+        elif msg['role'] == 'assistant':
+            session['stats']['assistant_messages'] += 1
+    elif op == 'error':
+        session['errors'].append(event['error'])
+        session['stats']['errors'] += 1
+    elif op == 'touch':
+        session['last_updated'] = event['last_updated']
+    return session
+
+
+def read_session_state(date_dir: Path, session_id: str):
+    """
+    (session, snapshot_offset) from snapshot plus journal tail
+
+    snapshot_offset is None for a legacy whole-file session; session is
+    None when nothing is stored.
+    """
+    snapshot_file = date_dir / f"{session_id}.json"
+    journal_file = date_dir / f"{session_id}.jsonl"
+    
+    session, offset = {}, 0
+    if snapshot_file.exists():
+        session = json.loads(snapshot_file.read_text())
+        offset = session.pop(SNAPSHOT_OFFSET_KEY, None)
+        if offset is None:
+            return session, None  # legacy whole-file session
+    elif not journal_file.exists():
+        return None, 0
+    
+    if journal_file.exists():
+        with open(journal_file, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # torn final write
+                apply_event(session, json.loads(line))
+    return session or None, offset
+
+
+def read_session(date_dir: Path, session_id: str):
+    """Load a session from its snapshot plus journal tail (or a legacy .json)"""
+    return read_session_state(date_dir, session_id)[0]
+
+
+def new_session_id() -> str:
+    seed = f"{datetime.now().isoformat()}_{os.getpid()}_{next(_session_counter)}"
+    return hashlib.md5(seed.encode()).hexdigest()[:12]
+
+
+class SessionLog:
+    """
+    One session's writer: in-memory state, journal and snapshot
+
+    Every mutation holds this session's own lock, so concurrent users
+    never contend on (or write into) each other's sessions.
+    """
+    
+    def __init__(self, session: dict, date_dir: Path, writer, snapshot_min_bytes: int,
+                 journal_size: int = 0, snapshot_offset: int = 0, snapshot_size: int = 0):
+        self.session = session
+        self.session_id = session['session_id']
+        self.session_file = date_dir / f"{self.session_id}.json"
+        self.journal_file = date_dir / f"{self.session_id}.jsonl"
+        self.writer = writer
+        self.snapshot_min_bytes = snapshot_min_bytes
+        self.lock = threading.RLock()
+        self.last_active = time.monotonic()
+        self._journal_size = journal_size
+        self._snapshot_offset = snapshot_offset
+        self._snapshot_size = snapshot_size
+    
+    @classmethod
+    def create(cls, date_dir: Path, writer, snapshot_min_bytes: int, user_name: str, metadata: dict):
+        now = datetime.now().isoformat()
+        header = {
+            'session_id': new_session_id(),
+            'user_name': user_name,
+            'started_at': now,
+            'last_updated': now,
+            'metadata': metadata or {}
+        }
+        log = cls(apply_event({}, {'op': 'start', 'session': dict(header)}),
+                  date_dir, writer, snapshot_min_bytes)
+        log._append({'op': 'start', 'session': header})
+        return log
+    
+    @classmethod
+    def resume(cls, date_dir: Path, session_id: str, writer, snapshot_min_bytes: int):
+        """Reopen a stored session for further logging"""
+        session, offset = read_session_state(date_dir, session_id)
+        if session is None:
+            return None
+        journal_file = date_dir / f"{session_id}.jsonl"
+        journal_size = journal_file.stat().st_size if journal_file.exists() else 0
+        snapshot_file = date_dir / f"{session_id}.json"
+        snapshot_size = snapshot_file.stat().st_size if snapshot_file.exists() else 0
+        
+        log = cls(session, date_dir, writer, snapshot_min_bytes,
+                  journal_size, offset or 0, snapshot_size)
+        if offset is None:
+            # Legacy whole-file session: convert so the journal tail counts
+            log._write()
+        return log
+    
+    def log_message(self, role: str, content: str, metadata: dict = None, timestamp: str = None):
+        msg = {
+            'role': role,
+            'content': content,
+            'timestamp': timestamp or datetime.now().isoformat(),
+            'metadata': metadata or {}
+        }
+        self._record({'op': 'message', 'message': msg})
+        return msg
+    
+    def log_error(self, error: dict):
+        self._record({'op': 'error', 'error': error})
+    
+    def save(self):
+        with self.lock:
+            self._record({'op': 'touch', 'last_updated': datetime.now().isoformat()})
+            self._write()
+        return self.session_file
+    
+    def snapshot(self) -> dict:
+        """Deep copy of the session as it stands"""
+        with self.lock:
+            return json.loads(json.dumps(self.session))
+    
+    def _record(self, event: dict):
+        with self.lock:
+            apply_event(self.session, event)
+            self._append(event)
+            self.last_active = time.monotonic()
+    
+    def _append(self, event: dict):
+        """Append one event to the session journal, snapshotting when the tail gets big"""
+        line = (json.dumps(event) + '\n').encode()
+        self.writer.append(self.journal_file, line)
+        self._journal_size += len(line)
+        
+        tail = self._journal_size - self._snapshot_offset
+        if tail >= max(self.snapshot_min_bytes, self._snapshot_size):
+            self._write()
+    
+    def _write(self):
+        """Write a compacted snapshot covering the journal so far"""
+        # The snapshot must not claim journal bytes that aren't written yet
+        self.writer.flush()
+        try:
+            data = json.dumps({**self.session, SNAPSHOT_OFFSET_KEY: self._journal_size})
+            tmp = self.session_file.with_suffix('.json.tmp')
+            tmp.write_text(data)
+            os.replace(tmp, self.session_file)
+            self._snapshot_offset = self._journal_size
+            self._snapshot_size = len(data)
+        except Exception as e:
+            print(f"❌ Save failed: {e}")
 
 
 class LoggingSystem:
-    def __init__(self, base_path: str = "memory"):
+    """
+    Session registry keyed by session_id
+
+    Each live session has its own SessionLog (writer + lock). The
+    registry lock only guards the dict itself. Sessions idle longer than
+    max_idle seconds (or beyond max_open) are saved and evicted; they
+    are resumed from disk transparently on next use.
+    """
+    
+    def __init__(self, base_path: str = "memory", snapshot_min_bytes: int = 64 * 1024,
+                 max_idle: float = 30 * 60, max_open: int = 256, archive_after_days: int = None):
         self.base_path = Path(base_path)
-        self.current_session = None
-        self.session_file = None
+        # NOVAFORGE_ARCHIVE_DAYS sets the default hot-tier age
+        if archive_after_days is None:
+            archive_after_days = int(os.environ.get('NOVAFORGE_ARCHIVE_DAYS', 30))
+        self.archive_after_days = archive_after_days
+        self.snapshot_min_bytes = snapshot_min_bytes
+        self.max_idle = max_idle
+        self.max_open = max_open
+        self.writer = get_append_writer()
+        self.last_export_stats = None
+        
+        self.sessions = OrderedDict()   # session_id -> SessionLog, least recent first
+        self.default_session_id = None  # the session used when no id is given
+        self._registry_lock = threading.Lock()
+        self._evicting = {}             # session_id -> Event set once its final save is done
+        self._last_sweep = time.monotonic()
+        self._message_indexes = OrderedDict()  # session_id -> SessionMessageIndex (small LRU)
         
         self.sessions_dir = self.base_path / "sessions"
         self.training_dir = self.base_path / "training_data"
         self.errors_dir = self.base_path / "errors"
+        self.archive = SessionArchive(self.base_path / "session_archive")
         
         for d in [self.sessions_dir, self.training_dir, self.errors_dir]:
             d.mkdir(parents=True, exist_ok=True)
@@ -30,62 +253,126 @@ class LoggingSystem:
     
     def _handle_shutdown(self, signum, frame):
         print("\n\n💾 Saving...")
-        if self.current_session:
-            self.save_session()
+        self._save_on_exit()
         print("✅ Saved!")
         sys.exit(0)
     
     def _save_on_exit(self):
-        if self.current_session and len(self.current_session.get('messages', [])) > 0:
-            self.save_session()
+        with self._registry_lock:
+            logs = list(self.sessions.values())
+        for log in logs:
+            if log.session.get('messages'):
+                log.save()
+    
+    # ----- default-session compatibility -----
+    
+    @property
+    def current_log(self):
+        with self._registry_lock:
+            return self.sessions.get(self.default_session_id)
+    
+    @property
+    def current_session(self):
+        log = self.current_log
+        return log.session if log else None
+    
+    @property
+    def session_file(self):
+        log = self.current_log
+        return log.session_file if log else None
+    
+    @property
+    def journal_file(self):
+        log = self.current_log
+        return log.journal_file if log else None
+    
+    # ----- registry -----
     
     def start_session(self, user_name: str = "User", metadata: dict = None):
-        sid = hashlib.md5(f"{datetime.now().isoformat()}_{os.getpid()}".encode()).hexdigest()[:12]
-        now = datetime.now()
-        
-        self.current_session = {
-            'session_id': sid,
-            'user_name': user_name,
-            'started_at': now.isoformat(),
-            'last_updated': now.isoformat(),
-            'messages': [],
-            'metadata': metadata or {},
-            'stats': {'total_messages': 0, 'user_messages': 0, 'assistant_messages': 0, 'errors': 0},
-            'errors': []
-        }
-        
-        date_dir = self.sessions_dir / now.strftime('%Y-%m-%d')
+        date_dir = self.sessions_dir / datetime.now().strftime('%Y-%m-%d')
         date_dir.mkdir(exist_ok=True)
-        self.session_file = date_dir / f"{sid}.json"
-        self._write()
-        return sid
+        log = SessionLog.create(date_dir, self.writer, self.snapshot_min_bytes, user_name, metadata)
+        with self._registry_lock:
+            self.sessions[log.session_id] = log
+            self.default_session_id = log.session_id
+        self._maybe_evict()
+        return log.session_id
     
-    def log_message(self, role: str, content: str, metadata: dict = None):
-        if not self.current_session:
-            self.start_session()
-        
-        msg = {
-            'role': role,
-            'content': content,
-            'timestamp': datetime.now().isoformat(),
-            'metadata': metadata or {}
-        }
-        
-        self.current_session['messages'].append(msg)
-        self.current_session['last_updated'] = datetime.now().isoformat()
-        self.current_session['stats']['total_messages'] += 1
+    def get_session_log(self, session_id: str = None):
+        """SessionLog for an id (resumed from disk if evicted), or None"""
+        session_id = session_id or self.default_session_id
+        if not session_id:
+            return None
+        with self._registry_lock:
+            log = self.sessions.get(session_id)
+            if log:
+                self.sessions.move_to_end(session_id)
+                return log
+            evicting = self._evicting.get(session_id)
+        if evicting:
+            evicting.wait()  # resume from its final save, not from before it
         
-        if role == 'user':
-            self.current_session['stats']['user_messages'] += 1
-        elif role == 'assistant':
-            self.current_session['stats']['assistant_messages'] += 1
+        date_dir = self.find_session(session_id) or self._restore_archived(session_id)
+        if not date_dir:
+            return None
+        log = SessionLog.resume(date_dir, session_id, self.writer, self.snapshot_min_bytes)
+        if log is None:
+            return None
+        with self._registry_lock:
+            # Another thread may have resumed it meanwhile - keep theirs
+            log = self.sessions.setdefault(session_id, log)
+            self.sessions.move_to_end(session_id)
+        self._maybe_evict()
+        return log
+    
+    def _log_for(self, session_id: str = None):
+        log = self.get_session_log(session_id)
+        if log:
+            return log
+        if session_id:
+            raise ValueError(f"Session not found: {session_id}")
+        self.start_session()
+        return self.current_log
+    
+    def evict_idle(self, max_idle: float = None) -> int:
+        """Save and drop sessions idle longer than max_idle; returns count evicted"""
+        max_idle = self.max_idle if max_idle is None else max_idle
+        now = time.monotonic()
+        with self._registry_lock:
+            self._last_sweep = now
+            stale = [sid for sid, log in self.sessions.items() if now - log.last_active >= max_idle]
+            # Over capacity: also drop the least recently used
+            overflow = len(self.sessions) - len(stale) - self.max_open
+            if overflow > 0:
+                stale += [sid for sid in self.sessions if sid not in stale][:overflow]
+            evicted = [self.sessions.pop(sid) for sid in stale]
+            saved = threading.Event()
+            for sid in stale:
+                self._evicting[sid] = saved
         
-        self._write()
-        return msg
+        try:
+            for log in evicted:
+                log.save()
+        finally:
+            with self._registry_lock:
+                for sid in stale:
+                    if self._evicting.get(sid) is saved:
+                        del self._evicting[sid]
+            saved.set()
+        return len(evicted)
+    
+    def _maybe_evict(self):
+        """Sweep at most once a minute, or right away when over capacity"""
+        if len(self.sessions) > self.max_open or time.monotonic() - self._last_sweep >= 60:
+            self.evict_idle()
+    
+    # ----- logging -----
     
-    def log_error(self, error_type: str, error_msg: str, context: dict = None):
-        if not self.current_session:
-            self.start_session()
+    def log_message(self, role: str, content: str, metadata: dict = None, session_id: str = None):
+        return self._log_for(session_id).log_message(role, content, metadata)
+    
+    def log_error(self, error_type: str, error_msg: str, context: dict = None, session_id: str = None):
+        log = self._log_for(session_id)
         
         now = datetime.now()
         error = {
@@ -95,46 +382,272 @@ class LoggingSystem:
             'context': context or {}
         }
         
-        self.current_session['errors'].append(error)
-        self.current_session['stats']['errors'] += 1
-        
         error_file = self.errors_dir / f"errors_{now.strftime('%Y-%m-%d')}.jsonl"
-        with open(error_file, 'a') as f:
-            f.write(json.dumps(error) + '\n')
+        self.writer.append(error_file, error)
         
-        self._write()
+        log.log_error(error)
         return error
     
-    def _write(self):
-        if self.session_file and self.current_session:
-            try:
-                with open(self.session_file, 'w') as f:
-                    json.dump(self.current_session, f, indent=2)
-            except Exception as e:
-                print(f"❌ Save failed: {e}")
-    
-    def save_session(self):
-        if not self.current_session:
+    def sync_messages(self, session_id: str, messages: list) -> int:
+        """Journal client-side messages the server hasn't seen yet; returns count added"""
+        log = self._log_for(session_id)
+        with log.lock:
+            known = len(log.session['messages'])
+            for m in messages[known:]:
+                log.log_message(m.get('role', 'user'), m.get('content', ''),
+                                m.get('metadata'), timestamp=m.get('timestamp'))
+            return max(len(messages) - known, 0)
+    
+    def save_session(self, session_id: str = None):
+        log = self.get_session_log(session_id)
+        if not log:
             return None
-        self.current_session['last_updated'] = datetime.now().isoformat()
-        self._write()
-        return self.session_file
+        return log.save()
     
-    def export_for_training(self, format: str = 'jsonl'):
-        now = datetime.now()
-        output = self.training_dir / f"training_{now.strftime('%Y%m%d_%H%M%S')}.{format}"
-        
-        if format == 'jsonl':
-            with open(output, 'w') as f:
-                for date_dir in sorted(self.sessions_dir.glob("*")):
-                    if date_dir.is_dir():
-                        for sfile in sorted(date_dir.glob("*.json")):
-                            try:
-                                s = json.loads(sfile.read_text())
-                                msgs = [{'role': m['role'], 'content': m['content']} 
-                                       for m in s.get('messages', []) if m['role'] in ['user', 'assistant']]
-                                if msgs:
-                                    f.write(json.dumps({'messages': msgs}) + '\n')
-                            except:
-                                pass
+    def find_session(self, session_id: str):
+        """Date directory holding a session, or None"""
+        if not self.sessions_dir.exists():
+            return None
+        for date_dir in self.sessions_dir.iterdir():
+            if date_dir.is_dir() and (
+                (date_dir / f"{session_id}.jsonl").exists() or (date_dir / f"{session_id}.json").exists()
+            ):
+                return date_dir
+        return None
+    
+    def load_session(self, session_id: str):
+        """Full session dict (same shape as the old per-session JSON), or None"""
+        with self._registry_lock:
+            log = self.sessions.get(session_id)
+        if log:
+            return log.snapshot()
+        self.writer.flush()
+        date_dir = self.find_session(session_id)
+        if date_dir:
+            return read_session(date_dir, session_id)
+        return self.archive.get(session_id)
+    
+    def load_session_page(self, session_id: str, offset: int = None, limit: int = None,
+                          before: int = None, after: int = None):
+        """
+        Session metadata plus one page of messages, or None
+        
+        Served from the journal's message offset index, so only the
+        requested messages are read and decoded. See page_bounds for
+        how offset/limit/before/after select the page.
+        """
+        self.writer.flush()
+        date_dir = self.find_session(session_id)
+        journal_file = date_dir / f"{session_id}.jsonl" if date_dir else None
+        index = None
+        if journal_file is not None and journal_file.exists():
+            index = self._message_index(session_id, journal_file)
+        
+        if index is None or not index.complete:
+            # Archived or legacy session, or one resumed from either: its early
+            # messages are only in the snapshot, so slice snapshot + tail in memory
+            session = read_session(date_dir, session_id) if date_dir else self.archive.get(session_id)
+            if not session:
+                return None
+            messages = session.pop('messages', [])
+            total = len(messages)
+            start, stop = page_bounds(total, offset, limit, before, after)
+            session['messages'] = messages[start:stop]
+        else:
+            session = index.header()
+            if session is None:
+                return None
+            total = len(index)
+            start, stop = page_bounds(total, offset, limit, before, after)
+            session['messages'] = index.read_messages(start, stop)
+        
+        session['page'] = {
+            'start': start,
+            'end': stop,
+            'total_messages': total,
+            'has_more_before': start > 0,
+            'has_more_after': stop < total
+        }
+        return session
+    
+    def _message_index(self, session_id: str, journal_file: Path) -> SessionMessageIndex:
+        with self._registry_lock:
+            index = self._message_indexes.get(session_id)
+            if index is None or index.path != journal_file:
+                index = SessionMessageIndex(journal_file)
+                self._message_indexes[session_id] = index
+                while len(self._message_indexes) > 32:
+                    self._message_indexes.popitem(last=False)
+            else:
+                index.catch_up()
+            self._message_indexes.move_to_end(session_id)
+            return index
+    
+    def iter_sessions(self):
+        """Yield (session_dict, path) for every stored session, hot then archived, newest first"""
+        yield from self._iter_hot_sessions()
+        yield from self.archive.iter_sessions()
+    
+    def iter_session_summaries(self):
+        """
+        Yield listing summaries (see session_summary), newest first
+        
+        Archived sessions come straight from their month's index, so
+        listing history never decompresses anything.
+        """
+        for session, path in self._iter_hot_sessions():
+            summary = session_summary(session, path.parent.name)
+            summary['file_path'] = str(path)
+            yield summary
+        for summary in self.archive.summaries():
+            yield {**summary, 'file_path': str(self.archive.location(summary['session_id']))}
+    
+    def _iter_hot_sessions(self):
+        if not self.sessions_dir.exists():
+            return
+        self.writer.flush()
+        for date_dir in sorted(self.sessions_dir.iterdir(), reverse=True):
+            if not date_dir.is_dir():
+                continue
+            ids = {p.name.split('.')[0] for p in date_dir.glob("*.json*") if not p.name.endswith('.tmp')}
+            for sid in sorted(ids, reverse=True):
+                try:
+                    session = read_session(date_dir, sid)
+                except Exception:
+                    continue
+                if session:
+                    yield session, date_dir / f"{sid}.json"
+    
+    def archive_sessions(self, older_than_days: int = None) -> dict:
+        """
+        Move sessions older than the cutoff into the monthly archives
+        
+        Live sessions are left alone. Hot files are removed only after
+        their month's archive and index have been written; a session
+        resumed in the meantime keeps its hot files and leaves the archive.
+        """
+        days = self.archive_after_days if older_than_days is None else older_than_days
+        cutoff = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        stats = {'sessions': 0, 'files_removed': 0, 'bytes_before': 0, 'bytes_after': 0}
+        self.writer.flush()
+        with self._registry_lock:
+            live = set(self.sessions)
+        
+        archive_before = self.archive.get_stats()['bytes']
+        batch, files, dirs = [], {}, []
+        
+        def flush():
+            with self._registry_lock:
+                batch[:] = [(date, session) for date, session in batch
+                            if session['session_id'] not in self.sessions]
+            # Hot files go only once the archive and its index are on disk
+            self.archive.add(batch)
+            resumed = []
+            for _, session in batch:
+                sid = session['session_id']
+                with self._registry_lock:
+                    if sid in self.sessions:
+                        resumed.append(sid)
+                        continue
+                    for path in files[sid]:
+                        stats['bytes_before'] += path.stat().st_size
+                        path.unlink()
+                        stats['files_removed'] += 1
+                    self._message_indexes.pop(sid, None)
+                stats['sessions'] += 1
+            for sid in resumed:
+                self.archive.remove(sid)  # the hot copy is the live one
+            for date_dir in dirs:
+                if not any(date_dir.iterdir()):
+                    date_dir.rmdir()
+                    stats['files_removed'] += 1
+            batch.clear(); files.clear(); dirs.clear()
+        
+        pending_bytes = 0
+        for date_dir in sorted(self.sessions_dir.iterdir()):
+            if not date_dir.is_dir() or date_dir.name >= cutoff:
+                continue
+            # One archive write per month (or per few blocks' worth) so blocks fill up
+            if batch and (batch[0][0][:7] != date_dir.name[:7] or pending_bytes >= 4 * self.archive.block_bytes):
+                flush()
+                pending_bytes = 0
+            ids = {p.name.split('.')[0] for p in date_dir.glob("*.json*") if not p.name.endswith('.tmp')}
+            for sid in sorted(ids - live):
+                try:
+                    session = read_session(date_dir, sid)
+                except Exception as e:
+                    print(f"⚠️ Skipping unreadable session {sid}: {e}")
+                    continue
+                if session:
+                    batch.append((date_dir.name, session))
+                    files[sid] = list(date_dir.glob(f"{sid}.*"))
+                    pending_bytes += sum(p.stat().st_size for p in files[sid])
+            dirs.append(date_dir)
+        if batch:
+            flush()
+        
+        stats['bytes_after'] = self.archive.get_stats()['bytes'] - archive_before
+        if stats['sessions']:
+            print(f"🗄️ Archived {stats['sessions']} sessions "
+                  f"({stats['bytes_before']} -> {stats['bytes_after']} bytes)")
+        return stats
+    
+    def _restore_archived(self, session_id: str):
+        """Move an archived session back to the hot tier so it can grow again"""
+        session = self.archive.get(session_id)
+        if not session:
+            return None
+        date_dir = self.sessions_dir / session.get('started_at', datetime.now().isoformat())[:10]
+        date_dir.mkdir(parents=True, exist_ok=True)
+        (date_dir / f"{session_id}.json").write_text(json.dumps(session))
+        self.archive.remove(session_id)
+        return date_dir
+    
+    def delete_session(self, session_id: str) -> bool:
+        """Remove a session's snapshot and journal"""
+        with self._registry_lock:
+            self.sessions.pop(session_id, None)
+            self._message_indexes.pop(session_id, None)
+            if self.default_session_id == session_id:
+                self.default_session_id = None
+        self.writer.flush()
+        date_dir = self.find_session(session_id)
+        if not date_dir:
+            return self.archive.remove(session_id)
+        for suffix in ('.json', '.jsonl', '.midx'):
+            path = date_dir / f"{session_id}{suffix}"
+            if path.exists():
+                path.unlink()
+        return True
+    
+    def export_session(self, session_id: str, format: str = 'jsonl'):
+        """Export one session's user/assistant turns for training"""
+        s = self.load_session(session_id)
+        if not s:
+            raise ValueError(f"Session not found: {session_id}")
+        
+        msgs = [{'role': m['role'], 'content': m['content']}
+               for m in s.get('messages', []) if m['role'] in ['user', 'assistant']]
+        output = self.training_dir / f"session_{session_id}.{format}"
+        with open(output, 'w') as f:
+            if format == 'jsonl':
+                f.write(json.dumps({'messages': msgs}) + '\n')
+            else:
+                json.dump({'session_id': session_id, 'messages': msgs}, f, indent=2)
         return str(output)
+    
+    def export_for_training(self, format: str = 'jsonl', **options):
+        """
+        Incrementally export new sessions into gzip JSONL shards
+        
+        Always writes .jsonl.gz shards (format is kept for API compatibility).
+        Returns the shard directory; run stats are on self.last_export_stats.
+        Options are passed to TrainingExporter (shard_bytes, workers, ...).
+        """
+        from core.training_export import TrainingExporter
+        
+        self._save_on_exit()
+        options.setdefault('archive_dir', self.archive.archive_dir)
+        exporter = TrainingExporter(self.sessions_dir, self.training_dir, **options)
+        self.last_export_stats = exporter.export()
+        return str(exporter.shard_dir)
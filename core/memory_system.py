@@ -10,95 +10,232 @@ Types:
 - Episodic: Conversation history
 """
 
+import atexit
 import json
 import pickle
+import sqlite3
+import threading
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Any
-from collections import defaultdict
+from collections import deque
+
+from core.append_writer import get_append_writer
+from core.episode_archive import EpisodeArchive
+from core.episode_search import EpisodeSearchIndex, episode_text
+from core.vector_memory import SemanticMemory
 
 
 class ShortTermMemory:
     """
     Session-only memory
     Duration: Until session ends
+
+    A bounded deque of stores plus a key index, so recall is O(1).
+    Each key keeps counters (stores still in the window, recalls, last
+    use) that consolidation scores without rescanning the window.
     """
     
     def __init__(self, capacity: int = 50):
         self.capacity = capacity
-        self.memory = []
+        self.memory = deque(maxlen=capacity)
+        self.index = {}       # key -> latest item
+        self.counters = {}    # key -> {'stores', 'accesses', 'last_used'}
+        self.dirty = set()    # keys touched since the last consolidation pass
+        self._lock = threading.Lock()
     
     def store(self, key: str, value: Any):
         """Store in short-term memory"""
-        self.memory.append({
+        item = {
             'key': key,
             'value': value,
             'timestamp': datetime.now().isoformat()
-        })
-        
-        # Keep only recent items
-        if len(self.memory) > self.capacity:
-            self.memory = self.memory[-self.capacity:]
+        }
+        with self._lock:
+            # Keep only recent items
+            if len(self.memory) == self.capacity:
+                self._evict(self.memory[0])
+            self.memory.append(item)
+            self.index[key] = item
+            
+            counter = self.counters.setdefault(key, {'stores': 0, 'accesses': 0})
+            counter['stores'] += 1
+            counter['last_used'] = time.time()
+            self.dirty.add(key)
+    
+    def _evict(self, item: Dict):
+        """Account for the oldest item dropping out of the window"""
+        key = item['key']
+        counter = self.counters.get(key)
+        if counter is None:
+            return
+        counter['stores'] -= 1
+        if counter['stores'] <= 0:
+            del self.counters[key]
+            self.index.pop(key, None)
+            self.dirty.discard(key)
     
     def recall(self, key: str) -> Optional[Any]:
         """Recall from short-term memory"""
-        for item in reversed(self.memory):
-            if item['key'] == key:
-                return item['value']
-        return None
+        with self._lock:
+            item = self.index.get(key)
+            if item is None:
+                return None
+            counter = self.counters[key]
+            counter['accesses'] += 1
+            counter['last_used'] = time.time()
+            self.dirty.add(key)
+            return item['value']
+    
+    def take_dirty(self) -> List:
+        """Snapshot (key, value, counter) for keys touched since the last call"""
+        with self._lock:
+            keys, self.dirty = self.dirty, set()
+            return [
+                (key, self.index[key]['value'], dict(self.counters[key]))
+                for key in keys if key in self.index
+            ]
     
     def clear(self):
         """Clear short-term memory"""
-        self.memory = []
+        with self._lock:
+            self.memory.clear()
+            self.index.clear()
+            self.counters.clear()
+            self.dirty.clear()
 
 
 class LongTermMemory:
     """
     Persistent memory
     Duration: Forever
+
+    Backed by SQLite in WAL mode: each store/forget is a single-row
+    upsert/delete, and recall only bumps in-memory access counters that
+    a background timer flushes in one batched transaction.
     """
     
-    def __init__(self, storage_path: str = "memory/long_term.pkl"):
-        self.storage_path = Path(storage_path)
+    def __init__(self, storage_path: str = "memory/long_term.db", flush_interval: float = 5.0):
+        path = Path(storage_path)
+        # Older callers pass the pickle path - keep the db next to it
+        self.storage_path = path.with_suffix('.db') if path.suffix == '.pkl' else path
+        self.legacy_path = self.storage_path.with_suffix('.pkl')
         self.storage_path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        
+        self._lock = threading.RLock()
+        self._dirty_access = set()
+        self._flush_timer = None
+        self.on_forget = None  # callable(key, category), e.g. to drop derived indexes
+        
+        self._conn = sqlite3.connect(str(self.storage_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS memories (
+                category TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                stored_at TEXT NOT NULL,
+                accessed_count INTEGER NOT NULL DEFAULT 0,
+                last_accessed TEXT,
+                PRIMARY KEY (category, key)
+            )
+        """)
+        self._conn.commit()
+        
+        self._migrate_pickle()
         self.memory = self._load()
+        atexit.register(self.close)
+    
+    def _migrate_pickle(self):
+        """One-time import of the old whole-file pickle store"""
+        if not self.legacy_path.exists():
+            return
+        
+        try:
+            with open(self.legacy_path, 'rb') as f:
+                legacy = pickle.load(f)
+        except Exception as e:
+            print(f"⚠️ Could not migrate {self.legacy_path}: {e}")
+            return
+        
+        rows = []
+        for category, items in legacy.items():
+            for key, item in items.items():
+                rows.append((
+                    category, key, pickle.dumps(item.get('value')),
+                    item.get('stored_at', datetime.now().isoformat()),
+                    item.get('accessed_count', 0), item.get('last_accessed')
+                ))
+        
+        with self._lock, self._conn:
+            # Keys already in the db are newer than the pickle
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO memories VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+        
+        self.legacy_path.rename(self.legacy_path.with_suffix('.pkl.migrated'))
+        print(f"📦 Migrated {len(rows)} long-term memories to {self.storage_path}")
     
     def _load(self) -> Dict:
         """Load from disk"""
-        if self.storage_path.exists():
+        memory = {}
+        rows = self._conn.execute(
+            "SELECT category, key, value, stored_at, accessed_count, last_accessed FROM memories"
+        )
+        for category, key, value, stored_at, accessed_count, last_accessed in rows:
             try:
-                with open(self.storage_path, 'rb') as f:
-                    return pickle.load(f)
-            except:
-                return {}
-        return {}
-    
-    def _save(self):
-        """Save to disk"""
-        with open(self.storage_path, 'wb') as f:
-            pickle.dump(self.memory, f)
+                value = pickle.loads(value)
+            except Exception:
+                continue
+            item = {'value': value, 'stored_at': stored_at, 'accessed_count': accessed_count}
+            if last_accessed:
+                item['last_accessed'] = last_accessed
+            memory.setdefault(category, {})[key] = item
+        return memory
     
     def store(self, key: str, value: Any, category: str = 'general'):
         """Store in long-term memory"""
-        if category not in self.memory:
-            self.memory[category] = {}
-        
-        self.memory[category][key] = {
-            'value': value,
-            'stored_at': datetime.now().isoformat(),
-            'accessed_count': 0
-        }
-        
-        self._save()
+        self.store_many([(key, value)], category=category)
+    
+    def store_many(self, items: List, category: str = 'general'):
+        """Store several (key, value) pairs in one transaction"""
+        now = datetime.now().isoformat()
+        rows = []
+        with self._lock:
+            bucket = self.memory.setdefault(category, {})
+            for key, value in items:
+                bucket[key] = {
+                    'value': value,
+                    'stored_at': now,
+                    'accessed_count': 0
+                }
+                self._dirty_access.discard((category, key))
+                rows.append((category, key, pickle.dumps(value), now))
+            
+            with self._conn:
+                self._conn.executemany("""
+                    INSERT INTO memories (category, key, value, stored_at, accessed_count, last_accessed)
+                    VALUES (?, ?, ?, ?, 0, NULL)
+                    ON CONFLICT(category, key) DO UPDATE SET
+                        value = excluded.value,
+                        stored_at = excluded.stored_at,
+                        accessed_count = 0,
+                        last_accessed = NULL
+                """, rows)
     
     def recall(self, key: str, category: str = 'general') -> Optional[Any]:
         """Recall from long-term memory"""
-        if category in self.memory and key in self.memory[category]:
-            item = self.memory[category][key]
-            item['accessed_count'] += 1
-            item['last_accessed'] = datetime.now().isoformat()
-            self._save()
-            return item['value']
+        with self._lock:
+            if category in self.memory and key in self.memory[category]:
+                item = self.memory[category][key]
+                item['accessed_count'] += 1
+                item['last_accessed'] = datetime.now().isoformat()
+                self._dirty_access.add((category, key))
+                self._schedule_flush()
+                return item['value']
         return None
     
     def get_category(self, category: str) -> Dict:
@@ -107,9 +244,53 @@ class LongTermMemory:
     
     def forget(self, key: str, category: str = 'general'):
         """Remove from memory"""
-        if category in self.memory and key in self.memory[category]:
-            del self.memory[category][key]
-            self._save()
+        with self._lock:
+            if category in self.memory and key in self.memory[category]:
+                del self.memory[category][key]
+                self._dirty_access.discard((category, key))
+                with self._conn:
+                    self._conn.execute(
+                        "DELETE FROM memories WHERE category = ? AND key = ?", (category, key)
+                    )
+                if self.on_forget:
+                    self.on_forget(key, category)
+    
+    def _schedule_flush(self):
+        """Start the flush timer if one isn't already pending"""
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
+    def flush(self):
+        """Write pending access counters in one transaction"""
+        with self._lock:
+            self._flush_timer = None
+            if not self._dirty_access or self._conn is None:
+                return
+            rows = []
+            for category, key in self._dirty_access:
+                item = self.memory.get(category, {}).get(key)
+                if item:
+                    rows.append((item['accessed_count'], item.get('last_accessed'), category, key))
+            self._dirty_access.clear()
+            
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE memories SET accessed_count = ?, last_accessed = ? "
+                    "WHERE category = ? AND key = ?", rows
+                )
+    
+    def close(self):
+        """Flush pending updates and close the database"""
+        with self._lock:
+            if self._conn is None:
+                return
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+            self.flush()
+            self._conn.close()
+            self._conn = None
 
 
 class WorkingMemory:
@@ -169,9 +350,18 @@ class EpisodicMemory:
     """
     
     def __init__(self, storage_path: str = "memory/episodic"):
-        self.storage_path = Path(storage_path)
+        # Absolute: appends and their sidecars land after a later chdir
+        self.storage_path = Path(storage_path).resolve()
         self.storage_path.mkdir(parents=True, exist_ok=True)
         self.episodes = []
+        
+        # Offset sidecars for random/tail/date-range reads across restarts
+        self.archive = EpisodeArchive(self.storage_path)
+        self.writer = get_append_writer()
+        
+        # Full-text index over the whole archive, caught up on startup
+        self.index = EpisodeSearchIndex(self.storage_path)
+        self.index.sync()
     
     def store_episode(self, episode: Dict):
         """Store conversation episode"""
@@ -181,27 +371,40 @@ class EpisodicMemory:
         # Save to disk
         date_str = datetime.now().strftime("%Y-%m")
         episode_file = self.storage_path / f"{date_str}.jsonl"
+        line = (json.dumps(episode) + '\n').encode()
         
-        with open(episode_file, 'a') as f:
-            f.write(json.dumps(episode) + '\n')
-    
-    def search_episodes(self, query: str, limit: int = 10) -> List[Dict]:
-        """Search conversation history"""
-        results = []
+        # Indexes learn the offset once the group commit lands
+        def on_commit(path, offset, length):
+            self.archive.append(path.name, offset, length, episode)
+            self.index.add(path.name, offset, length, episode)
         
-        # Search recent episodes in memory
-        for episode in reversed(self.episodes[-50:]):  # Last 50 episodes
-            content = json.dumps(episode).lower()
-            if query.lower() in content:
-                results.append(episode)
-                if len(results) >= limit:
-                    break
+        self.writer.append(episode_file, line, on_commit=on_commit)
+    
+    def search_episodes(self, query: str, limit: int = 10, since: Optional[str] = None,
+                        until: Optional[str] = None, metadata: Optional[Dict] = None) -> List[Dict]:
+        """
+        Search conversation history (entire archive, BM25-ranked)
         
-        return results
+        Args:
+            query: Words to look for
+            limit: Max results
+            since / until: ISO date/time bounds on when episodes were stored
+            metadata: Exact-match metadata filters, e.g. {'session_id': 'abc'}
+        """
+        self.writer.flush()
+        return self.index.search(query, limit=limit, since=since, until=until, metadata=metadata)
     
     def get_recent_episodes(self, count: int = 10) -> List[Dict]:
-        """Get recent episodes"""
-        return self.episodes[-count:] if self.episodes else []
+        """Get recent episodes (read from the archive, so they survive restarts)"""
+        if count <= 0:
+            return []
+        self.writer.flush()
+        return self.archive.tail(count)
+    
+    def get_episodes_between(self, since=None, until=None, session_id: Optional[str] = None) -> List[Dict]:
+        """Episodes stored within a date range (epoch, datetime or ISO string)"""
+        self.writer.flush()
+        return list(self.archive.scan(since, until, session_id=session_id))
 
 
 class AdvancedMemory:
@@ -209,11 +412,24 @@ class AdvancedMemory:
     Unified memory system with all layers
     """
     
-    def __init__(self):
+    def __init__(self, consolidation_interval: Optional[float] = 60.0,
+                 consolidation_threshold: float = 3.0,
+                 consolidation_half_life: float = 600.0):
         self.short_term = ShortTermMemory()
         self.long_term = LongTermMemory()
         self.working = WorkingMemory()
         self.episodic = EpisodicMemory()
+        self.semantic = SemanticMemory()
+        self.long_term.on_forget = lambda key, category: self.semantic.forget(f"fact:{category}:{key}")
+        
+        # Promote when (stores + recalls) * 0.5^(idle / half_life) >= threshold
+        self.consolidation_threshold = consolidation_threshold
+        self.consolidation_half_life = consolidation_half_life
+        self._promoted = {}
+        self._stop_consolidation = threading.Event()
+        self._consolidation_thread = None
+        if consolidation_interval:
+            self.start_consolidation(consolidation_interval)
         
         print("🧠 Advanced Memory System initialized")
     
@@ -226,6 +442,7 @@ class AdvancedMemory:
             self.short_term.store(key, value)
         elif memory_type == 'long':
             self.long_term.store(key, value)
+            self._index_fact(key, value)
         elif memory_type == 'working':
             self.working.update_context(key, value)
     
@@ -252,23 +469,67 @@ class AdvancedMemory:
         
         return None
     
-    def consolidate(self):
+    def consolidation_score(self, counter: Dict, now: float = None) -> float:
+        """Frequency (stores + recalls) decayed by time since last use"""
+        now = now if now is not None else time.time()
+        age = max(now - counter['last_used'], 0)
+        frequency = counter['stores'] + counter['accesses']
+        return round(frequency * 0.5 ** (age / self.consolidation_half_life), 4)
+    
+    def consolidate(self) -> int:
         """
         Move important short-term memories to long-term
-        Called periodically
+        Called periodically (see start_consolidation)
+        
+        Only keys touched since the last pass are scored, and all
+        promotions go to long-term memory in one batched write.
+        Returns the number of memories promoted.
         """
-        # Get frequently accessed short-term memories
-        access_counts = defaultdict(int)
+        now = time.time()
+        promote = []
+        for key, value, counter in self.short_term.take_dirty():
+            if not value:
+                continue
+            if self.consolidation_score(counter, now) < self.consolidation_threshold:
+                continue
+            # Skip unchanged values that were already promoted
+            if self._promoted.get(key) == repr(value):
+                continue
+            promote.append((key, value))
+        
+        if not promote:
+            return 0
         
-        for item in self.short_term.memory:
-            access_counts[item['key']] += 1
+        self.long_term.store_many(promote, category='consolidated')
+        for key, value in promote:
+            self._promoted[key] = repr(value)
+            self._index_fact(key, value, category='consolidated')
+        return len(promote)
+    
+    def start_consolidation(self, interval: float = 60.0):
+        """Run consolidate() on a background thread every `interval` seconds"""
+        if self._consolidation_thread and self._consolidation_thread.is_alive():
+            return
+        self._stop_consolidation.clear()
         
-        # Move high-access items to long-term
-        for key, count in access_counts.items():
-            if count >= 3:  # Accessed 3+ times
-                value = self.short_term.recall(key)
-                if value:
-                    self.long_term.store(key, value, category='consolidated')
+        def loop():
+            while not self._stop_consolidation.wait(interval):
+                try:
+                    self.consolidate()
+                except Exception as e:
+                    print(f"⚠️ Memory consolidation failed: {e}")
+        
+        self._consolidation_thread = threading.Thread(
+            target=loop, name="memory-consolidation", daemon=True
+        )
+        self._consolidation_thread.start()
+    
+    def stop_consolidation(self):
+        """Stop the background consolidation thread"""
+        self._stop_consolidation.set()
+        if self._consolidation_thread:
+            self._consolidation_thread.join(timeout=5)
+            self._consolidation_thread = None
     
     def get_context_summary(self) -> Dict:
         """
@@ -293,6 +554,33 @@ class AdvancedMemory:
         }
         
         self.episodic.store_episode(episode)
+        
+        ref = f"{metadata.get('session_id', 'episode')}:{episode['stored_at']}"
+        payload = {'session_id': metadata.get('session_id'), 'stored_at': episode['stored_at']}
+        self.semantic.remember(f"episode:{ref}", episode_text(episode), kind='episode', payload=payload)
+        self.semantic.remember(f"summary:{ref}", episode['summary'], kind='summary', payload=payload)
+    
+    def recall_similar(self, query: str, k: int = 5, kinds: List[str] = None) -> List[Dict]:
+        """
+        Semantic recall across episodes, summaries and long-term facts
+        
+        Args:
+            query: What to look for (need not match any key exactly)
+            k: Max results
+            kinds: Restrict to 'episode', 'summary' and/or 'fact'
+        
+        Returns:
+            Best matches first: {'kind', 'ref', 'text', 'payload', 'score'}
+        """
+        return self.semantic.search(query, k=k, kinds=kinds)
+    
+    def _index_fact(self, key: str, value: Any, category: str = 'general'):
+        """Make a long-term fact findable by meaning, not just by key"""
+        text = value if isinstance(value, str) else json.dumps(value, default=str)
+        self.semantic.remember(
+            f"fact:{category}:{key}", f"{key}: {text}",
+            kind='fact', payload={'key': key, 'category': category}
+        )
     
     def _generate_episode_summary(self, conversation: List[Dict]) -> str:
         """Generate summary of conversation"""
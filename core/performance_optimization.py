@@ -3,23 +3,51 @@ Performance Optimizations for Development Capabilities
 Caching, efficiency, and resource management
 """
 
+import hashlib
+import importlib
 import json
+import multiprocessing
+import os
+import sqlite3
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from pathlib import Path
-from typing import Dict, Any, Optional
-import hashlib
+from typing import Callable, Dict, Any, Iterator, Optional, Tuple
 
 
 class PerformanceCache:
-    """High-performance caching system for development features"""
+    """
+    High-performance caching system for development features
+    
+    Two tiers:
+    - memory: LRU capped by the serialized size of its values
+    - disk: one SQLite (WAL) file, cache.db, shared by every process
+      (API server, CLI); expired rows are swept in the background
+    
+    When another process commits to cache.db (PRAGMA data_version
+    moves), memory entries are re-checked against their row before
+    being served, so no process keeps serving a value another one
+    replaced or invalidated.
+    
+    Expensive fills go through get_or_compute: one caller per key
+    computes while concurrent callers wait for its result, and types
+    with a grace period keep serving the expired value for that long
+    while a single background fill replaces it (stale-while-revalidate).
+    """
     
-    def __init__(self, cache_dir: Optional[str] = None):
+    def __init__(self, cache_dir: Optional[str] = None, max_memory_bytes: int = 32 * 1024 * 1024,
+                 sweep_interval: float = 60.0):
         self.cache_dir = Path(cache_dir) if cache_dir else Path.home() / ".novaforge" / "cache"
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_memory_bytes = max_memory_bytes
+        self.sweep_interval = sweep_interval
         
-        # In-memory cache for speed
-        self.memory_cache = {}
-        self.cache_ttl = {}  # Time-to-live tracking
+        # In-memory LRU: cache_key -> [value, expires_at, cached_at, size, epoch]
+        self.memory_cache = OrderedDict()
+        self.memory_bytes = 0
+        self.stats = {}  # cache_type -> counters
         
         # Default TTLs (in seconds)
         self.default_ttls = {
@@ -29,41 +57,219 @@ class PerformanceCache:
             "tool_results": 30,           # 30 seconds
             "workflow_results": 120       # 2 minutes
         }
+        
+        # How long past expiry get_or_compute may serve a value while refreshing it
+        self.grace_periods = {
+            "project_context": 600,
+            "workflow_results": 240
+        }
+        
+        self._lock = threading.RLock()
+        self._flights = {}  # flight key -> _Flight in progress
+        self.db_path = self.cache_dir / "cache.db"
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                cache_type TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                cached_at REAL NOT NULL,
+                PRIMARY KEY (cache_type, key)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_expiry ON cache (expires_at)")
+        self._conn.commit()
+        self._data_version = self._read_data_version()
+        self._epoch = 0
+        self._remove_legacy_files()
+        
+        self._stop = threading.Event()
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="cache-sweeper", daemon=True)
+        self._sweeper.start()
+    
+    def _remove_legacy_files(self):
+        """Drop the old one-JSON-file-per-entry cache (it's only a cache)"""
+        for cache_file in self.cache_dir.glob("*.json"):
+            try:
+                cache_file.unlink()
+            except OSError:
+                pass
+    
+    def _counters(self, cache_type: str) -> Dict[str, int]:
+        counters = self.stats.get(cache_type)
+        if counters is None:
+            counters = self.stats[cache_type] = {
+                'hits': 0, 'memory_hits': 0, 'disk_hits': 0, 'misses': 0,
+                'sets': 0, 'evictions': 0, 'expirations': 0,
+                'stale_hits': 0, 'fills': 0, 'coalesced': 0
+            }
+        return counters
+    
+    def _read_data_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+    
+    def _check_other_writers(self):
+        """New epoch when another connection has committed since we last looked"""
+        version = self._read_data_version()
+        if version != self._data_version:
+            self._data_version = version
+            self._epoch += 1
     
     def get(self, cache_type: str, key: str) -> Optional[Any]:
         """Get from cache with TTL check"""
+        with self._lock:
+            found = self._lookup(cache_type, key, time.time())
+            return found[0] if found and found[1] else None
+    
+    def _lookup(self, cache_type: str, key: str, now: float):
+        """
+        (value, fresh) for an entry that is live or within its grace
+        period, else None; counts a hit only for fresh values
+        """
         cache_key = f"{cache_type}:{key}"
+        grace = self.grace_periods.get(cache_type, 0)
+        counters = self._counters(cache_type)
+        self._check_other_writers()
         
         # Check memory cache first
-        if cache_key in self.memory_cache:
-            ttl_key = f"{cache_key}:ttl"
-            if ttl_key in self.cache_ttl:
-                if time.time() < self.cache_ttl[ttl_key]:
-                    return self.memory_cache[cache_key]
-                else:
-                    # Expired, remove
-                    del self.memory_cache[cache_key]
-                    del self.cache_ttl[ttl_key]
+        entry = self.memory_cache.get(cache_key)
+        if entry is not None:
+            value, expires_at, cached_at, size, epoch = entry
+            if now >= expires_at + grace:
+                self._drop_memory(cache_key)
+                counters['expirations'] += 1
+            elif epoch == self._epoch or self._row_cached_at(cache_type, key) == cached_at:
+                entry[4] = self._epoch
+                self.memory_cache.move_to_end(cache_key)
+                if now >= expires_at:
+                    counters['misses'] += 1
+                    return value, False
+                counters['hits'] += 1
+                counters['memory_hits'] += 1
+                return value, True
+            else:
+                self._drop_memory(cache_key)  # replaced or removed by another process
         
         # Check disk cache
-        cache_file = self.cache_dir / f"{self._hash_key(cache_key)}.json"
-        if cache_file.exists():
+        row = self._conn.execute(
+            "SELECT value, expires_at, cached_at FROM cache WHERE cache_type = ? AND key = ?",
+            (cache_type, key)
+        ).fetchone()
+        if row is None or now >= row[1] + grace:
+            counters['misses'] += 1
+            return None
+        
+        value = json.loads(row[0])
+        self._remember(cache_key, value, row[1], row[2], len(row[0]))
+        if now >= row[1]:
+            counters['misses'] += 1
+            return value, False
+        counters['hits'] += 1
+        counters['disk_hits'] += 1
+        return value, True
+    
+    def get_or_compute(self, cache_type: str, key: str, compute: Callable[[], Any],
+                       ttl: Optional[int] = None) -> Any:
+        """
+        Cached value, or compute() it - once, however many callers ask
+        
+        Within the type's grace period an expired value is returned
+        right away and refreshed by one background fill. On a miss the
+        first caller computes and stores; the others block on its result
+        (or its exception).
+        """
+        with self._lock:
+            found = self._lookup(cache_type, key, time.time())
+            if found is not None:
+                value, fresh = found
+                if not fresh:
+                    self._counters(cache_type)['stale_hits'] += 1
+                    self._refresh_in_background(cache_type, key, compute, ttl)
+                return value
+        return self.single_flight(f"{cache_type}:{key}", lambda: self._fill(cache_type, key, compute, ttl),
+                                  cache_type)
+    
+    def _fill(self, cache_type: str, key: str, compute: Callable[[], Any], ttl: Optional[int]) -> Any:
+        value = compute()
+        self.set(cache_type, key, value, ttl=ttl)
+        with self._lock:
+            self._counters(cache_type)['fills'] += 1
+        return value
+    
+    def _refresh_in_background(self, cache_type: str, key: str, compute: Callable[[], Any],
+                               ttl: Optional[int]):
+        flight_key = f"{cache_type}:{key}"
+        with self._lock:
+            if flight_key in self._flights:
+                return  # already being refreshed
+            flight = self._flights[flight_key] = _Flight()
+        
+        def refresh():
             try:
-                with open(cache_file, 'r') as f:
-                    data = json.load(f)
-                    
-                if time.time() < data.get('expires_at', 0):
-                    # Cache hit, load to memory
-                    self.memory_cache[cache_key] = data['value']
-                    self.cache_ttl[f"{cache_key}:ttl"] = data['expires_at']
-                    return data['value']
-                else:
-                    # Expired, remove file
-                    cache_file.unlink()
-            except:
-                pass
-        
-        return None
+                self._lead(flight_key, flight, lambda: self._fill(cache_type, key, compute, ttl))
+            except Exception as e:
+                print(f"⚠️ Background refresh of {flight_key} failed: {e}")
+        threading.Thread(target=refresh, name="cache-refresh", daemon=True).start()
+    
+    def single_flight(self, flight_key: str, compute: Callable[[], Any], cache_type: Optional[str] = None) -> Any:
+        """
+        Run compute() unless a call with the same key is already running,
+        in which case wait for that one and share its outcome
+        """
+        with self._lock:
+            flight = self._flights.get(flight_key)
+            if flight is None:
+                flight = self._flights[flight_key] = _Flight()
+                leader = True
+            else:
+                leader = False
+                if cache_type:
+                    self._counters(cache_type)['coalesced'] += 1
+        
+        if leader:
+            return self._lead(flight_key, flight, compute)
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+    
+    def _lead(self, flight_key: str, flight: '_Flight', compute: Callable[[], Any]) -> Any:
+        try:
+            flight.value = compute()
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(flight_key, None)
+            flight.done.set()
+    
+    def _row_cached_at(self, cache_type: str, key: str) -> Optional[float]:
+        row = self._conn.execute(
+            "SELECT cached_at FROM cache WHERE cache_type = ? AND key = ?", (cache_type, key)
+        ).fetchone()
+        return row[0] if row else None
+    
+    def _remember(self, cache_key: str, value: Any, expires_at: float, cached_at: float, size: int):
+        """Put an entry in the memory tier and evict LRU entries past the byte cap"""
+        self._drop_memory(cache_key)
+        if size > self.max_memory_bytes:
+            return  # would evict everything else; serve it from disk instead
+        self.memory_cache[cache_key] = [value, expires_at, cached_at, size, self._epoch]
+        self.memory_bytes += size
+        while self.memory_bytes > self.max_memory_bytes:
+            old_key, old = self.memory_cache.popitem(last=False)
+            self.memory_bytes -= old[3]
+            self._counters(old_key.split(':', 1)[0])['evictions'] += 1
+    
+    def _drop_memory(self, cache_key: str):
+        entry = self.memory_cache.pop(cache_key, None)
+        if entry is not None:
+            self.memory_bytes -= entry[3]
     
     def set(self, cache_type: str, key: str, value: Any, ttl: Optional[int] = None):
         """Set cache with TTL"""
@@ -72,130 +278,413 @@ class PerformanceCache:
         if ttl is None:
             ttl = self.default_ttls.get(cache_type, 60)
         
-        expires_at = time.time() + ttl
-        
-        # Store in memory
-        self.memory_cache[cache_key] = value
-        self.cache_ttl[f"{cache_key}:ttl"] = expires_at
-        
-        # Store on disk for persistence
-        cache_file = self.cache_dir / f"{self._hash_key(cache_key)}.json"
+        now = time.time()
+        expires_at = now + ttl
         try:
-            with open(cache_file, 'w') as f:
-                json.dump({
-                    'value': value,
-                    'expires_at': expires_at,
-                    'cached_at': time.time()
-                }, f)
-        except:
-            pass
+            data = json.dumps(value)
+        except (TypeError, ValueError):
+            data = None  # not JSON-serializable: memory tier only
+        
+        with self._lock:
+            self._counters(cache_type)['sets'] += 1
+            self._remember(cache_key, value, expires_at, now, len(data) if data else len(str(value)))
+            
+            # Store on disk for persistence (and for other processes)
+            if data is not None:
+                try:
+                    with self._conn:
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO cache (cache_type, key, value, expires_at, cached_at) "
+                            "VALUES (?, ?, ?, ?, ?)",
+                            (cache_type, key, data, expires_at, now)
+                        )
+                except sqlite3.Error as e:
+                    print(f"⚠️ Cache write failed: {e}")
     
     def invalidate(self, cache_type: str, key: Optional[str] = None):
         """Invalidate cache entries"""
-        if key:
-            cache_key = f"{cache_type}:{key}"
-            if cache_key in self.memory_cache:
-                del self.memory_cache[cache_key]
-            
-            ttl_key = f"{cache_key}:ttl"
-            if ttl_key in self.cache_ttl:
-                del self.cache_ttl[ttl_key]
-            
-            cache_file = self.cache_dir / f"{self._hash_key(cache_key)}.json"
-            if cache_file.exists():
-                cache_file.unlink()
-        else:
-            # Invalidate all of this type
-            keys_to_remove = [k for k in self.memory_cache.keys() if k.startswith(f"{cache_type}:")]
-            for k in keys_to_remove:
-                del self.memory_cache[k]
-                ttl_key = f"{k}:ttl"
-                if ttl_key in self.cache_ttl:
-                    del self.cache_ttl[ttl_key]
+        with self._lock:
+            if key:
+                self._drop_memory(f"{cache_type}:{key}")
+                where, args = "cache_type = ? AND key = ?", (cache_type, key)
+            else:
+                # Invalidate all of this type
+                prefix = f"{cache_type}:"
+                for k in [k for k in self.memory_cache if k.startswith(prefix)]:
+                    self._drop_memory(k)
+                where, args = "cache_type = ?", (cache_type,)
+            with self._conn:
+                self._conn.execute(f"DELETE FROM cache WHERE {where}", args)
     
     def clear_all(self):
         """Clear all caches"""
-        self.memory_cache.clear()
-        self.cache_ttl.clear()
-        
-        # Clear disk cache
-        for cache_file in self.cache_dir.glob("*.json"):
+        with self._lock:
+            self.memory_cache.clear()
+            self.memory_bytes = 0
+            with self._conn:
+                self._conn.execute("DELETE FROM cache")
+    
+    def sweep_expired(self) -> int:
+        """Delete entries past expiry (and grace period) from both tiers; returns rows removed from disk"""
+        now = time.time()
+        with self._lock:
+            for cache_key, entry in list(self.memory_cache.items()):
+                cache_type = cache_key.split(':', 1)[0]
+                if now >= entry[1] + self.grace_periods.get(cache_type, 0):
+                    self._drop_memory(cache_key)
+                    self._counters(cache_type)['expirations'] += 1
+            with self._conn:
+                graced = list(self.grace_periods)
+                removed = self._conn.execute(
+                    f"DELETE FROM cache WHERE expires_at <= ? AND cache_type NOT IN ({','.join('?' * len(graced))})",
+                    (now, *graced)
+                ).rowcount
+                for cache_type, grace in self.grace_periods.items():
+                    removed += self._conn.execute(
+                        "DELETE FROM cache WHERE cache_type = ? AND expires_at <= ?", (cache_type, now - grace)
+                    ).rowcount
+        return removed
+    
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
             try:
-                cache_file.unlink()
-            except:
-                pass
+                self.sweep_expired()
+            except sqlite3.Error as e:
+                print(f"⚠️ Cache sweep failed: {e}")
     
-    def _hash_key(self, key: str) -> str:
-        """Hash key for filename"""
-        return hashlib.md5(key.encode()).hexdigest()
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            self._conn.close()
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
-        return {
-            "memory_entries": len(self.memory_cache),
-            "disk_entries": len(list(self.cache_dir.glob("*.json"))),
-            "cache_types": list(set(k.split(':')[0] for k in self.memory_cache.keys()))
-        }
+        with self._lock:
+            disk_entries = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            return {
+                "memory_entries": len(self.memory_cache),
+                "memory_bytes": self.memory_bytes,
+                "max_memory_bytes": self.max_memory_bytes,
+                "disk_entries": disk_entries,
+                "disk_bytes": sum(p.stat().st_size for p in self.cache_dir.glob("cache.db*")),
+                "cache_types": sorted(set(k.split(':')[0] for k in self.memory_cache.keys()) | set(self.stats)),
+                "by_type": {
+                    cache_type: {
+                        **counters,
+                        "hit_rate": round(counters['hits'] / (counters['hits'] + counters['misses']), 3)
+                        if counters['hits'] + counters['misses'] else 0.0
+                    }
+                    for cache_type, counters in self.stats.items()
+                }
+            }
+
+
+class _Flight:
+    """One in-progress single_flight computation"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
 
 
 # Global cache instance
 _global_cache = None
+_global_cache_lock = threading.Lock()
 
 def get_cache() -> PerformanceCache:
     """Get global cache instance"""
     global _global_cache
-    if _global_cache is None:
-        _global_cache = PerformanceCache()
+    with _global_cache_lock:
+        if _global_cache is None:
+            _global_cache = PerformanceCache()
     return _global_cache
 
 
+# Long enough to mean "until the file changes"; fingerprints do the invalidating
+PERSISTENT_TTL = 10 * 365 * 24 * 3600
+
+
+def file_fingerprint(path: str) -> Optional[Dict[str, int]]:
+    """(size, mtime_ns) of a file, or None if it can't be stat'ed"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def content_hash(path: str) -> Optional[str]:
+    """sha256 of a file's bytes (streamed)"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+class FileResultCache:
+    """
+    Per-file results that stay valid exactly as long as the file does
+    
+    Entries are keyed by absolute path and stamped with the file's
+    (size, mtime_ns) when it was read. A lookup with the same stamp is
+    a hit, whatever its age; any other stamp is a miss. With
+    use_content_hash, a changed stamp but identical sha256 (touch,
+    checkout, copy) still hits and re-stamps the entry.
+    
+    Files modified within RACY_SECONDS of being cached could change
+    again inside the same mtime tick, so such entries always get a
+    content hash and are confirmed by it on their next hit. The hash is
+    taken by lookup(), before the analysis reads the file: a rewrite
+    during the analysis then fails the confirmation instead of the
+    old result being stored under the new content's hash.
+    """
+    
+    RACY_SECONDS = 2.0
+    
+    def __init__(self, cache: PerformanceCache, cache_type: str, use_content_hash: bool = False):
+        self.cache = cache
+        self.cache_type = cache_type
+        self.use_content_hash = use_content_hash
+        self.stats = {'hits': 0, 'hash_hits': 0, 'misses': 0, 'stale': 0}
+    
+    def lookup(self, file_path: str):
+        """
+        Returns (result or None, fingerprint) - pass the fingerprint to
+        store() so a file that changes while being analyzed isn't
+        cached under its new stamp or hash.
+        """
+        path = os.path.abspath(file_path)
+        fingerprint = file_fingerprint(path)
+        if fingerprint is None:
+            return None, None
+        
+        entry = self.cache.get(self.cache_type, path)
+        if not entry:
+            self.stats['misses'] += 1
+            return None, self._with_hash(path, fingerprint)
+        
+        same_stamp = entry['size'] == fingerprint['size'] and entry['mtime_ns'] == fingerprint['mtime_ns']
+        if same_stamp and not entry.get('racy'):
+            self.stats['hits'] += 1
+            return entry['result'], fingerprint
+        
+        if entry.get('sha256') and entry['size'] == fingerprint['size'] and (
+            self.use_content_hash or entry.get('racy')
+        ):
+            fingerprint['sha256'] = content_hash(path)
+            if fingerprint['sha256'] == entry['sha256']:
+                self.stats['hash_hits'] += 1
+                self.store(path, entry['result'], fingerprint)
+                return entry['result'], fingerprint
+        
+        self.stats['stale'] += 1
+        return None, self._with_hash(path, fingerprint)
+    
+    def _racy(self, fingerprint: Dict[str, Any]) -> bool:
+        return time.time() - fingerprint['mtime_ns'] / 1e9 < self.RACY_SECONDS
+    
+    def _with_hash(self, path: str, fingerprint: Dict[str, Any]) -> Dict[str, Any]:
+        """Hash a file about to be analyzed when its entry will need one"""
+        if 'sha256' not in fingerprint and (self.use_content_hash or self._racy(fingerprint)):
+            fingerprint['sha256'] = content_hash(path)
+        return fingerprint
+    
+    def store(self, file_path: str, result: Any, fingerprint: Dict[str, Any]):
+        """Cache a result computed from the file as it was at `fingerprint` (from lookup())"""
+        path = os.path.abspath(file_path)
+        self.cache.set(self.cache_type, path, {
+            'size': fingerprint['size'],
+            'mtime_ns': fingerprint['mtime_ns'],
+            'sha256': fingerprint.get('sha256'),
+            'racy': self._racy(fingerprint),
+            'result': result
+        }, ttl=PERSISTENT_TTL)
+    
+    def invalidate(self, file_path: str):
+        self.cache.invalidate(self.cache_type, os.path.abspath(file_path))
+
+
 class OptimizedProjectContext:
-    """Optimized project context with caching"""
+    """
+    Optimized project context with caching
+    
+    With watch(), the cached analysis no longer expires on a TTL: a
+    ChangeDetector invalidates it when the tree changes in a way
+    ProjectContextAnalyzer can see (files or directories added, removed
+    or renamed, or the manifests it reads edited), and a rebuild runs in
+    the background once changes have settled for `debounce` seconds.
+    Meanwhile callers get the previous snapshot, so only the very first
+    call of a process can wait on the analyzer. Plain content edits only
+    drop that file's analyze_file / check_syntax results.
+    """
+    
+    # Files whose contents (not just existence) the analyzer reads
+    CONTENT_FILES = ('requirements.txt', 'package.json')
     
-    def __init__(self, project_root: str):
+    def __init__(self, project_root: str, debounce: float = 1.0):
         self.project_root = Path(project_root)
         self.cache = get_cache()
         self._cache_key = str(self.project_root.absolute())
+        self.debounce = debounce
+        self.detector = None
+        self.stats = {'changes': 0, 'invalidations': 0, 'rebuilds': 0}
+        self._snapshot = None  # (context, ai_context) of the last build
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._timer = None
+        self._rebuilding = False
+    
+    @property
+    def watching(self) -> bool:
+        return self.detector is not None
+    
+    def watch(self, use_inotify: bool = True, poll_interval: float = 2.0) -> str:
+        """Start change detection and a background build; returns the backend"""
+        from core.fs_watcher import ChangeDetector
+        
+        with self._lock:
+            if self.detector is None:
+                self.detector = ChangeDetector(
+                    self.project_root, self._on_change, watch_files=self.CONTENT_FILES,
+                    poll_interval=poll_interval, use_inotify=use_inotify
+                )
+                self.detector.start()
+                print(f"👀 Watching {self.project_root} for changes ({self.detector.backend})")
+        # Whatever is cached may predate this process
+        self._schedule_rebuild(0)
+        return self.detector.backend
+    
+    def stop(self):
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            detector, self.detector = self.detector, None
+        if detector:
+            detector.stop()
     
     def get_context(self, force_refresh: bool = False) -> Dict[str, Any]:
         """Get project context with caching"""
-        
-        if not force_refresh:
-            cached = self.cache.get("project_context", self._cache_key)
-            if cached:
-                return cached
-        
-        # Analyze project
-        from core.project_context import ProjectContextAnalyzer
-        
-        analyzer = ProjectContextAnalyzer(str(self.project_root))
-        context = analyzer.analyze_project()
-        
-        # Cache result
-        self.cache.set("project_context", self._cache_key, context)
-        
-        return context
+        return self._get(0, force_refresh)
     
     def get_ai_context(self, force_refresh: bool = False) -> str:
         """Get AI context string with caching"""
-        cache_key = f"{self._cache_key}:ai"
-        
-        if not force_refresh:
-            cached = self.cache.get("project_context", cache_key)
-            if cached:
-                return cached
-        
-        from core.project_context import get_ai_context
-        
-        context = get_ai_context(str(self.project_root))
-        self.cache.set("project_context", cache_key, context)
+        return self._get(1, force_refresh)
+    
+    def _get(self, part: int, force_refresh: bool):
+        if force_refresh:
+            return self.refresh()[part]
+        cache_key = self._cache_key if part == 0 else f"{self._cache_key}:ai"
+        if self._snapshot is None:
+            # Nothing built by this instance: cached (or within grace) value, else one shared build
+            ttl = PERSISTENT_TTL if self.watching else None
+            return self.cache.get_or_compute("project_context", cache_key, lambda: self._build()[part], ttl=ttl)
+        cached = self.cache.get("project_context", cache_key)
+        if cached:
+            return cached
+        # Stale: serve the last build while a fresh one runs
+        self._schedule_rebuild(0, only_if_idle=True)
+        return self._snapshot[part]
+    
+    def _build(self) -> Tuple[Dict[str, Any], str]:
+        """refresh(), joining a build of this root that is already running"""
+        return self.cache.single_flight(f"project_context:{self._cache_key}:build", self.refresh,
+                                        "project_context")
+    
+    def refresh(self) -> Tuple[Dict[str, Any], str]:
+        """Analyze the project now; returns (context, ai_context)"""
+        from core.project_context import ProjectContextAnalyzer
         
-        return context
+        with self._rebuild_lock:
+            analyzer = ProjectContextAnalyzer(str(self.project_root))
+            context = analyzer.analyze_project()
+            ai_context = analyzer.generate_ai_context()
+            
+            # Snapshot first: a reader that sees one new key but misses the other gets both from it
+            self._snapshot = (context, ai_context)
+            # Watched entries stay until a change invalidates them
+            ttl = PERSISTENT_TTL if self.watching else None
+            self.cache.set("project_context", self._cache_key, context, ttl=ttl)
+            self.cache.set("project_context", f"{self._cache_key}:ai", ai_context, ttl=ttl)
+            self.stats['rebuilds'] += 1
+        return context, ai_context
+    
+    def _on_change(self, changes: Dict[str, str]):
+        """ChangeDetector callback"""
+        self.stats['changes'] += len(changes)
+        structural = False
+        for path, kind in changes.items():
+            if kind == 'modified' and not self._is_content_file(path):
+                for cache_type in ("file_analysis", "syntax_check"):
+                    self.cache.invalidate(cache_type, path)
+            else:
+                structural = True
+                if kind == 'deleted':
+                    for cache_type in ("file_analysis", "syntax_check"):
+                        self.cache.invalidate(cache_type, path)
+        if structural:
+            self.invalidate()
+            self._schedule_rebuild(self.debounce)
+    
+    def _is_content_file(self, path: str) -> bool:
+        return os.path.dirname(path) == self._cache_key and os.path.basename(path) in self.CONTENT_FILES
+    
+    def _schedule_rebuild(self, delay: float, only_if_idle: bool = False):
+        """(Re)start the debounce timer; the rebuild runs when it fires"""
+        with self._lock:
+            if only_if_idle and (self._timer or self._rebuilding):
+                return
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(delay, self._rebuild)
+            self._timer.daemon = True
+            self._timer.start()
+    
+    def _rebuild(self):
+        with self._lock:
+            self._timer = None
+            self._rebuilding = True
+        try:
+            self._build()
+        except Exception as e:
+            print(f"⚠️ Project context rebuild failed: {e}")
+        finally:
+            with self._lock:
+                self._rebuilding = False
     
     def invalidate(self):
         """Invalidate cached context"""
+        self.stats['invalidations'] += 1
         self.cache.invalidate("project_context", self._cache_key)
         self.cache.invalidate("project_context", f"{self._cache_key}:ai")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'backend': self.detector.backend if self.detector else None,
+            'has_snapshot': self._snapshot is not None,
+            'rebuild_pending': self._timer is not None or self._rebuilding
+        }
+
+
+# Shared, watched contexts - one per project root
+_project_contexts = {}
+_project_contexts_lock = threading.Lock()
+
+def get_project_context(project_root: str) -> OptimizedProjectContext:
+    """Get the watched project context for a root (starts watching on first use)"""
+    key = str(Path(project_root).absolute())
+    with _project_contexts_lock:
+        context = _project_contexts.get(key)
+        if context is None:
+            context = _project_contexts[key] = OptimizedProjectContext(key)
+            context.watch()
+    return context
 
 
 class OptimizedWorkflowExecutor:
@@ -215,73 +704,182 @@ class OptimizedWorkflowExecutor:
         # Create cache key from workflow and params
         cache_key = f"{workflow_name}:{json.dumps(params, sort_keys=True)}"
         
-        if use_cache:
-            cached = self.cache.get("workflow_results", cache_key)
-            if cached:
-                cached['from_cache'] = True
-                return cached
+        if not use_cache:
+            result = self.workflow.execute_workflow(workflow_name, params)
+            result['from_cache'] = False
+            return result
         
-        # Execute workflow
-        result = self.workflow.execute_workflow(workflow_name, params)
+        # Concurrent identical requests share one run; an expired result is
+        # served during its grace period while one run refreshes it
+        ran = []
+        caller = threading.get_ident()
         
-        # Cache result
-        if use_cache:
-            self.cache.set("workflow_results", cache_key, result)
+        def run():
+            if threading.get_ident() == caller:  # not a background refresh
+                ran.append(True)
+            return self.workflow.execute_workflow(workflow_name, params)
         
-        result['from_cache'] = False
+        result = dict(self.cache.get_or_compute("workflow_results", cache_key, run))
+        result['from_cache'] = not ran
         return result
 
 
+# File tools that are pure functions of one file, so they can run in worker processes
+PROCESS_POOL_TOOLS = {
+    "analyze_file": ("tools.code.code_tools", "analyze_file"),
+    "check_syntax": ("tools.code.code_tools", "check_syntax"),
+}
+
+
+def analyze_chunk(job: Tuple[str, str, str, list]) -> list:
+    """Worker: run one file tool over a chunk of paths"""
+    tool_name, module_name, function_name, paths = job
+    function = getattr(importlib.import_module(module_name), function_name)
+    results = []
+    for path in paths:
+        try:
+            result = function(path)
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        if isinstance(result, dict):
+            result['tool'] = tool_name
+        results.append((path, result))
+    return results
+
+
+def batch_worker_count(controller=None, requested: Optional[int] = None) -> int:
+    """
+    Worker processes for a batch: usable cores, capped by the
+    performance controller's CPU thread setting and, when its usage
+    limiter is on, by its CPU usage percentage
+    """
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    
+    workers = cores
+    if controller is not None:
+        workers = min(workers, max(1, int(getattr(controller, 'cpu_threads', cores))))
+        if getattr(controller, 'usage_limiter_enabled', False):
+            percent = controller.get_current_settings().get('actual_cpu_usage', 100)
+            workers = min(workers, max(1, int(cores * percent / 100)))
+    if requested:
+        workers = min(workers, requested)
+    return max(1, workers)
+
+
 class BatchOperationOptimizer:
-    """Optimize batch operations for better performance"""
+    """
+    Optimize batch operations for better performance
     
-    def __init__(self, tool_executor):
+    Unchanged files come from the fingerprint cache. The rest run in
+    this process for small batches, or in chunks across a process pool
+    (AST work is CPU-bound, so threads wouldn't help) with results
+    streamed back as each chunk finishes.
+    """
+    
+    def __init__(self, tool_executor, use_content_hash: bool = False, controller=None,
+                 pool_threshold: int = 64, max_chunk: int = 256):
         self.tool_executor = tool_executor
         self.cache = get_cache()
+        self.analysis_cache = FileResultCache(self.cache, "file_analysis", use_content_hash)
+        self.syntax_cache = FileResultCache(self.cache, "syntax_check", use_content_hash)
+        self.controller = controller
+        self.pool_threshold = pool_threshold
+        self.max_chunk = max_chunk
+        self.last_batch_stats = None
     
-    def analyze_multiple_files(self, file_paths: list) -> Dict[str, Any]:
-        """Analyze multiple files efficiently"""
-        results = {}
-        
-        for file_path in file_paths:
-            # Check cache first
-            cached = self.cache.get("file_analysis", file_path)
-            if cached:
-                results[file_path] = cached
-                continue
-            
-            # Analyze file
-            result = self.tool_executor.execute_tool("analyze_file", {"file_path": file_path})
-            
-            if result.get("status") == "success":
-                analysis = result.get("result", {})
-                results[file_path] = analysis
-                
-                # Cache result
-                self.cache.set("file_analysis", file_path, analysis)
-        
-        return results
+    def _get_controller(self):
+        if self.controller is None:
+            try:
+                from core.resource_monitor import get_controller
+                self.controller = get_controller()
+            except Exception:
+                self.controller = False  # unavailable; don't retry
+        return self.controller or None
+    
+    def analyze_multiple_files(self, file_paths: list, workers: Optional[int] = None) -> Dict[str, Any]:
+        """Analyze multiple files efficiently (unchanged files come from cache)"""
+        return dict(self.iter_file_results("analyze_file", file_paths, workers))
     
-    def check_multiple_syntax(self, file_paths: list) -> Dict[str, Any]:
+    def check_multiple_syntax(self, file_paths: list, workers: Optional[int] = None) -> Dict[str, Any]:
         """Check syntax of multiple Python files efficiently"""
-        results = {}
-        
         python_files = [f for f in file_paths if f.endswith('.py')]
+        return dict(self.iter_file_results("check_syntax", python_files, workers))
+    
+    def iter_file_results(self, tool_name: str, file_paths: list,
+                          workers: Optional[int] = None) -> Iterator[Tuple[str, Dict]]:
+        """
+        Yield (path, result) for each file that analyzed successfully,
+        cached ones first, the rest as they finish
+        """
+        file_cache = self.syntax_cache if tool_name == "check_syntax" else self.analysis_cache
+        started = time.monotonic()
+        stats = {'files': len(file_paths), 'cached': 0, 'computed': 0, 'failed': 0, 'workers': 1}
+        
+        pending = {}
+        for file_path in file_paths:
+            cached, fingerprint = file_cache.lookup(file_path)
+            if cached is not None:
+                stats['cached'] += 1
+                yield file_path, cached
+            elif fingerprint:
+                pending[file_path] = fingerprint
+            else:
+                stats['failed'] += 1  # missing or unreadable
         
-        for file_path in python_files:
-            cached = self.cache.get("syntax_check", file_path)
-            if cached:
-                results[file_path] = cached
-                continue
-            
-            result = self.tool_executor.execute_tool("check_syntax", {"file_path": file_path})
-            
-            if result.get("status") == "success":
-                syntax_result = result.get("result", {})
-                results[file_path] = syntax_result
-                self.cache.set("syntax_check", file_path, syntax_result, ttl=30)
+        if tool_name in PROCESS_POOL_TOOLS and len(pending) >= self.pool_threshold:
+            stats['workers'] = batch_worker_count(self._get_controller(), workers)
+        
+        if stats['workers'] > 1:
+            results = self._run_pool(tool_name, list(pending), stats['workers'])
+        else:
+            results = ((path, self._compute_file(tool_name, path, pending[path])) for path in pending)
         
-        return results
+        for file_path, result in results:
+            if result.get("success"):
+                stats['computed'] += 1
+                file_cache.store(file_path, result, pending[file_path])
+                yield file_path, result
+            else:
+                stats['failed'] += 1
+        
+        stats['seconds'] = round(time.monotonic() - started, 3)
+        self.last_batch_stats = stats
+    
+    def _compute_file(self, tool_name: str, path: str, fingerprint: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the tool on one file; concurrent batches asking for the same file version share the run"""
+        flight_key = f"{tool_name}:{os.path.abspath(path)}:{fingerprint['size']}:{fingerprint['mtime_ns']}"
+        return self.cache.single_flight(
+            flight_key, lambda: self.tool_executor.execute_tool(tool_name, {"file_path": path}),
+            "syntax_check" if tool_name == "check_syntax" else "file_analysis"
+        )
+    
+    def _run_pool(self, tool_name: str, paths: list, workers: int) -> Iterator[Tuple[str, Dict]]:
+        """Chunked submission with a bounded number of chunks in flight"""
+        module_name, function_name = PROCESS_POOL_TOOLS[tool_name]
+        chunk = max(1, min(self.max_chunk, len(paths) // (workers * 4)))
+        chunks = iter([
+            (tool_name, module_name, function_name, paths[i:i + chunk])
+            for i in range(0, len(paths), chunk)
+        ])
+        
+        # spawn: the API server is multithreaded, and forking it isn't safe
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            in_flight = set()
+            for job in chunks:
+                in_flight.add(pool.submit(analyze_chunk, job))
+                if len(in_flight) >= workers * 2:
+                    break
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+                    job = next(chunks, None)
+                    if job is not None:
+                        in_flight.add(pool.submit(analyze_chunk, job))
 
 
 class IntelligentResourceManager:
@@ -299,9 +897,8 @@ class IntelligentResourceManager:
         if operation_type in expensive_ops:
             return True
         
-        # Cache file operations if file hasn't changed recently
+        # File results are validated by (size, mtime_ns) fingerprint, see FileResultCache
         if operation_type in ["analyze_file", "check_syntax"]:
-            # In production, would check file modification time
             return True
         
         # Don't cache git status (changes frequently)
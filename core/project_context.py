@@ -3,18 +3,26 @@ Project Context Analyzer - Understands codebases for intelligent assistance
 Similar to how GitHub Copilot understands your project
 """
 
-import os
+import hashlib
 import json
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Set
 import re
 
+from core.repo_scanner import LanguageVisitor, ScanVisitor, StructureVisitor, scan
+from core.scan_snapshot import ScanSnapshot
+
+# Per-project directory snapshots for incremental rescans
+SNAPSHOT_DIR = Path.home() / ".novaforge" / "scan_snapshots"
+
 
 class ProjectContextAnalyzer:
     """Analyzes project structure and builds context for AI assistance"""
     
-    def __init__(self, project_root: str):
+    def __init__(self, project_root: str, incremental: bool = True, snapshot_dir: Optional[str] = None):
         self.project_root = Path(project_root)
+        self.incremental = incremental
+        self.snapshot_dir = Path(snapshot_dir) if snapshot_dir else None
         self.context = {
             "languages": set(),
             "frameworks": set(),
@@ -25,62 +33,51 @@ class ProjectContextAnalyzer:
             "key_files": [],
             "technology_stack": []
         }
+        self.scan_stats = None
     
-    def analyze_project(self) -> Dict[str, Any]:
-        """Perform comprehensive project analysis"""
+    def analyze_project(self, visitors: Optional[List[ScanVisitor]] = None) -> Dict[str, Any]:
+        """
+        Perform comprehensive project analysis
+        
+        Extra scan visitors (e.g. TodoVisitor, LineCountVisitor) ride
+        along on the same walk of the tree.
+        """
         print("🔍 Analyzing project structure...")
         
         # Analyze different aspects
-        self._detect_languages()
+        self._scan_tree(visitors or [])
         self._detect_frameworks()
         self._analyze_dependencies()
-        self._analyze_structure()
         self._detect_patterns()
         self._identify_key_files()
         
         return self.get_context_summary()
     
-    def _detect_languages(self):
-        """Detect programming languages used"""
-        language_extensions = {
-            '.py': 'Python',
-            '.js': 'JavaScript',
-            '.jsx': 'React/JSX',
-            '.ts': 'TypeScript',
-            '.tsx': 'React/TypeScript',
-            '.java': 'Java',
-            '.cpp': 'C++',
-            '.c': 'C',
-            '.go': 'Go',
-            '.rs': 'Rust',
-            '.rb': 'Ruby',
-            '.php': 'PHP',
-            '.sh': 'Shell',
-            '.md': 'Markdown',
-            '.json': 'JSON',
-            '.yaml': 'YAML',
-            '.yml': 'YAML'
-        }
-        
-        file_counts = {}
-        
-        for root, dirs, files in os.walk(self.project_root):
-            # Skip common ignore directories
-            dirs[:] = [d for d in dirs if d not in {
-                'node_modules', '.git', 'venv', '__pycache__', 
-                'dist', 'build', '.next', 'target'
-            }]
-            
-            for file in files:
-                ext = Path(file).suffix.lower()
-                if ext in language_extensions:
-                    lang = language_extensions[ext]
-                    file_counts[lang] = file_counts.get(lang, 0) + 1
+    def _scan_tree(self, extra_visitors: List[ScanVisitor]):
+        """
+        Languages and structure from one walk of the tree
+        
+        Incrementally, from the project's directory snapshot, unless
+        extra visitors need to see every file anyway.
+        """
+        languages = LanguageVisitor()
+        structure = StructureVisitor()
+        if self.incremental and not extra_visitors:
+            self.scan_stats = ScanSnapshot(self.project_root, [languages, structure], self._snapshot_path()).scan()
+        else:
+            self.scan_stats = scan(self.project_root, [languages, structure, *extra_visitors])
         
         # Add languages with significant presence
-        for lang, count in file_counts.items():
+        for lang, count in languages.result().items():
             if count >= 3 or lang in ['Python', 'JavaScript', 'TypeScript']:
                 self.context["languages"].add(lang)
+        
+        self.context["structure"] = structure.result()
+    
+    def _snapshot_path(self) -> Path:
+        root = str(self.project_root.absolute())
+        name = hashlib.sha1(root.encode()).hexdigest()[:16]
+        return (self.snapshot_dir or SNAPSHOT_DIR) / f"{name}.json"
     
     def _detect_frameworks(self):
         """Detect frameworks and libraries"""
@@ -150,33 +147,6 @@ class ProjectContextAnalyzer:
             except:
                 pass
     
-    def _analyze_structure(self):
-        """Analyze project structure"""
-        structure = {
-            "directories": [],
-            "total_files": 0,
-            "code_files": 0
-        }
-        
-        code_extensions = {'.py', '.js', '.jsx', '.ts', '.tsx', '.java', '.cpp', '.go', '.rs'}
-        
-        for root, dirs, files in os.walk(self.project_root):
-            dirs[:] = [d for d in dirs if d not in {
-                'node_modules', '.git', 'venv', '__pycache__', 
-                'dist', 'build', '.next'
-            }]
-            
-            rel_path = Path(root).relative_to(self.project_root)
-            if str(rel_path) != '.':
-                structure["directories"].append(str(rel_path))
-            
-            structure["total_files"] += len(files)
-            structure["code_files"] += sum(
-                1 for f in files if Path(f).suffix in code_extensions
-            )
-        
-        self.context["structure"] = structure
-    
     def _detect_patterns(self):
         """Detect common coding patterns and conventions"""
         patterns = []
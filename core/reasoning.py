@@ -1,15 +1,57 @@
 """
 NovaForge Reasoning & Context Layer - ENHANCED VERSION
 Provides intelligent context management, multi-step reasoning, and learning
+
+Per-session state lives in a bounded LRU registry. Sessions beyond the
+count or memory budget are spilled to memory/reasoning/<sid>.json.gz
+and loaded again on next access.
 """
 
+import atexit
+import gzip
 import json
+import os
+import threading
 import time
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 import pickle
 
+from core.tool_cost_model import get_tool_cost_model
+
+STATE_DIR = Path(__file__).parent.parent / "memory" / "reasoning"
+LEGACY_STATE_DIR = Path(__file__).parent.parent / "memory" / "sessions"
+
+
+def read_state(state_dir: Path, session_id: str, legacy_dir: Path = None) -> Optional[Dict]:
+    """Load a spilled session (gzip JSON), migrating a legacy .pkl if that's all there is"""
+    path = state_dir / f"{session_id}.json.gz"
+    if path.exists():
+        with gzip.open(path, 'rt') as f:
+            return json.load(f)
+    
+    legacy = (legacy_dir or state_dir) / f"{session_id}.pkl"
+    if legacy.exists():
+        with open(legacy, 'rb') as f:
+            data = pickle.load(f)
+        write_state(state_dir, session_id, data)
+        legacy.rename(legacy.with_suffix('.pkl.migrated'))
+        return data
+    return None
+
+
+def write_state(state_dir: Path, session_id: str, data: Dict):
+    """Atomically write a session's state as gzip JSON"""
+    state_dir.mkdir(parents=True, exist_ok=True)
+    path = state_dir / f"{session_id}.json.gz"
+    tmp = path.with_suffix('.tmp')
+    with gzip.open(tmp, 'wt', compresslevel=6) as f:
+        json.dump(data, f, separators=(',', ':'), default=str)
+    os.replace(tmp, path)
+
+
 class ContextMemory:
     """Stores context from tools and conversations with persistence"""
     
@@ -20,8 +62,8 @@ class ContextMemory:
         self.session_start = time.time()
         self.conversation_history = []  # Full conversation for context
         self.user_preferences = {}  # Learned preferences
-        self.session_dir = session_dir or Path(__file__).parent.parent / "memory" / "sessions"
-        self.session_dir.mkdir(parents=True, exist_ok=True)
+        self.session_dir = Path(session_dir) if session_dir else STATE_DIR
+        self.legacy_dir = self.session_dir if session_dir else LEGACY_STATE_DIR
     
     def add_tool_result(self, tool_name: str, params: Dict, result: Dict):
         """Store a tool execution result"""
@@ -132,29 +174,28 @@ class ContextMemory:
                     return True
         return False
     
-    def save_session(self, session_id: str):
-        """Save session to disk"""
-        session_file = self.session_dir / f"{session_id}.pkl"
-        with open(session_file, 'wb') as f:
-            pickle.dump({
-                'facts': self.facts,
-                'tool_history': self.tool_history,
-                'conversation_history': self.conversation_history,
-                'user_preferences': self.user_preferences
-            }, f)
-    
-    def load_session(self, session_id: str) -> bool:
-        """Load session from disk"""
-        session_file = self.session_dir / f"{session_id}.pkl"
-        if session_file.exists():
-            with open(session_file, 'rb') as f:
-                data = pickle.load(f)
-                self.facts = data.get('facts', {})
-                self.tool_history = data.get('tool_history', [])
-                self.conversation_history = data.get('conversation_history', [])
-                self.user_preferences = data.get('user_preferences', {})
-            return True
-        return False
+    def to_dict(self) -> Dict:
+        return {
+            'facts': self.facts,
+            'tool_history': self.tool_history,
+            'conversation_history': self.conversation_history,
+            'user_preferences': self.user_preferences
+        }
+    
+    def save_session(self, session_id: str, extra: Dict = None):
+        """Save session to disk (extra: other per-session state stored alongside)"""
+        write_state(self.session_dir, session_id, {**self.to_dict(), **(extra or {})})
+    
+    def load_session(self, session_id: str) -> Optional[Dict]:
+        """Load session from disk; returns the stored data (None if there was none)"""
+        data = read_state(self.session_dir, session_id, self.legacy_dir)
+        if data is None:
+            return None
+        self.facts = data.get('facts', {})
+        self.tool_history = data.get('tool_history', [])
+        self.conversation_history = data.get('conversation_history', [])
+        self.user_preferences = data.get('user_preferences', {})
+        return data
     
     def clear(self):
         """Clear all context"""
@@ -300,9 +341,20 @@ class ReasoningEngine:
         # Check for dependencies (e.g., web_search needs internet check)
         dependencies = self._analyze_dependencies(tool_calls)
         plan['dependencies'] = dependencies
+        cost_model = get_tool_cost_model()
         
         for i, tool_call in enumerate(tool_calls):
             tool_name = tool_call['tool']
+            params = tool_call.get('params', {})
+            
+            if cost_model.should_skip(tool_name, params, probe=False):
+                plan['steps'].append({
+                    'index': i,
+                    'tool': tool_name,
+                    'action': 'skip',
+                    'time': 0
+                })
+                continue
             
             # Check if we can use cache
             if self.can_use_cache(tool_name):
@@ -318,13 +370,14 @@ class ReasoningEngine:
                     plan['can_optimize'] = True
                     continue
             
-            # Need to execute
-            avg_time = self.tool_avg_time.get(tool_name, 1.0)
+            # Need to execute - learned median, falling back to this session's EMA
+            avg_time = cost_model.estimate(tool_name, params, default=self.tool_avg_time.get(tool_name, 1.0))
             plan['steps'].append({
                 'index': i,
                 'tool': tool_name,
                 'action': 'execute',
-                'time': avg_time
+                'time': avg_time,
+                'timeout': cost_model.timeout(tool_name, params)
             })
             plan['estimated_time'] += avg_time
         
@@ -354,6 +407,13 @@ class ReasoningEngine:
         
         return dependencies
     
+    def get_state(self) -> Dict:
+        return {'tool_success_rate': self.tool_success_rate, 'tool_avg_time': self.tool_avg_time}
+    
+    def set_state(self, data: Dict):
+        self.tool_success_rate = dict(data.get('tool_success_rate', {}))
+        self.tool_avg_time = dict(data.get('tool_avg_time', {}))
+    
     def record_result(self, tool_name: str, success: bool, execution_time: float):
         """Record tool execution for learning"""
         # Update success rate
@@ -506,27 +566,106 @@ class ResultVerifier:
         return verification
 
 
-# Global instances (initialized per session)
-_sessions = {}  # session_id -> (context, reasoning, verifier)
-
-def init_reasoning_layer(session_id="default"):
-    """Initialize the reasoning layer for a session"""
-    context_memory = ContextMemory()
-    reasoning_engine = ReasoningEngine(context_memory)
-    result_verifier = ResultVerifier()
+class ReasoningSessions:
+    """
+    LRU registry of (context, reasoning, verifier) per session
+    
+    Bounded by session count and by an estimate of in-memory size
+    (serialized context length, refreshed on load and every few
+    accesses). Evicted sessions are spilled to disk and lazy-loaded
+    again on their next access.
+    """
+    
+    def __init__(self, max_sessions: int = 64, max_bytes: int = 32 * 1024 * 1024,
+                 state_dir: Path = None, resize_every: int = 32):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.state_dir = Path(state_dir) if state_dir else None
+        self.resize_every = resize_every
+        self._entries = OrderedDict()  # session_id -> (context, reasoning, verifier)
+        self._sizes = {}
+        self._lock = threading.RLock()
+        self._accesses = 0
+        self.stats = {'hits': 0, 'loads': 0, 'spills': 0}
+    
+    def _new(self, session_id: str):
+        context_memory = ContextMemory(session_dir=self.state_dir)
+        reasoning_engine = ReasoningEngine(context_memory)
+        data = context_memory.load_session(session_id)
+        if data:
+            reasoning_engine.set_state(data.get('reasoning', {}))
+        self.stats['loads'] += 1
+        return context_memory, reasoning_engine, ResultVerifier()
+    
+    def get(self, session_id: str, reload: bool = False):
+        """Session tuple, loading it from disk if it isn't resident"""
+        with self._lock:
+            entry = None if reload else self._entries.get(session_id)
+            if entry is not None:
+                self._entries.move_to_end(session_id)
+                self.stats['hits'] += 1
+                self._accesses += 1
+                if self._accesses % self.resize_every == 0:
+                    self._measure(session_id)
+                    self._enforce()
+                return entry
+            
+            entry = self._new(session_id)
+            self._entries[session_id] = entry
+            self._entries.move_to_end(session_id)
+            self._measure(session_id)
+            self._enforce()
+            return entry
+    
+    def _measure(self, session_id: str):
+        context = self._entries[session_id][0]
+        self._sizes[session_id] = len(json.dumps(context.to_dict(), default=str))
     
-    _sessions[session_id] = (context_memory, reasoning_engine, result_verifier)
+    def _enforce(self):
+        """Spill least recently used sessions until within both bounds"""
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_sessions or sum(self._sizes.values()) > self.max_bytes
+        ):
+            session_id = next(iter(self._entries))
+            self._spill(session_id)
     
-    # Try to load previous session
-    context_memory.load_session(session_id)
+    def _spill(self, session_id: str):
+        context, reasoning, _ = self._entries.pop(session_id)
+        self._sizes.pop(session_id, None)
+        try:
+            context.save_session(session_id, {'reasoning': reasoning.get_state()})
+            self.stats['spills'] += 1
+        except Exception as e:
+            print(f"⚠️ Could not spill reasoning session {session_id}: {e}")
     
-    return context_memory, reasoning_engine, result_verifier
+    def flush(self):
+        """Spill every resident session (e.g. at shutdown)"""
+        with self._lock:
+            for session_id in list(self._entries):
+                self._spill(session_id)
+    
+    def __contains__(self, session_id):
+        return session_id in self._entries
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self.stats, 'resident': len(self._entries), 'resident_bytes': sum(self._sizes.values())}
+
+
+# Global registry (sessions are created on first access)
+_sessions = ReasoningSessions()
+atexit.register(_sessions.flush)
+
+def init_reasoning_layer(session_id="default"):
+    """Initialize (or reload) the reasoning layer for a session"""
+    return _sessions.get(session_id, reload=True)
 
 def get_session(session_id="default"):
     """Get or create session"""
-    if session_id not in _sessions:
-        init_reasoning_layer(session_id)
-    return _sessions[session_id]
+    return _sessions.get(session_id)
 
 def get_context(session_id="default") -> ContextMemory:
     """Get context memory instance"""
@@ -539,4 +678,3 @@ def get_reasoning(session_id="default") -> ReasoningEngine:
 def get_verifier(session_id="default") -> ResultVerifier:
     """Get result verifier instance"""
     return get_session(session_id)[2]
-
@@ -0,0 +1,472 @@
+"""
+Repository Scanner
+One os.scandir walk of a project tree, shared by pluggable visitors
+
+Project analysis, TODO search and line counting each used to walk the
+whole tree. Here a single walk feeds every visitor:
+- each visitor says which directories it skips; a directory is pruned
+  (never listed) only when every visitor skips it, and a visitor that
+  skips one sees nothing below it
+- .gitignore files are honoured at every level (negation, anchoring,
+  ** and directory-only patterns)
+- directory entries come from os.scandir, so file type checks cost no
+  extra stat calls
+- once a tree turns out to be big (parallel_after directories), the
+  remaining directories are listed and visited by a thread pool;
+  scandir and file reads release the GIL
+
+Visitors get one visit_dir() call per directory, with that directory's
+files, and may be called from several threads at once.
+"""
+
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+CODE_EXTENSIONS = {'.py', '.js', '.jsx', '.ts', '.tsx', '.java', '.cpp', '.go', '.rs'}
+
+LANGUAGE_EXTENSIONS = {
+    '.py': 'Python',
+    '.js': 'JavaScript',
+    '.jsx': 'React/JSX',
+    '.ts': 'TypeScript',
+    '.tsx': 'React/TypeScript',
+    '.java': 'Java',
+    '.cpp': 'C++',
+    '.c': 'C',
+    '.go': 'Go',
+    '.rs': 'Rust',
+    '.rb': 'Ruby',
+    '.php': 'PHP',
+    '.sh': 'Shell',
+    '.md': 'Markdown',
+    '.json': 'JSON',
+    '.yaml': 'YAML',
+    '.yml': 'YAML'
+}
+
+TODO_EXTENSIONS = {
+    '.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.cpp', '.c', '.h',
+    '.hpp', '.cs', '.rb', '.go', '.rs', '.php', '.swift', '.kt', '.sh',
+    '.bash', '.yml', '.yaml', '.xml', '.html', '.css', '.scss', '.md'
+}
+
+LOC_EXTENSIONS = [
+    '.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.cpp', '.c', '.h',
+    '.hpp', '.cs', '.rb', '.go', '.rs', '.php', '.swift', '.kt', '.sh',
+    '.bash', '.html', '.css', '.scss', '.sass', '.less', '.sql', '.r'
+]
+
+TODO_PATTERN = re.compile(
+    r'(?:#|//|/\*|\*|<!--|;)\s*(TODO|FIXME|HACK|XXX|NOTE|BUG)[\s:]*(.+)',
+    re.IGNORECASE
+)
+
+
+def _translate(pattern: str) -> str:
+    """gitignore glob -> regex body (no anchors)"""
+    out = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+            continue
+        if c == '*':
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        elif c == '\\' and i + 1 < len(pattern):
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+class GitIgnore:
+    """Rules of one .gitignore file, relative to the directory holding it"""
+
+    def __init__(self, base: str, lines: Sequence[str]):
+        self.base = base  # relative directory ('' for the root)
+        self.rules: List[Tuple[re.Pattern, bool, bool, bool]] = []  # regex, negate, dir_only, basename
+        for line in lines:
+            line = line.rstrip('\n')
+            if not line.strip() or line.startswith('#'):
+                continue
+            if not line.endswith('\\ '):
+                line = line.rstrip()  # trailing spaces don't count unless escaped
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            if line.startswith('\\'):
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+            anchored = '/' in line
+            line = line.lstrip('/')
+            regex = re.compile('^' + _translate(line) + '$', re.DOTALL)
+            self.rules.append((regex, negate, dir_only, not anchored))
+
+    @classmethod
+    def load(cls, path: str, base: str) -> Optional['GitIgnore']:
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                ignore = cls(base, f.readlines())
+        except OSError:
+            return None
+        return ignore if ignore.rules else None
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """True (ignored), False (re-included by a ! rule) or None (no rule matches)"""
+        if self.base:
+            if not rel_path.startswith(self.base + '/'):
+                return None
+            rel_path = rel_path[len(self.base) + 1:]
+        name = rel_path.rsplit('/', 1)[-1]
+        result = None
+        for regex, negate, dir_only, basename in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(name if basename else rel_path):
+                result = not negate
+        return result
+
+
+def is_ignored(ignores: Sequence[GitIgnore], rel_path: str, is_dir: bool) -> bool:
+    """Deeper .gitignore files override shallower ones"""
+    for ignore in reversed(ignores):
+        result = ignore.match(rel_path, is_dir)
+        if result is not None:
+            return result
+    return False
+
+
+class ScanVisitor:
+    """
+    Base visitor: override visit_dir, and ignored_dirs / skip_hidden to prune
+    
+    Visitors whose per-directory result depends only on the directory's
+    entry names can set a key and implement summarize() / add() instead;
+    their summaries can then be stored in a ScanSnapshot and replayed
+    for directories that haven't changed.
+    """
+
+    ignored_dirs = frozenset({'node_modules', '.git', 'venv', '__pycache__'})
+    skip_hidden = False  # skip dot-files and dot-directories
+    key = None  # snapshot key, for visitors implementing summarize/add
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def wants_dir(self, name: str) -> bool:
+        return name not in self.ignored_dirs and not (self.skip_hidden and name.startswith('.'))
+
+    def visible(self, files: List[os.DirEntry]) -> List[os.DirEntry]:
+        return files if not self.skip_hidden else [f for f in files if not f.name.startswith('.')]
+
+    def visit_dir(self, rel_dir: str, files: List[os.DirEntry]):
+        """Called once per directory ('' is the root) with its files"""
+        self.add(rel_dir, self.summarize(rel_dir, files))
+
+    def summarize(self, rel_dir: str, files: List[os.DirEntry]):
+        """JSON-serializable result for one directory"""
+        return None
+
+    def add(self, rel_dir: str, summary):
+        """Merge one directory's summary (thread-safe)"""
+
+    def result(self):
+        return None
+
+
+class LanguageVisitor(ScanVisitor):
+    """File counts per language"""
+
+    ignored_dirs = frozenset({'node_modules', '.git', 'venv', '__pycache__', 'dist', 'build', '.next', 'target'})
+
+    key = 'languages'
+
+    def __init__(self, extensions: Optional[Dict[str, str]] = None):
+        super().__init__()
+        self.extensions = extensions or LANGUAGE_EXTENSIONS
+        self.counts: Dict[str, int] = {}
+
+    def summarize(self, rel_dir, files) -> Dict[str, int]:
+        counts = {}
+        for entry in files:
+            lang = self.extensions.get(os.path.splitext(entry.name)[1].lower())
+            if lang:
+                counts[lang] = counts.get(lang, 0) + 1
+        return counts
+
+    def add(self, rel_dir, summary):
+        with self._lock:
+            for lang, count in summary.items():
+                self.counts[lang] = self.counts.get(lang, 0) + count
+
+    def result(self) -> Dict[str, int]:
+        return self.counts
+
+
+class StructureVisitor(ScanVisitor):
+    """Directory list and file / code file totals"""
+
+    ignored_dirs = frozenset({'node_modules', '.git', 'venv', '__pycache__', 'dist', 'build', '.next'})
+
+    key = 'structure'
+
+    def __init__(self, code_extensions=CODE_EXTENSIONS):
+        super().__init__()
+        self.code_extensions = code_extensions
+        self.structure = {"directories": [], "total_files": 0, "code_files": 0}
+
+    def summarize(self, rel_dir, files) -> List[int]:
+        code = sum(1 for entry in files if os.path.splitext(entry.name)[1] in self.code_extensions)
+        return [len(files), code]
+
+    def add(self, rel_dir, summary):
+        total, code = summary
+        with self._lock:
+            if rel_dir:
+                self.structure["directories"].append(rel_dir)
+            self.structure["total_files"] += total
+            self.structure["code_files"] += code
+
+    def result(self) -> Dict:
+        self.structure["directories"].sort()
+        return self.structure
+
+
+class TodoVisitor(ScanVisitor):
+    """TODO / FIXME / HACK / XXX / NOTE / BUG comments, find_todos-shaped"""
+
+    skip_hidden = True
+
+    def __init__(self, max_results: int = 500, extensions=TODO_EXTENSIONS):
+        super().__init__()
+        self.max_results = max_results
+        self.extensions = extensions
+        self.todos: Dict[str, List[Dict]] = {}
+        self.total_found = 0
+
+    def visit_dir(self, rel_dir, files):
+        for entry in files:
+            if self.total_found >= self.max_results:
+                return
+            if os.path.splitext(entry.name)[1] not in self.extensions:
+                continue
+            found = []
+            try:
+                with open(entry.path, 'r', encoding='utf-8') as f:
+                    for line_num, line in enumerate(f, 1):
+                        match = TODO_PATTERN.search(line)
+                        if match:
+                            tag, message = match.groups()
+                            found.append({"line": line_num, "tag": tag.upper(), "message": message.strip()[:200]})
+                            if len(found) >= self.max_results:
+                                break
+            except (UnicodeDecodeError, OSError):
+                continue  # Skip files we can't read
+            if found:
+                with self._lock:
+                    room = self.max_results - self.total_found
+                    if room > 0:
+                        rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                        self.todos[rel_path] = found[:room]
+                        self.total_found += len(self.todos[rel_path])
+
+    def result(self) -> Dict:
+        return {
+            "total_found": self.total_found,
+            "file_count": len(self.todos),
+            "todos": dict(sorted(self.todos.items())),
+            "truncated": self.total_found >= self.max_results
+        }
+
+
+class LineCountVisitor(ScanVisitor):
+    """Total / blank / code lines per extension, count_lines-shaped"""
+
+    ignored_dirs = frozenset({'node_modules', 'venv', '__pycache__', '.git', 'build', 'dist'})
+    skip_hidden = True
+
+    def __init__(self, extensions: Optional[Sequence[str]] = None, max_files: int = 5000):
+        super().__init__()
+        self.extensions = set(extensions if extensions is not None else LOC_EXTENSIONS)
+        self.max_files = max_files
+        self.by_extension: Dict[str, Dict[str, int]] = {}
+        self.total_files = 0
+
+    def visit_dir(self, rel_dir, files):
+        for entry in files:
+            ext = os.path.splitext(entry.name)[1]
+            if ext not in self.extensions:
+                continue
+            with self._lock:
+                if self.total_files >= self.max_files:
+                    return
+                self.total_files += 1  # reserve the slot before reading
+            try:
+                total = blank = 0
+                with open(entry.path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        total += 1
+                        if not line.strip():
+                            blank += 1
+            except (UnicodeDecodeError, OSError):
+                with self._lock:
+                    self.total_files -= 1
+                continue  # Skip files we can't read
+            with self._lock:
+                stats = self.by_extension.setdefault(
+                    ext, {"files": 0, "total_lines": 0, "blank_lines": 0, "code_lines": 0}
+                )
+                stats["files"] += 1
+                stats["total_lines"] += total
+                stats["blank_lines"] += blank
+                stats["code_lines"] += total - blank
+
+    def result(self) -> Dict:
+        by_extension = dict(sorted(self.by_extension.items(), key=lambda x: x[1]["code_lines"], reverse=True))
+        return {
+            "total_files": self.total_files,
+            "total_lines": sum(s["total_lines"] for s in by_extension.values()),
+            "blank_lines": sum(s["blank_lines"] for s in by_extension.values()),
+            "code_lines": sum(s["code_lines"] for s in by_extension.values()),
+            "by_extension": by_extension,
+            "truncated": self.total_files >= self.max_files
+        }
+
+
+class RepoScanner:
+    """Walk a tree once and feed every visitor"""
+
+    def __init__(self, root, visitors: Sequence[ScanVisitor], respect_gitignore: bool = True,
+                 workers: Optional[int] = None, parallel_after: int = 256):
+        self.root = Path(root)
+        self.visitors = list(visitors)
+        self.respect_gitignore = respect_gitignore
+        self.workers = workers if workers is not None else min(8, (os.cpu_count() or 1) + 4)
+        self.parallel_after = parallel_after
+        self.stats = {'dirs': 0, 'files': 0, 'pruned': 0, 'ignored': 0, 'workers': 1, 'seconds': 0.0}
+        self._stats_lock = threading.Lock()
+
+    def scan(self) -> Dict:
+        """Run the walk; returns walk stats (visitors hold the results)"""
+        started = time.monotonic()
+        pending = [(str(self.root), '', tuple(self.visitors), ())]
+        while pending:
+            if self.workers > 1 and self.stats['dirs'] >= self.parallel_after:
+                self._scan_parallel(pending)
+                break
+            pending.extend(self._scan_dir(*pending.pop()))
+        self.stats['seconds'] = round(time.monotonic() - started, 3)
+        return self.stats
+
+    def _scan_parallel(self, pending: List):
+        self.stats['workers'] = self.workers
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="repo-scan") as pool:
+            in_flight = {pool.submit(self._scan_dir, *job) for job in pending}
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    in_flight.update(pool.submit(self._scan_dir, *job) for job in future.result())
+
+    def _scan_dir(self, path: str, rel_dir: str, visitors: Tuple[ScanVisitor, ...],
+                  ignores: Tuple[GitIgnore, ...]) -> List:
+        """List one directory, visit its files; returns its subdirectories to walk"""
+        listing = list_dir(path, rel_dir, visitors, ignores, self.respect_gitignore)
+        if listing is None:
+            return []
+
+        for visitor in visitors:
+            visitor.visit_dir(rel_dir, visitor.visible(listing.files))
+
+        with self._stats_lock:
+            self.stats['dirs'] += 1
+            self.stats['files'] += len(listing.files)
+            self.stats['pruned'] += listing.pruned
+            self.stats['ignored'] += listing.ignored
+        return [
+            (os.path.join(path, name), f"{rel_dir}/{name}" if rel_dir else name, active, listing.ignores)
+            for name, active in listing.children
+        ]
+
+
+class Listing:
+    """One directory's files and walkable subdirectories"""
+
+    def __init__(self, files, children, ignores, has_gitignore: bool, pruned: int, ignored: int):
+        self.files = files          # os.DirEntry of non-directories
+        self.children = children    # (name, visitors active below it)
+        self.ignores = ignores      # .gitignore rules in force for the children
+        self.has_gitignore = has_gitignore
+        self.pruned = pruned
+        self.ignored = ignored
+
+
+def list_dir(path: str, rel_dir: str, visitors: Sequence[ScanVisitor], ignores: Tuple[GitIgnore, ...],
+             respect_gitignore: bool = True) -> Optional[Listing]:
+    """scandir one directory, applying .gitignore rules and visitor pruning (None if unreadable)"""
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        return None
+
+    has_gitignore = any(entry.name == '.gitignore' for entry in entries)
+    if respect_gitignore and has_gitignore:
+        ignore = GitIgnore.load(os.path.join(path, '.gitignore'), rel_dir)
+        if ignore:
+            ignores = ignores + (ignore,)
+
+    files, children = [], []
+    pruned = ignored = 0
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if not is_dir and entry.is_symlink() and entry.is_dir():
+                continue  # linked directory: not a file, and not walked (like os.walk)
+        except OSError:
+            continue
+        rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+        if ignores and is_ignored(ignores, rel_path, is_dir):
+            ignored += 1
+            continue
+        if is_dir:
+            active = tuple(v for v in visitors if v.wants_dir(entry.name))
+            if active:
+                children.append((entry.name, active))
+            else:
+                pruned += 1
+        else:
+            files.append(entry)
+    return Listing(files, children, ignores, has_gitignore, pruned, ignored)
+
+
+def scan(root, visitors: Sequence[ScanVisitor], **kwargs) -> Dict:
+    """Convenience: one walk of root through visitors; returns walk stats"""
+    return RepoScanner(root, visitors, **kwargs).scan()
@@ -0,0 +1,244 @@
+"""
+Token-Budgeted Tool Result Formatter
+Keeps the Phase 3 follow-up prompt small no matter how big a tool result is
+
+Each tool call gets its own token budget. Fields are ranked (summary-like
+fields and fields matching the user's message first, raw dumps last) and
+rendered until the budget runs out. Long text is trimmed to the passages
+most relevant to the user's message, or to its head and tail when nothing
+matches. Whatever is dropped is counted and reported.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Rough chars-per-token ratio for English text and JSON with local models
+CHARS_PER_TOKEN = 4
+
+# Keys that never carry payload
+META_KEYS = {'success', 'tool', 'message', 'error', 'exception', 'execution_time'}
+
+# Fields that usually answer the question - rendered first
+PRIORITY_FIELDS = [
+    'answer', 'summary', 'title', 'analysis', 'verification', 'result',
+    'top_results', 'results', 'content', 'date', 'time', 'os', 'path'
+]
+
+# Bulky fields that are rarely needed verbatim - rendered last
+LOW_PRIORITY_FIELDS = ['html', 'raw', 'scraped_content', 'search_results', 'headers']
+
+STOP_WORDS = {
+    'the', 'a', 'an', 'and', 'or', 'of', 'to', 'in', 'on', 'for', 'is', 'are',
+    'was', 'what', 'how', 'me', 'my', 'it', 'this', 'that', 'with', 'can',
+    'you', 'please', 'show', 'tell', 'about', 'do', 'does', 'i'
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (no tokenizer dependency)"""
+    if not text:
+        return 0
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def query_terms(query: Optional[str]) -> List[str]:
+    """Significant lowercase terms from the user's message"""
+    if not query:
+        return []
+    words = re.findall(r'[a-z0-9_]{3,}', query.lower())
+    return [w for w in dict.fromkeys(words) if w not in STOP_WORDS]
+
+
+class ResultFormatter:
+    """Render tool results for the AI within a per-call token budget"""
+
+    def __init__(self, per_call_budget: int = 800, min_field_tokens: int = 40):
+        self.per_call_budget = per_call_budget
+        self.min_field_tokens = min_field_tokens
+
+    def format_result(self, result: Dict, query: Optional[str] = None) -> Tuple[List[str], Dict]:
+        """
+        Format one successful tool result
+
+        Returns (lines, stats) where stats records how much was dropped.
+        """
+        terms = query_terms(query)
+        remaining = self.per_call_budget
+        lines = []
+        stats = {
+            'tool': result.get('tool', 'unknown'),
+            'budget': self.per_call_budget,
+            'kept_tokens': 0,
+            'dropped_tokens': 0,
+            'dropped_fields': []
+        }
+
+        message = result.get('message')
+        if message:
+            text, dropped = self.trim_text(str(message), remaining, terms)
+            lines.append(text)
+            remaining -= estimate_tokens(text)
+            stats['dropped_tokens'] += dropped
+
+        for key, value in self._ranked_fields(self._payload(result), terms):
+            rendered = self._render_value(value)
+            cost = estimate_tokens(rendered)
+
+            if remaining < self.min_field_tokens:
+                stats['dropped_fields'].append(key)
+                stats['dropped_tokens'] += cost
+                continue
+
+            if cost > remaining:
+                rendered, dropped = self._fit_value(value, rendered, remaining, terms)
+                stats['dropped_tokens'] += dropped
+
+            lines.append(f"{key}: {rendered}")
+            remaining -= estimate_tokens(rendered)
+
+        stats['kept_tokens'] = self.per_call_budget - max(remaining, 0)
+        if stats['dropped_tokens']:
+            note = f"[trimmed ~{stats['dropped_tokens']} tokens"
+            if stats['dropped_fields']:
+                note += f"; omitted fields: {', '.join(stats['dropped_fields'])}"
+            lines.append(note + "]")
+
+        return lines, stats
+
+    def trim_text(self, text: str, budget_tokens: int, terms: List[str]) -> Tuple[str, int]:
+        """
+        Trim text to a token budget
+
+        Prefers passages that mention the query terms; otherwise keeps the
+        head and tail. Returns (text, dropped_tokens).
+        """
+        total = estimate_tokens(text)
+        if total <= budget_tokens:
+            return text, 0
+
+        max_chars = max(budget_tokens, 1) * CHARS_PER_TOKEN
+        trimmed = None
+        if terms:
+            trimmed = self._relevant_passages(text, max_chars, terms)
+        if not trimmed:
+            trimmed = self._head_tail(text, max_chars)
+
+        return trimmed, max(total - estimate_tokens(trimmed), 0)
+
+    def _payload(self, result: Dict) -> Dict:
+        """The part of a result worth showing to the AI"""
+        data = result.get('data')
+        if 'data' in result and not isinstance(data, dict):
+            return {'data': data}
+        if isinstance(data, dict):
+            return data
+        return {k: v for k, v in result.items() if k not in META_KEYS}
+
+    def _ranked_fields(self, payload: Dict, terms: List[str]) -> List[Tuple[str, Any]]:
+        """Order fields by usefulness: priority, query relevance, then size"""
+        def score(item):
+            key, value = item
+            key_lower = str(key).lower()
+            if key_lower in PRIORITY_FIELDS:
+                rank = PRIORITY_FIELDS.index(key_lower)
+            elif key_lower in LOW_PRIORITY_FIELDS:
+                rank = 100
+            else:
+                rank = 50
+
+            if terms:
+                haystack = key_lower + ' ' + self._render_value(value)[:2000].lower()
+                hits = sum(1 for t in terms if t in haystack)
+                rank -= 10 * hits
+
+            # Small scalars are cheap and often the answer - keep them first
+            bulky = isinstance(value, (list, dict)) or (
+                isinstance(value, str) and len(value) > 200
+            )
+            return (bulky, rank)
+
+        return sorted(payload.items(), key=score)
+
+    def _fit_value(self, value: Any, rendered: str, budget: int,
+                   terms: List[str]) -> Tuple[str, int]:
+        """Shrink a single value to the budget"""
+        total = estimate_tokens(rendered)
+
+        if isinstance(value, list):
+            kept = []
+            used = 0
+            for item in value:
+                item_text = self._render_value(item)
+                cost = estimate_tokens(item_text) + 1
+                if used + cost > budget:
+                    break
+                kept.append(item_text)
+                used += cost
+            if kept:
+                text = "[" + ", ".join(kept) + f", ... +{len(value) - len(kept)} more]"
+                return text, max(total - used, 0)
+
+        return self.trim_text(rendered, budget, terms)
+
+    def _render_value(self, value: Any) -> str:
+        if isinstance(value, str):
+            return value
+        if isinstance(value, (dict, list)):
+            try:
+                return json.dumps(value, default=str, ensure_ascii=False)
+            except (TypeError, ValueError):
+                return str(value)
+        return str(value)
+
+    def _relevant_passages(self, text: str, max_chars: int, terms: List[str]) -> Optional[str]:
+        """Pick the highest-scoring passages (kept in original order)"""
+        passages = []
+        window = max(max_chars // 4, 200)
+        for paragraph in re.split(r'\n\s*\n', text):
+            if not paragraph.strip():
+                continue
+            if len(paragraph) <= window:
+                passages.append(paragraph.strip())
+                continue
+            # Break oversized paragraphs into line windows
+            chunk = ""
+            for line in paragraph.splitlines():
+                if chunk and len(chunk) + len(line) > window:
+                    passages.append(chunk.strip())
+                    chunk = ""
+                chunk += line + "\n"
+            if chunk.strip():
+                passages.append(chunk.strip())
+
+        scored = []
+        for i, passage in enumerate(passages):
+            lower = passage.lower()
+            hits = sum(lower.count(t) for t in terms)
+            if hits:
+                scored.append((hits, i))
+        if not scored:
+            return None
+
+        chosen = []
+        used = 0
+        for hits, i in sorted(scored, key=lambda s: (-s[0], s[1])):
+            passage = passages[i]
+            if used + len(passage) > max_chars:
+                continue
+            chosen.append((i, passage))
+            used += len(passage) + 5
+        if not chosen:
+            best = passages[sorted(scored, key=lambda s: (-s[0], s[1]))[0][1]]
+            chosen.append((0, best[:max_chars]))
+
+        return "\n … \n".join(p for _, p in sorted(chosen))
+
+    def _head_tail(self, text: str, max_chars: int) -> str:
+        """Keep the start and end, which usually hold the most context"""
+        marker = f" [... {len(text) - max_chars} chars omitted ...] "
+        keep = max(max_chars - len(marker), 0)
+        head = keep * 2 // 3
+        tail = keep - head
+        return text[:head] + marker + (text[-tail:] if tail else "")
@@ -0,0 +1,327 @@
+"""
+Scan Snapshots
+Persisted per-directory scan results, so a rescan only re-lists what changed
+
+A snapshot records every directory RepoScanner would walk: its mtime,
+the subdirectories walked into (and which visitors are active below
+them), its .gitignore's mtime, and each visitor's summary of its files.
+Visitors must be snapshot-capable (a key plus summarize/add) - their
+results depend only on entry names, which a directory's mtime covers.
+
+A refresh finds the directories that may have changed, re-lists only
+those, then replays every stored summary into the visitors:
+- mtime mode stats each known directory (and .gitignore) and picks the
+  ones whose mtime moved
+- git mode stats nothing: it takes the paths git reports as added,
+  deleted or untracked (git status), plus those added or deleted between
+  the snapshot's HEAD and the current one (git diff), and re-lists their
+  directories. Git doesn't see empty or ignored directories, so an
+  mtime pass still runs every verify_interval seconds.
+  git status has to lstat every tracked file unless the repository runs
+  an fsmonitor, so by default git mode is only used when core.fsmonitor
+  is set; without it the mtime pass is several times faster.
+A changed .gitignore rescans its whole subtree.
+
+Snapshots are plain JSON files, cached in memory until the file changes.
+"""
+
+import json
+import os
+import subprocess
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from core.repo_scanner import GitIgnore, ScanVisitor, list_dir
+
+SNAPSHOT_VERSION = 1
+
+# A directory changed this recently could change again within the same
+# mtime tick; its mtime isn't trusted and it is re-listed on the next scan
+RACY_NS = 2 * 10**9
+
+# path -> (file mtime_ns, snapshot data); snapshots are reused across analyzer instances
+_loaded: Dict[str, Tuple[int, Dict]] = {}
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _parent(rel: str) -> str:
+    return rel.rsplit('/', 1)[0] if '/' in rel else ''
+
+
+def _git(root: str, *args) -> Optional[str]:
+    try:
+        result = subprocess.run(['git', *args], cwd=root, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def git_fsmonitor_enabled(root: str) -> bool:
+    """Whether git status can skip scanning the work tree here"""
+    value = _git(root, 'config', '--get', 'core.fsmonitor')
+    return bool(value and value.strip().lower() not in ('false', '0', 'no', 'off'))
+
+
+def git_state(root: str) -> Optional[Dict]:
+    """{'prefix', 'head'} when root is inside a git work tree, else None"""
+    prefix = _git(root, 'rev-parse', '--show-prefix')
+    if prefix is None:
+        return None
+    head = _git(root, 'rev-parse', '-q', '--verify', 'HEAD')
+    return {'prefix': prefix.strip(), 'head': head.strip() if head else None}
+
+
+def git_status_paths(root: str, state: Dict) -> Optional[Set[str]]:
+    """
+    Paths under root (relative to it) that are untracked, added, deleted
+    or unmerged in the work tree. Plain modifications don't change a
+    directory listing and are left out, except to .gitignore files.
+    """
+    status = _git(root, 'status', '--porcelain', '-z', '--no-renames', '--untracked-files=all', '.')
+    if status is None:
+        return None
+    prefix = state['prefix']
+    paths = set()
+    for record in status.split('\0'):
+        if len(record) < 4:
+            continue
+        code, path = record[:2], record[3:]
+        if code in (' M', 'M ', 'MM') and not path.endswith('.gitignore'):
+            continue
+        if path.startswith(prefix):
+            paths.add(path[len(prefix):])
+    return paths
+
+
+def git_diff_paths(root: str, since_head: Optional[str], head: Optional[str]) -> Optional[Set[str]]:
+    """Paths under root added or deleted between two commits, plus changed .gitignore files"""
+    if not since_head or not head or since_head == head:
+        return set()
+    diff = _git(root, 'diff', '--name-only', '--no-renames', '--diff-filter=ADT', '--relative',
+                since_head, head, '--')
+    if diff is None:
+        return None  # old HEAD gone (gc'd, shallow clone); caller falls back to mtimes
+    gitignores = _git(root, 'diff', '--name-only', '--relative', since_head, head, '--', '*.gitignore')
+    return {line for line in (diff + (gitignores or '')).splitlines() if line}
+
+
+class ScanSnapshot:
+    """Incremental scan of one tree for a fixed set of snapshot-capable visitors"""
+
+    def __init__(self, root, visitors: Sequence[ScanVisitor], path, use_git: Optional[bool] = None,
+                 verify_interval: float = 300.0, respect_gitignore: bool = True):
+        self.root = str(Path(root).absolute())
+        self.visitors = {v.key: v for v in visitors}
+        if None in self.visitors:
+            raise ValueError("ScanSnapshot needs visitors with a snapshot key")
+        self.path = Path(path)
+        self.use_git = use_git
+        self.verify_interval = verify_interval
+        self.respect_gitignore = respect_gitignore
+        self.dirs: Dict[str, Dict] = {}
+        self.stats = {}
+        self._ignore_cache: Dict[str, Optional[GitIgnore]] = {}
+
+    def _load(self) -> Optional[Dict]:
+        mtime = _mtime(str(self.path))
+        if mtime is None:
+            return None
+        cached = _loaded.get(str(self.path))
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return None
+        _loaded[str(self.path)] = (mtime, data)
+        return data
+
+    def _save(self, data: Dict):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix('.tmp')
+            tmp.write_text(json.dumps(data, separators=(',', ':')))
+            os.replace(tmp, self.path)
+            _loaded[str(self.path)] = (_mtime(str(self.path)), data)
+        except OSError as e:
+            print(f"⚠️ Could not save scan snapshot: {e}")
+
+    def scan(self) -> Dict:
+        """Bring the snapshot up to date and feed it to the visitors; returns scan stats"""
+        started = time.monotonic()
+        now = time.time()
+        data = self._load()
+        usable = (data and data.get('version') == SNAPSHOT_VERSION and data.get('root') == self.root
+                  and data.get('visitors') == sorted(self.visitors)
+                  and data.get('respect_gitignore') == self.respect_gitignore)
+
+        use_git = self.use_git if self.use_git is not None else git_fsmonitor_enabled(self.root)
+        git = git_state(self.root) if use_git else None
+        status = git_status_paths(self.root, git) if git else None
+        self.stats = {'mode': 'full', 'dirs': 0, 'checked': 0, 'relisted': 0}
+
+        if not usable:
+            self.dirs = {}
+            self._walk('', tuple(self.visitors.values()), ())
+            checked_at = now
+            changed = True
+        else:
+            self.dirs = dict(data['dirs'])  # copy: the loaded data is shared through _loaded
+            checked_at = data.get('checked_at', 0)
+            paths = None
+            if status is not None and now - checked_at < self.verify_interval:
+                diff = git_diff_paths(self.root, data.get('git_head'), git['head'])
+                if diff is not None:
+                    paths = status | diff | set(data.get('git_paths', []))
+            if paths is not None:
+                self.stats['mode'] = 'git'
+                dirty, subtrees = self._dirty_from_paths(paths)
+            else:
+                self.stats['mode'] = 'mtime'
+                dirty, subtrees = self._dirty_from_mtimes()
+                checked_at = now
+            changed = self._refresh(dirty, subtrees)
+            if git:
+                # git mode relies on the stored HEAD, status and last mtime pass
+                changed = changed or checked_at != data.get('checked_at') or \
+                    git['head'] != data.get('git_head') or sorted(status or []) != data.get('git_paths')
+
+        if changed:
+            self._save({
+                'version': SNAPSHOT_VERSION, 'root': self.root, 'visitors': sorted(self.visitors),
+                'respect_gitignore': self.respect_gitignore, 'checked_at': checked_at,
+                'git_head': git['head'] if git else None, 'git_paths': sorted(status or []),
+                'dirs': self.dirs
+            })
+
+        for rel, entry in self.dirs.items():
+            for key, summary in entry['v'].items():
+                self.visitors[key].add(rel, summary)
+        self.stats['dirs'] = len(self.dirs)
+        self.stats['seconds'] = round(time.monotonic() - started, 4)
+        return self.stats
+
+    def _abs(self, rel: str) -> str:
+        return os.path.join(self.root, rel) if rel else self.root
+
+    def _ignores_for(self, rel: str) -> Tuple[GitIgnore, ...]:
+        """.gitignore rules in force for rel's entries, from its ancestors"""
+        if not self.respect_gitignore:
+            return ()
+        chain, current = [], rel
+        while current:
+            current = _parent(current)
+            chain.append(current)
+        ignores = []
+        for ancestor in reversed(chain):
+            entry = self.dirs.get(ancestor)
+            if entry and entry['g'] is not None:
+                if ancestor not in self._ignore_cache:
+                    self._ignore_cache[ancestor] = GitIgnore.load(
+                        os.path.join(self._abs(ancestor), '.gitignore'), ancestor)
+                if self._ignore_cache[ancestor]:
+                    ignores.append(self._ignore_cache[ancestor])
+        return tuple(ignores)
+
+    def _list(self, rel: str, visitors: Tuple[ScanVisitor, ...], ignores) -> Optional[List]:
+        """(Re)list one directory into the snapshot; returns children to walk or None if gone"""
+        path = self._abs(rel)
+        mtime = _mtime(path)  # before listing: a change during the listing bumps it again
+        listing = list_dir(path, rel, visitors, ignores, self.respect_gitignore)
+        if mtime is None or listing is None:
+            return None
+        self.stats['relisted'] += 1
+        self.dirs[rel] = {
+            'm': mtime if time.time_ns() - mtime >= RACY_NS else -1,
+            'g': _mtime(os.path.join(path, '.gitignore')) if listing.has_gitignore else None,
+            's': {name: sorted(v.key for v in active) for name, active in listing.children},
+            'v': {v.key: v.summarize(rel, v.visible(listing.files)) for v in visitors}
+        }
+        self._ignore_cache.pop(rel, None)
+        return [(f"{rel}/{name}" if rel else name, active, listing.ignores) for name, active in listing.children]
+
+    def _walk(self, rel: str, visitors: Tuple[ScanVisitor, ...], ignores):
+        stack = [(rel, visitors, ignores)]
+        while stack:
+            children = self._list(*stack.pop())
+            if children:
+                stack.extend(children)
+
+    def _drop(self, rel: str):
+        """Forget a directory and everything below it"""
+        if not rel:
+            self.dirs.clear()
+            return
+        prefix = rel + '/'
+        for key in [k for k in self.dirs if k == rel or k.startswith(prefix)]:
+            del self.dirs[key]
+
+    def _dirty_from_mtimes(self) -> Tuple[Set[str], Set[str]]:
+        dirty, subtrees = set(), set()
+        for rel, entry in self.dirs.items():
+            self.stats['checked'] += 1
+            path = self._abs(rel)
+            if _mtime(path) != entry['m']:
+                dirty.add(rel)
+            if entry['g'] is not None and _mtime(os.path.join(path, '.gitignore')) != entry['g']:
+                subtrees.add(rel)
+        return dirty, subtrees
+
+    def _dirty_from_paths(self, paths: Set[str]) -> Tuple[Set[str], Set[str]]:
+        dirty, subtrees = set(), set()
+        for path in paths:
+            parent = _parent(path)
+            while parent and parent not in self.dirs:
+                parent = _parent(parent)  # inside a new directory: re-list its nearest known ancestor
+            dirty.add(parent)
+            if path.endswith('.gitignore'):
+                subtrees.add(_parent(path))
+        return dirty, subtrees
+
+    def _refresh(self, dirty: Set[str], subtrees: Set[str]) -> bool:
+        """Re-list dirty directories (whole subtrees for changed .gitignores); returns whether anything changed"""
+        changed = False
+        for rel in subtrees:
+            if rel in self.dirs:
+                active = tuple(self.visitors[k] for k in self.dirs[rel]['v'])
+                self._drop(rel)
+                self._walk(rel, active, self._ignores_for(rel))
+                changed = True
+        dirty -= subtrees
+
+        queue = sorted(dirty, key=lambda rel: rel.count('/') if rel else -1)
+        for rel in queue:
+            old = self.dirs.get(rel)
+            if old is None:
+                continue  # dropped along with a parent
+            active = tuple(self.visitors[k] for k in old['v'])
+            children = self._list(rel, active, self._ignores_for(rel))
+            if children is None:
+                self._drop(rel)
+                if rel and _parent(rel) in self.dirs:
+                    queue.append(_parent(rel))  # re-list the parent too
+                changed = True
+                continue
+            new = self.dirs[rel]
+            if new == old:
+                continue  # e.g. a file was modified, not added or removed
+            changed = True
+            if new['g'] != old['g']:
+                self._drop(rel)
+                self._walk(rel, active, self._ignores_for(rel))
+                continue
+            for name in set(old['s']) - set(new['s']):
+                self._drop(f"{rel}/{name}" if rel else name)
+            for child, child_active, ignores in children:
+                name = child.rsplit('/', 1)[-1]
+                if old['s'].get(name) != new['s'][name] or child not in self.dirs:
+                    self._drop(child)
+                    self._walk(child, child_active, ignores)
+        return changed
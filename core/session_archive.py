@@ -0,0 +1,296 @@
+"""
+Session Archive
+Cold tier for chat sessions: one compressed file per month
+
+Hot sessions live as sessions/<date>/<sid>.json(l) - two or three files
+each, pretty-printed or journaled. Once older than a cutoff they are
+compacted into session_archive/YYYY-MM.arc:
+- the .arc file is a sequence of zlib blocks, each holding up to
+  block_bytes of minified sessions (one JSON line per session); blocks
+  compress far better than one stream per small session would
+- a gzipped sidecar YYYY-MM.idx.gz maps session id -> (block offset,
+  block length, line) and keeps a listing summary (header, stats,
+  preview), so loading one session inflates one block and listing
+  inflates nothing but the index
+
+Archived sessions are immutable. Deleting one repacks its month;
+resuming one moves it back to the hot tier.
+"""
+
+import gzip
+import json
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Every block is prefixed with its compressed length, so a lost index can be rebuilt
+BLOCK_HEADER = struct.Struct('<I')
+
+
+def session_summary(session: Dict, date: str) -> Dict:
+    """What listings need from a session, without the messages"""
+    messages = session.get('messages', [])
+    stats = session.get('stats') or {}
+    return {
+        'session_id': session.get('session_id'),
+        'date': date,
+        'user_name': session.get('user_name', 'Unknown'),
+        'started_at': session.get('started_at', f"{date}T00:00:00"),
+        'last_updated': session.get('last_updated', session.get('started_at', f"{date}T00:00:00")),
+        'message_count': len(messages),
+        'stats': {
+            'total_messages': stats.get('total_messages', len(messages)),
+            'user_messages': stats.get('user_messages', 0),
+            'assistant_messages': stats.get('assistant_messages', 0),
+            'errors': stats.get('errors', 0)
+        },
+        'preview': next((str(m.get('content', ''))[:100] for m in messages if m.get('role') == 'user'), '')
+    }
+
+
+class SessionArchive:
+    """Monthly block-compressed archives with a summary index"""
+
+    def __init__(self, archive_dir, block_bytes: int = 1024 * 1024, level: int = 9):
+        self.archive_dir = Path(archive_dir)
+        self.block_bytes = block_bytes
+        self.level = level
+        self._lock = threading.RLock()
+        self._indexes: Dict[str, Dict[str, Dict]] = {}  # month -> sid -> entry
+        self._locations: Optional[Dict[str, str]] = None  # sid -> month
+
+    def _data_path(self, month: str) -> Path:
+        return self.archive_dir / f"{month}.arc"
+
+    def _index_path(self, month: str) -> Path:
+        return self.archive_dir / f"{month}.idx.gz"
+
+    def months(self) -> List[str]:
+        """Archived months, oldest first"""
+        if not self.archive_dir.exists():
+            return []
+        return sorted(p.stem for p in self.archive_dir.glob("*.arc"))
+
+    def _index(self, month: str) -> Dict[str, Dict]:
+        index = self._indexes.get(month)
+        if index is not None:
+            return index
+        try:
+            with gzip.open(self._index_path(month), 'rt') as f:
+                index = json.load(f)
+        except (OSError, ValueError, EOFError):
+            index = self._rebuild_index(month)
+        else:
+            index = self._check_length(month, index)
+        self._indexes[month] = index
+        return index
+
+    def _check_length(self, month: str, index: Dict[str, Dict]) -> Dict[str, Dict]:
+        """
+        Match the .arc to the end of the last block its index knows
+
+        Blocks past that end were written by an add() that crashed before
+        saving the index; their sessions are still hot and get archived
+        again, so the blocks are cut off. An index reaching past the end
+        of the .arc is stale and rebuilt.
+        """
+        path = self._data_path(month)
+        size = path.stat().st_size if path.exists() else 0
+        end = max((e['block'] + BLOCK_HEADER.size + e['length'] for e in index.values()), default=0)
+        if size > end:
+            with open(path, 'r+b') as f:
+                f.truncate(end)
+                os.fsync(f.fileno())
+        elif size < end:
+            return self._rebuild_index(month)
+        return index
+
+    def _rebuild_index(self, month: str) -> Dict[str, Dict]:
+        """Recreate a lost or stale sidecar by walking the blocks"""
+        index = {}
+        for offset, length, sessions in self._blocks(month):
+            for line, session in enumerate(sessions):
+                date = session.pop('_archived_date')
+                index[session['session_id']] = {
+                    **session_summary(session, date), 'block': offset, 'length': length, 'line': line
+                }
+        if index:
+            self._save_index(month, index)
+        return index
+
+    def _blocks(self, month: str) -> Iterator[Tuple[int, int, List[Dict]]]:
+        path = self._data_path(month)
+        if not path.exists():
+            return
+        with open(path, 'rb') as f:
+            while True:
+                offset = f.tell()
+                header = f.read(BLOCK_HEADER.size)
+                if len(header) < BLOCK_HEADER.size:
+                    return
+                (length,) = BLOCK_HEADER.unpack(header)
+                data = f.read(length)
+                if len(data) < length:
+                    return  # torn final block
+                yield offset, length, [json.loads(line) for line in zlib.decompress(data).splitlines()]
+
+    def _save_index(self, month: str, index: Dict[str, Dict]):
+        path = self._index_path(month)
+        tmp = path.with_suffix('.tmp')
+        self._write_index(tmp, index)
+        os.replace(tmp, path)
+
+    def _write_index(self, path: Path, index: Dict[str, Dict]):
+        with gzip.open(path, 'wt') as f:
+            json.dump(index, f)
+
+    def _location_map(self) -> Dict[str, str]:
+        if self._locations is None:
+            self._locations = {
+                sid: month for month in self.months() for sid in self._index(month)
+            }
+        return self._locations
+
+    def contains(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self._location_map()
+
+    def add(self, sessions: List[Tuple[str, Dict]]) -> int:
+        """Archive (date, session) pairs in block_bytes blocks; returns how many were written"""
+        by_month: Dict[str, List[Tuple[str, Dict]]] = {}
+        for date, session in sessions:
+            by_month.setdefault(date[:7], []).append((date, session))
+
+        with self._lock:
+            self.archive_dir.mkdir(parents=True, exist_ok=True)
+            for month, items in by_month.items():
+                index = dict(self._index(month))
+                with open(self._data_path(month), 'ab') as f:
+                    self._write_sessions(f, items, index)
+                self._save_index(month, index)
+                self._indexes[month] = index
+                if self._locations is not None:
+                    self._locations.update({sid: month for sid in index})
+        return len(sessions)
+
+    def _write_sessions(self, f, items: List[Tuple[str, Dict]], index: Dict):
+        """Write (date, session) pairs as blocks at the end of f, recording them in index"""
+        block: List[bytes] = []
+        pending: List[Tuple[str, Dict]] = []
+        size = 0
+        for date, session in items:
+            block.append(json.dumps({**session, '_archived_date': date}, separators=(',', ':')).encode())
+            pending.append((date, session))
+            size += len(block[-1])
+            if size >= self.block_bytes:
+                self._write_block(f, block, pending, index)
+                block, pending, size = [], [], 0
+        if block:
+            self._write_block(f, block, pending, index)
+        f.flush()
+        os.fsync(f.fileno())
+
+    def _write_block(self, f, lines: List[bytes], sessions: List[Tuple[str, Dict]], index: Dict):
+        data = zlib.compress(b'\n'.join(lines), self.level)
+        offset = f.tell()
+        f.write(BLOCK_HEADER.pack(len(data)) + data)
+        for line, (date, session) in enumerate(sessions):
+            index[session['session_id']] = {
+                **session_summary(session, date), 'block': offset, 'length': len(data), 'line': line
+            }
+
+    def get(self, session_id: str, month: Optional[str] = None) -> Optional[Dict]:
+        """
+        Inflate the one block holding a session, or None
+
+        Pass the session's month when it is known, to skip loading the
+        other months' indexes.
+        """
+        with self._lock:
+            if month is None:
+                month = self._location_map().get(session_id)
+            entry = self._index(month).get(session_id) if month else None
+            if entry is None:
+                return None
+            with open(self._data_path(month), 'rb') as f:
+                f.seek(entry['block'] + BLOCK_HEADER.size)
+                lines = zlib.decompress(f.read(entry['length'])).splitlines()
+        session = json.loads(lines[entry['line']])
+        session.pop('_archived_date', None)
+        return session
+
+    def location(self, session_id: str) -> Optional[Path]:
+        with self._lock:
+            month = self._location_map().get(session_id)
+            return self._data_path(month) if month else None
+
+    def summaries(self) -> Iterator[Dict]:
+        """Summaries of every archived session, newest first"""
+        with self._lock:
+            months = self.months()
+        for month in reversed(months):
+            with self._lock:
+                entries = [
+                    {k: v for k, v in entry.items() if k not in ('block', 'length', 'line')}
+                    for entry in self._index(month).values()
+                ]
+            yield from sorted(entries, key=lambda s: s['started_at'], reverse=True)
+
+    def iter_sessions(self) -> Iterator[Tuple[Dict, Path]]:
+        """Yield (session, archive path) for every archived session, newest first"""
+        for summary in self.summaries():
+            session = self.get(summary['session_id'])
+            if session:
+                yield session, self._data_path(summary['date'][:7])
+
+    def remove(self, session_id: str) -> bool:
+        """
+        Drop one session by repacking its month without it
+
+        The repacked archive and index are written to temporary files
+        first. The old index goes before the new archive replaces the old
+        one, so after a crash at any point the month either is unchanged
+        or has its index rebuilt from whichever archive is in place.
+        """
+        with self._lock:
+            month = self._location_map().get(session_id)
+            if month is None:
+                return False
+            index = self._index(month)
+            keep = {}
+            for _, _, sessions in self._blocks(month):
+                for session in sessions:
+                    sid = session['session_id']
+                    if sid != session_id and sid in index:
+                        keep[sid] = (session.pop('_archived_date'), session)
+            data_path, index_path = self._data_path(month), self._index_path(month)
+            new_index: Dict[str, Dict] = {}
+            if keep:
+                tmp_data = data_path.with_suffix('.arc.tmp')
+                tmp_index = index_path.with_suffix('.new')
+                with open(tmp_data, 'wb') as f:
+                    self._write_sessions(f, list(keep.values()), new_index)
+                self._write_index(tmp_index, new_index)
+                index_path.unlink(missing_ok=True)
+                os.replace(tmp_data, data_path)
+                os.replace(tmp_index, index_path)
+                self._indexes[month] = new_index
+            else:
+                index_path.unlink(missing_ok=True)
+                data_path.unlink()
+                self._indexes.pop(month, None)
+            self._locations.pop(session_id, None)
+            return True
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            files = [p for p in self.archive_dir.glob("*") if p.is_file()] if self.archive_dir.exists() else []
+            return {
+                'months': len(self.months()),
+                'sessions': len(self._location_map()),
+                'files': len(files),
+                'bytes': sum(p.stat().st_size for p in files)
+            }
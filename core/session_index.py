@@ -0,0 +1,185 @@
+"""
+Session Message Index
+Offset index over a session journal for paged message reads
+
+Each session journal (sessions/<date>/<sid>.jsonl) gets a sidecar
+<sid>.midx of fixed-width records (byte offset, length, kind), one per
+journal event. With it:
+- the header and stats come from the index and a few header lines
+- a page of messages is a handful of seeks, whatever the session size
+- only the part of the journal written since the last read is scanned
+
+Sidecars are built lazily on first read and caught up from the unindexed
+tail of the journal afterwards, like the episodic archive's .idx files.
+"""
+
+import json
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# offset (u64), length (u32), kind (u8)
+RECORD = struct.Struct('<QIB')
+
+KIND_START, KIND_USER, KIND_ASSISTANT, KIND_MESSAGE, KIND_ERROR, KIND_TOUCH, KIND_OTHER = range(7)
+MESSAGE_KINDS = (KIND_USER, KIND_ASSISTANT, KIND_MESSAGE)
+
+# Events are written with 'op' first, so most lines are classified by prefix
+_PREFIXES = [
+    (b'{"op": "start"', KIND_START),
+    (b'{"op": "error"', KIND_ERROR),
+    (b'{"op": "touch"', KIND_TOUCH),
+]
+
+
+def event_kind(raw: bytes) -> int:
+    """Classify one journal line"""
+    for prefix, kind in _PREFIXES:
+        if raw.startswith(prefix):
+            return kind
+    try:
+        event = json.loads(raw)
+    except ValueError:
+        return KIND_OTHER
+    op = event.get('op')
+    if op == 'message':
+        role = event['message'].get('role')
+        return {'user': KIND_USER, 'assistant': KIND_ASSISTANT}.get(role, KIND_MESSAGE)
+    return {'start': KIND_START, 'error': KIND_ERROR, 'touch': KIND_TOUCH}.get(op, KIND_OTHER)
+
+
+class SessionMessageIndex:
+    """Sidecar event index for one session journal"""
+
+    def __init__(self, journal_path: Path):
+        self.path = Path(journal_path)
+        self.idx_path = self.path.with_suffix('.midx')
+        self.offsets: List[int] = []
+        self.lengths: List[int] = []
+        self.kinds: List[int] = []
+        self.messages: List[int] = []  # event positions of messages, in order
+        self._load()
+        self.catch_up()
+
+    def _load(self):
+        if not self.idx_path.exists():
+            return
+        data = self.idx_path.read_bytes()
+        usable = len(data) - len(data) % RECORD.size  # drop a torn record
+        for offset, length, kind in RECORD.iter_unpack(data[:usable]):
+            self._remember(offset, length, kind)
+
+        # Sidecar points past the journal (file replaced/truncated) - rebuild
+        if self.end > self._file_size():
+            self.offsets, self.lengths, self.kinds, self.messages = [], [], [], []
+            self.idx_path.unlink()
+
+    def _remember(self, offset: int, length: int, kind: int):
+        if kind in MESSAGE_KINDS:
+            self.messages.append(len(self.offsets))
+        self.offsets.append(offset)
+        self.lengths.append(length)
+        self.kinds.append(kind)
+
+    def _file_size(self) -> int:
+        return self.path.stat().st_size if self.path.exists() else 0
+
+    @property
+    def end(self) -> int:
+        """First journal byte not covered by the index"""
+        return self.offsets[-1] + self.lengths[-1] if self.offsets else 0
+
+    def catch_up(self):
+        """Index complete lines appended since the last read"""
+        if self._file_size() <= self.end:
+            return
+        records = []
+        with open(self.path, 'rb') as f:
+            f.seek(self.end)
+            offset = self.end
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break  # torn final write
+                kind = event_kind(raw)
+                records.append(RECORD.pack(offset, len(raw), kind))
+                self._remember(offset, len(raw), kind)
+                offset += len(raw)
+        if records:
+            with open(self.idx_path, 'ab') as f:
+                f.write(b''.join(records))
+
+    @property
+    def complete(self) -> bool:
+        """Journal holds the whole session (starts with its 'start' event)"""
+        return bool(self.kinds) and self.kinds[0] == KIND_START
+
+    def _read_event(self, f, position: int) -> Dict:
+        f.seek(self.offsets[position])
+        return json.loads(f.read(self.lengths[position]))
+
+    def header(self) -> Optional[Dict]:
+        """
+        Session metadata and stats without the messages
+
+        Reads the 'start' line, the error lines and the last
+        message/touch line; counts come from the index.
+        """
+        if not self.offsets:
+            return None
+        count = {kind: 0 for kind in range(7)}
+        start = last = None
+        for position, kind in enumerate(self.kinds):
+            count[kind] += 1
+            if kind == KIND_START and start is None:
+                start = position
+            if kind in MESSAGE_KINDS or kind == KIND_TOUCH:
+                last = position
+
+        with open(self.path, 'rb') as f:
+            session = dict(self._read_event(f, start)['session']) if start is not None else {}
+            if last is not None:
+                event = self._read_event(f, last)
+                session['last_updated'] = (event['message']['timestamp'] if event['op'] == 'message'
+                                           else event['last_updated'])
+            session['errors'] = [
+                self._read_event(f, p)['error'] for p, kind in enumerate(self.kinds) if kind == KIND_ERROR
+            ]
+        session['stats'] = {
+            'total_messages': len(self.messages),
+            'user_messages': count[KIND_USER],
+            'assistant_messages': count[KIND_ASSISTANT],
+            'errors': count[KIND_ERROR]
+        }
+        return session
+
+    def read_messages(self, start: int, stop: int) -> List[Dict]:
+        """Messages [start, stop) in session order"""
+        with open(self.path, 'rb') as f:
+            return [self._read_event(f, p)['message'] for p in self.messages[start:stop]]
+
+    def __len__(self):
+        return len(self.messages)
+
+
+def page_bounds(total: int, offset: Optional[int] = None, limit: Optional[int] = None,
+                before: Optional[int] = None, after: Optional[int] = None):
+    """
+    Message slice [start, stop) for a page request
+
+    offset: first message index; before/after: exclusive cursors (message
+    indexes). With only a limit, the most recent `limit` messages.
+    """
+    if after is not None:
+        start = after + 1
+        stop = start + limit if limit is not None else total
+    elif before is not None:
+        stop = min(before, total)
+        start = stop - limit if limit is not None else 0
+    elif offset is not None:
+        start = offset
+        stop = start + limit if limit is not None else total
+    else:
+        stop = total
+        start = total - limit if limit is not None else 0
+    start = max(0, min(start, total))
+    return start, max(start, min(stop, total))
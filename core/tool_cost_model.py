@@ -0,0 +1,288 @@
+"""
+Tool Cost Model
+Learned, persisted latency and failure statistics per tool
+
+Every tool run is recorded under its tool name and a coarse parameter
+class (which params were given, and whether any value is large), so
+e.g. a web_search with a long query is tracked apart from a short one.
+Latency goes into a streaming quantile sketch (log-spaced buckets with
+~2% relative error, a few hundred counters at most), failures into
+counters plus a consecutive-failure streak.
+
+The executor uses it to:
+- start the slowest tools of a batch first and decide what is worth
+  running in parallel (estimate)
+- time out runs that exceed p99 x k once enough samples exist (timeout)
+- stop calling tools that keep failing, with a periodic retry (should_skip)
+
+State is saved to memory/tool_costs.json (under the project root) a
+few seconds after changes, and at exit if anything is still unsaved.
+"""
+
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def param_class(params: Optional[Dict]) -> str:
+    """Coarse key for a parameter set: sorted names, '+' marking large values"""
+    if not params:
+        return '-'
+    parts = []
+    for name in sorted(params):
+        if name == 'progress_callback':
+            continue
+        value = params[name]
+        large = isinstance(value, (str, list, dict)) and len(value) > 100
+        parts.append(name + ('+' if large else ''))
+    return ','.join(parts) or '-'
+
+
+class QuantileSketch:
+    """Mergeable relative-error quantile sketch over positive values"""
+
+    MIN_VALUE = 1e-4  # anything faster counts as this
+
+    def __init__(self, relative_accuracy: float = 0.02, max_buckets: int = 512):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float):
+        value = max(value, self.MIN_VALUE)
+        key = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        self.count += 1
+        self.total += value
+        if len(self.buckets) > self.max_buckets:
+            # Fold the two lowest buckets; upper quantiles keep their accuracy
+            low, nxt = sorted(self.buckets)[:2]
+            self.buckets[nxt] += self.buckets.pop(low)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def to_dict(self) -> Dict:
+        return {'buckets': {str(k): v for k, v in self.buckets.items()},
+                'count': self.count, 'total': self.total}
+
+    @classmethod
+    def from_dict(cls, data: Dict, relative_accuracy: float = 0.02) -> 'QuantileSketch':
+        sketch = cls(relative_accuracy)
+        sketch.buckets = {int(k): v for k, v in data.get('buckets', {}).items()}
+        sketch.count = data.get('count', sum(sketch.buckets.values()))
+        sketch.total = data.get('total', 0.0)
+        return sketch
+
+
+class ToolStats:
+    """Latency sketch and failure record for one tool (or tool + param class)"""
+
+    def __init__(self):
+        self.latency = QuantileSketch()
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.failure_rate = 0.0  # EMA, recent runs weigh more
+        self.last_run = 0.0
+
+    def record(self, seconds: float, success: bool, alpha: float = 0.2):
+        self.latency.add(seconds)
+        if success:
+            self.successes += 1
+            self.consecutive_failures = 0
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+        self.failure_rate = alpha * (0.0 if success else 1.0) + (1 - alpha) * self.failure_rate
+        self.last_run = time.time()
+
+    def to_dict(self) -> Dict:
+        return {
+            'latency': self.latency.to_dict(),
+            'successes': self.successes,
+            'failures': self.failures,
+            'consecutive_failures': self.consecutive_failures,
+            'failure_rate': round(self.failure_rate, 4),
+            'last_run': self.last_run
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ToolStats':
+        stats = cls()
+        stats.latency = QuantileSketch.from_dict(data.get('latency', {}))
+        stats.successes = data.get('successes', 0)
+        stats.failures = data.get('failures', 0)
+        stats.consecutive_failures = data.get('consecutive_failures', 0)
+        stats.failure_rate = data.get('failure_rate', 0.0)
+        stats.last_run = data.get('last_run', 0.0)
+        return stats
+
+    def summary(self) -> Dict:
+        return {
+            'runs': self.latency.count,
+            'p50': _round(self.latency.quantile(0.5)),
+            'p99': _round(self.latency.quantile(0.99)),
+            'failure_rate': round(self.failure_rate, 3),
+            'consecutive_failures': self.consecutive_failures
+        }
+
+
+def _round(value):
+    return round(value, 4) if value is not None else None
+
+
+class ToolCostModel:
+    """Per-tool latency/failure model with adaptive timeouts and skipping"""
+
+    def __init__(self, path=None, timeout_factor: float = 3.0, min_samples: int = 20,
+                 min_timeout: float = 5.0, max_timeout: float = 300.0,
+                 skip_after: int = 5, skip_failure_rate: float = 0.8,
+                 retry_after: float = 300.0, save_delay: float = 5.0):
+        self.path = Path(path) if path else None
+        self.timeout_factor = timeout_factor
+        self.min_samples = min_samples
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.skip_after = skip_after
+        self.skip_failure_rate = skip_failure_rate
+        self.retry_after = retry_after
+        self.save_delay = save_delay
+
+        self.tools: Dict[str, ToolStats] = {}    # tool name -> stats
+        self.classes: Dict[str, ToolStats] = {}  # "tool|param class" -> stats
+        self._lock = threading.Lock()
+        self._timer = None
+        self._dirty = False  # records not saved yet
+        self._load()
+
+    def _load(self):
+        if not self.path or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable tool cost model: {e}")
+            return
+        self.tools = {k: ToolStats.from_dict(v) for k, v in data.get('tools', {}).items()}
+        self.classes = {k: ToolStats.from_dict(v) for k, v in data.get('classes', {}).items()}
+
+    def record(self, tool_name: str, params: Optional[Dict], seconds: float, success: bool):
+        """Record one finished (or failed / timed out) run"""
+        key = f"{tool_name}|{param_class(params)}"
+        with self._lock:
+            self.tools.setdefault(tool_name, ToolStats()).record(seconds, success)
+            self.classes.setdefault(key, ToolStats()).record(seconds, success)
+            self._dirty = True
+            self._schedule_save()
+
+    def _stats(self, tool_name: str, params: Optional[Dict]) -> Optional[ToolStats]:
+        """Param-class stats when there are enough, else the tool's overall stats"""
+        specific = self.classes.get(f"{tool_name}|{param_class(params)}")
+        if specific and specific.latency.count >= self.min_samples:
+            return specific
+        return self.tools.get(tool_name) or specific
+
+    def estimate(self, tool_name: str, params: Optional[Dict] = None, q: float = 0.5,
+                 default: Optional[float] = None) -> Optional[float]:
+        """Latency quantile in seconds (default when the tool was never seen)"""
+        with self._lock:
+            stats = self._stats(tool_name, params)
+            value = stats.latency.quantile(q) if stats else None
+        return value if value is not None else default
+
+    def timeout(self, tool_name: str, params: Optional[Dict] = None) -> Optional[float]:
+        """p99 x timeout_factor, clamped; None until min_samples runs were seen"""
+        with self._lock:
+            stats = self._stats(tool_name, params)
+            if not stats or stats.latency.count < self.min_samples:
+                return None
+            p99 = stats.latency.quantile(0.99)
+        return min(max(p99 * self.timeout_factor, self.min_timeout), self.max_timeout)
+
+    def should_skip(self, tool_name: str, params: Optional[Dict] = None, probe: bool = True) -> bool:
+        """
+        True for a tool (param class) that keeps failing
+
+        After retry_after seconds one probe run is let through; a
+        success resets the streak. probe=False only looks (for planning).
+        """
+        with self._lock:
+            stats = self.classes.get(f"{tool_name}|{param_class(params)}")
+            if not stats or stats.consecutive_failures < self.skip_after \
+                    or stats.failure_rate < self.skip_failure_rate:
+                return False
+            if time.time() - stats.last_run >= self.retry_after:
+                if probe:
+                    stats.last_run = time.time()  # one probe per retry window
+                return False
+            return True
+
+    def _schedule_save(self):
+        if self.path and self._timer is None:
+            self._timer = threading.Timer(self.save_delay, self.save)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def save(self):
+        """Write the model atomically (only if something was recorded since the last save)"""
+        with self._lock:
+            self._timer = None
+            if not self.path or not self._dirty:
+                return
+            self._dirty = False
+            data = {
+                'tools': {k: v.to_dict() for k, v in self.tools.items()},
+                'classes': {k: v.to_dict() for k, v in self.classes.items()}
+            }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix('.json.tmp')
+            tmp.write_text(json.dumps(data))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"⚠️ Could not save tool cost model: {e}")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'tools': {name: stats.summary() for name, stats in self.tools.items()},
+                'classes': {key: stats.summary() for key, stats in self.classes.items()}
+            }
+
+
+# Global model instance
+_model = None
+_model_lock = threading.Lock()
+
+def get_tool_cost_model() -> ToolCostModel:
+    """Get global tool cost model (persisted to memory/tool_costs.json)"""
+    global _model
+    with _model_lock:
+        if _model is None:
+            _model = ToolCostModel(PROJECT_ROOT / "memory" / "tool_costs.json")
+            atexit.register(_model.save)
+    return _model
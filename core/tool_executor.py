@@ -5,7 +5,12 @@ Executes tools declared by the AI in a safe, dynamic way
 """
 
 import importlib
+import inspect
+import json
 import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
 from pathlib import Path
 
 # Add project root to path
@@ -13,27 +18,140 @@ PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
 from tools import TOOLS
+from core.async_runtime import get_async_runtime
+from core.result_formatter import ResultFormatter
+from core.tool_cost_model import get_tool_cost_model
+
+# Shared by every executor (they are created per request)
+_batch_pool = None
+_batch_pool_lock = threading.Lock()
+
+def get_batch_pool():
+    """Worker pool for read-only sync tools in a batch"""
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is None:
+            _batch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tool-batch")
+    return _batch_pool
 
 
 class ToolExecutor:
     """Execute tools dynamically from the registry"""
     
-    def __init__(self, commander_mode=False, web_search_mode=False):
+    # Read-only sync tools expected to finish faster than this run inline
+    PARALLEL_MIN_SECONDS = 0.05
+    
+    def __init__(self, commander_mode=False, web_search_mode=False, result_token_budget=800,
+                 cost_model=None):
         self.commander_mode = commander_mode
         self.web_search_mode = web_search_mode
         self.tool_cache = {}  # Cache imported modules
+        self.result_token_budget = result_token_budget  # Per-call budget for format_results
+        self.last_format_stats = []
+        self.cost_model = cost_model or get_tool_cost_model()
     
-    def execute_tool(self, tool_name, params=None):
+    def execute_tool(self, tool_name, params=None, progress_callback=None):
         """
         Execute a single tool by name
         
         Args:
             tool_name: Name of the tool (e.g., 'datetime', 'open_app')
             params: Dict of parameters (optional)
+            progress_callback: Optional callable(tool_name, message) that
+                receives live progress updates from tools that support them
             
         Returns:
             Dict with 'success', 'message', 'data' keys
         """
+        started = self._start_tool(tool_name, params, progress_callback)
+        return self._finish_tool(tool_name, started, params)
+    
+    def execute_tools(self, tool_declarations, progress_callback=None):
+        """
+        Execute multiple tools
+        
+        Side-effecting tools split the batch into segments: each one runs
+        after everything declared before it has finished, and everything
+        declared after it starts once it is done, so reads see the writes
+        that precede them. Within a segment, scheduling follows the
+        learned cost model: async tools go on the shared event loop and
+        read-only sync tools expected to be slow go to a worker pool,
+        slowest first, so they all overlap; fast ones run on this thread.
+        Results of concurrent runs are only waited for up to the tool's
+        adaptive timeout (p99 x k) once it has enough history.
+        
+        Args:
+            tool_declarations: List of dicts with 'tool' and 'params' keys
+            progress_callback: Optional callable(tool_name, message) for
+                live progress updates (see execute_tool)
+            
+        Returns:
+            List of results (same order as tool_declarations)
+        """
+        tools = [d.get('tool') for d in tool_declarations]
+        params = [d.get('params', {}) for d in tool_declarations]
+        results = [None] * len(tool_declarations)
+        
+        segment = []
+        for i, tool_name in enumerate(tools):
+            if self._has_side_effects(tool_name):
+                self._run_segment(segment, tools, params, results, progress_callback)
+                segment = []
+                # Run to completion: the rest of the batch may depend on it
+                started = self._start_tool(tool_name, params[i], progress_callback)
+                results[i] = self._finish_tool(tool_name, started, params[i])
+            else:
+                segment.append(i)
+        self._run_segment(segment, tools, params, results, progress_callback)
+        return results
+    
+    def _run_segment(self, indices, tools, params, results, progress_callback):
+        """Run read-only tools of a batch, overlapping the slow ones, and fill in their results"""
+        concurrent, inline = [], []
+        for i in indices:
+            if self._is_async_tool(tools[i]) or self._worth_parallelizing(tools[i], params[i]):
+                concurrent.append(i)
+            else:
+                inline.append(i)
+        if len(indices) == 1 and not self._is_async_tool(tools[indices[0]]):
+            concurrent, inline = [], indices  # nothing to overlap with
+        
+        # Longest expected first, so the critical path starts earliest
+        concurrent.sort(key=lambda i: -self.cost_model.estimate(tools[i], params[i], default=1.0))
+        
+        started, limits = {}, {}
+        for i in concurrent:
+            if self._is_async_tool(tools[i]):
+                started[i] = self._start_tool(tools[i], params[i], progress_callback)
+            else:
+                started[i] = get_batch_pool().submit(self._start_tool, tools[i], params[i], progress_callback)
+            limits[i] = (time.monotonic(), self.cost_model.timeout(tools[i], params[i]))
+        
+        for i in inline:
+            started[i] = self._start_tool(tools[i], params[i], progress_callback)
+        
+        for i in indices:
+            results[i] = self._finish_tool(tools[i], started[i], params[i], *limits.get(i, (None, None)))
+    
+    def _has_side_effects(self, tool_name):
+        tool_info = self._find_tool(tool_name)
+        return bool(tool_info and tool_info.get('side_effects', False))
+    
+    def _worth_parallelizing(self, tool_name, params):
+        """Read-only sync tool whose expected run time beats pool overhead"""
+        tool_info = self._find_tool(tool_name)
+        if not tool_info or tool_info.get('side_effects', False):
+            return False
+        expected = self.cost_model.estimate(tool_name, params)
+        return expected is None or expected >= self.PARALLEL_MIN_SECONDS
+    
+    def _start_tool(self, tool_name, params, progress_callback):
+        """
+        Resolve, permission-check and launch a tool
+        
+        Returns the final result dict for sync tools (and errors), or a
+        concurrent Future for coroutine tools running on the shared loop.
+        """
         if params is None:
             params = {}
         
@@ -68,60 +186,126 @@ class ToolExecutor:
                 'error': 'PERMISSION_DENIED'
             }
         
+        # Chronically failing tools are skipped (with a periodic retry)
+        if self.cost_model.should_skip(tool_name, params):
+            return {
+                'success': False,
+                'tool': tool_name,
+                'message': f"Tool '{tool_name}' skipped: it has been failing repeatedly",
+                'error': 'TOOL_SKIPPED'
+            }
+        
         # Execute tool
+        original_params = params
+        started_at = time.monotonic()
         try:
-            module_path = tool_info['module']
-            function_name = tool_info['function']
-            
-            # Import module (cached)
-            if module_path not in self.tool_cache:
-                module = importlib.import_module(module_path)
-                self.tool_cache[module_path] = module
-            else:
-                module = self.tool_cache[module_path]
+            function = self._load_function(tool_info)
             
-            # Get function
-            function = getattr(module, function_name)
+            # Wire up live progress for tools that report it
+            if progress_callback and tool_info.get('supports_progress', False):
+                params = dict(params)
+                params['progress_callback'] = (
+                    lambda message: progress_callback(tool_name, message)
+                )
             
             # Call function with params
-            if params:
-                result = function(**params)
-            else:
-                result = function()
+            result = function(**params)
             
-            # Ensure result is a dict
-            if not isinstance(result, dict):
-                result = {'success': True, 'data': result}
+            # Coroutine tools run on the shared long-lived loop
+            if inspect.iscoroutine(result):
+                future = get_async_runtime().submit(result)
+                
+                def record(f):
+                    if not f.cancelled():  # cut off: _finish_tool recorded the timeout
+                        self._record(tool_name, original_params, started_at,
+                                     f.exception() is None and self._succeeded(f.result()))
+                future.add_done_callback(record)
+                return future
             
-            result['tool'] = tool_name
+            result = self._normalize_result(tool_name, result)
+            self._record(tool_name, original_params, started_at, self._succeeded(result))
             return result
             
         except Exception as e:
+            self._record(tool_name, original_params, started_at, False)
+            return self._error_result(tool_name, e)
+    
+    def _succeeded(self, result):
+        return not isinstance(result, dict) or result.get('success', True) is not False
+    
+    def _record(self, tool_name, params, started_at, success):
+        self.cost_model.record(tool_name, params, time.monotonic() - started_at, success)
+    
+    def _finish_tool(self, tool_name, started, params=None, launched_at=None, limit=None):
+        """
+        Wait for an async or pooled tool if needed and return its result dict
+        
+        With a limit (seconds from launched_at), an unfinished run is
+        cancelled and counts as a failure at the limit. A run that can't
+        be cancelled (a pool thread already running) finishes in the
+        background and is recorded once, when it completes.
+        """
+        if not isinstance(started, Future):
+            return started
+        
+        timeout = max(launched_at + limit - time.monotonic(), 0) if limit else None
+        try:
+            return self._normalize_result(tool_name, started.result(timeout))
+        except FutureTimeout:
+            if started.cancel():
+                self.cost_model.record(tool_name, params, limit, False)
+                message = f"Tool '{tool_name}' was cancelled after {limit:.1f}s"
+            else:
+                # Its late completion is recorded when it finishes
+                message = f"Tool '{tool_name}' is still running after {limit:.1f}s; continuing without its result"
             return {
                 'success': False,
                 'tool': tool_name,
-                'message': f"Tool execution failed: {str(e)}",
-                'error': 'EXECUTION_ERROR',
-                'exception': str(e)
+                'message': f"{message} (adaptive limit from its latency history)",
+                'error': 'TIMEOUT'
             }
+        except Exception as e:
+            return self._error_result(tool_name, e)
     
-    def execute_tools(self, tool_declarations):
-        """
-        Execute multiple tools
+    def _load_function(self, tool_info):
+        """Import a tool's module (cached) and return its function"""
+        module_path = tool_info['module']
         
-        Args:
-            tool_declarations: List of dicts with 'tool' and 'params' keys
-            
-        Returns:
-            List of results
-        """
-        results = []
-        for declaration in tool_declarations:
-            tool_name = declaration.get('tool')
-            params = declaration.get('params', {})
-            result = self.execute_tool(tool_name, params)
-            results.append(result)
-        return results
+        if module_path not in self.tool_cache:
+            module = importlib.import_module(module_path)
+            self.tool_cache[module_path] = module
+        else:
+            module = self.tool_cache[module_path]
+        
+        return getattr(module, tool_info['function'])
+    
+    def _is_async_tool(self, tool_name):
+        """Check whether a registered tool is a coroutine function"""
+        tool_info = self._find_tool(tool_name)
+        if not tool_info:
+            return False
+        try:
+            return inspect.iscoroutinefunction(self._load_function(tool_info))
+        except Exception:
+            return False
+    
+    def _normalize_result(self, tool_name, result):
+        """Ensure result is a dict tagged with the tool name"""
+        if not isinstance(result, dict):
+            result = {'success': True, 'data': result}
+        
+        result['tool'] = tool_name
+        return result
+    
+    def _error_result(self, tool_name, e):
+        """Build the standard failure result for an exception"""
+        return {
+            'success': False,
+            'tool': tool_name,
+            'message': f"Tool execution failed: {str(e)}",
+            'error': 'EXECUTION_ERROR',
+            'exception': str(e)
+        }
     
     def _find_tool(self, tool_name):
         """Find tool in registry by name"""
@@ -130,19 +314,29 @@ class ToolExecutor:
                 return tools[tool_name]
         return None
     
-    def format_results(self, results):
+    def format_results(self, results, query=None, per_call_budget=None):
         """
         Format tool results for AI to read
         
+        Each result is rendered within its own token budget so large
+        payloads (read_file, deep_research, list_processes) don't blow up
+        the follow-up prompt. Stats on what was dropped are kept in
+        self.last_format_stats.
+        
         Args:
             results: List of tool execution results
+            query: User message, used to keep the most relevant passages
+            per_call_budget: Token budget per tool result (optional)
             
         Returns:
             Formatted string
         """
+        self.last_format_stats = []
         if not results:
             return ""
         
+        formatter = ResultFormatter(per_call_budget or self.result_token_budget)
+        
         formatted = "\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
         formatted += "🛠️ TOOL RESULTS:\n"
         formatted += "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
@@ -154,20 +348,15 @@ class ToolExecutor:
             if success:
                 formatted += f"✅ {tool_name}:\n"
                 
-                # Format message or data
-                if 'message' in result:
-                    formatted += f"   {result['message']}\n"
-                elif 'data' in result:
-                    data = result['data']
-                    if isinstance(data, dict):
-                        for key, value in data.items():
-                            formatted += f"   {key}: {value}\n"
-                    else:
-                        formatted += f"   {data}\n"
+                lines, stats = formatter.format_result(result, query)
+                self.last_format_stats.append(stats)
+                for line in lines:
+                    formatted += f"   {line}\n"
                 
             else:
                 formatted += f"❌ {tool_name} FAILED:\n"
-                formatted += f"   {result.get('message', 'Unknown error')}\n"
+                error = result.get('message') or result.get('error') or 'Unknown error'
+                formatted += f"   {error}\n"
             
             formatted += "\n"
         
@@ -208,6 +397,126 @@ class ToolExecutor:
         return formatted
 
 
+class SpeculativeToolDispatcher:
+    """
+    Start tools while the model is still generating
+    
+    Feed the accumulated response after each token; every time a new
+    </TOOLS> closing tag appears, the declarations parsed so far are
+    dispatched to a worker pool so tool latency overlaps the rest of
+    generation. Tools marked side_effects in the registry are never run
+    early - they only run from resolve(), once the final parse confirms
+    them - and nothing declared after one is either, since it may depend
+    on the write. Speculative results the final parse doesn't ask for are
+    dropped.
+    """
+    
+    CLOSE_TAG = '</tools>'
+    
+    def __init__(self, executor, parse_declarations, progress_callback=None, max_workers=4):
+        self.executor = executor
+        self.parse_declarations = parse_declarations
+        self.progress_callback = progress_callback
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculative-tool")
+        self.pending = {}  # declaration key -> [Future, ...]
+        self.dispatched = 0
+        self.reused = 0
+        self._blocks_seen = 0
+        self._scan_from = 0
+        self._stopped = False  # a side-effecting tool was declared: no more speculation
+    
+    def feed(self, response_so_far):
+        """Check newly generated text for closed <TOOLS> blocks and dispatch them"""
+        lowered = response_so_far[self._scan_from:].lower()
+        closes = lowered.count(self.CLOSE_TAG)
+        # Re-scan the tail next time in case a tag is split across tokens
+        self._scan_from = max(len(response_so_far) - len(self.CLOSE_TAG) + 1, 0)
+        if not closes:
+            return
+        
+        declarations = self.parse_declarations(response_so_far)
+        for declaration in declarations[self._blocks_seen:]:
+            if self.executor._has_side_effects(declaration.get('tool')):
+                self._stopped = True
+            if self._stopped:
+                break
+            self._dispatch(declaration)
+        self._blocks_seen = len(declarations)
+    
+    def resolve(self, final_declarations):
+        """
+        Return results for the final parse, in order
+        
+        Reuses matching speculative runs for declarations before the first
+        side-effecting tool and executes everything else now, in order.
+        """
+        results = [None] * len(final_declarations)
+        remaining = []
+        before_write = True
+        
+        for i, declaration in enumerate(final_declarations):
+            before_write = before_write and not self.executor._has_side_effects(declaration.get('tool'))
+            futures = self.pending.get(self._key(declaration)) if before_write else None
+            if futures:
+                results[i] = futures.pop(0)
+                self.reused += 1
+            else:
+                remaining.append(i)
+        
+        # Reads reused from before a write must finish before that write runs
+        if any(self.executor._has_side_effects(final_declarations[i].get('tool')) for i in remaining):
+            self._join(results, final_declarations)
+        
+        if remaining:
+            fresh = self.executor.execute_tools(
+                [final_declarations[i] for i in remaining],
+                progress_callback=self.progress_callback
+            )
+            for i, result in zip(remaining, fresh):
+                results[i] = result
+        
+        self._join(results, final_declarations)
+        return results
+    
+    def _join(self, results, declarations):
+        """Replace reused speculative futures in results with their outcomes"""
+        for i, result in enumerate(results):
+            if isinstance(result, Future):
+                tool_name = declarations[i].get('tool')
+                try:
+                    results[i] = result.result()
+                except Exception as e:
+                    results[i] = self.executor._error_result(tool_name, e)
+    
+    def close(self):
+        """Drop unused speculative work and release the pool"""
+        for futures in self.pending.values():
+            for future in futures:
+                future.cancel()
+        self.pending.clear()
+        self.pool.shutdown(wait=False)
+    
+    def _dispatch(self, declaration):
+        tool_name = declaration.get('tool')
+        if not self.executor._find_tool(tool_name):
+            return
+        
+        future = self.pool.submit(
+            self.executor.execute_tool,
+            tool_name,
+            declaration.get('params', {}),
+            self.progress_callback
+        )
+        self.pending.setdefault(self._key(declaration), []).append(future)
+        self.dispatched += 1
+    
+    def _key(self, declaration):
+        return (
+            declaration.get('tool'),
+            json.dumps(declaration.get('params', {}), sort_keys=True, default=str)
+        )
+
+
 def test_executor():
     """Test the tool executor"""
     print("🧪 Testing Tool Executor\n")
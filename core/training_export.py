@@ -0,0 +1,317 @@
+"""
+Training Data Export
+Incremental, parallel, deduplicated export of chat sessions
+
+- A manifest (training_data/export_manifest.json) remembers every
+  exported session, its on-disk fingerprint and how many messages were
+  exported, so each run only parses sessions that are new or have grown
+  since. A grown session only exports its new turns, as a record that
+  names the session and the message it continues from. Archived
+  sessions can't grow, so they are only picked up if they were never
+  exported.
+- New sessions are parsed in a process pool (inline when there are only
+  a few, where pool start-up would dominate). Spawned workers re-import
+  the caller's main module, so servers use a thread pool instead.
+- Exact duplicates are dropped by content hash, near duplicates by a
+  64-bit SimHash within a small Hamming distance (LSH-banded lookup).
+- Output goes to gzip-compressed JSONL shards that roll over at a size
+  bound, numbered after the shards of previous runs.
+"""
+
+import gzip
+import hashlib
+import json
+import multiprocessing
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from core.logging_system import read_session
+from core.session_archive import SessionArchive
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4   # 4 x 16-bit bands: any pair within distance 3 shares a band
+
+# Archives opened by this process, by directory: a worker parses many sessions
+_archives: Dict[str, SessionArchive] = {}
+
+
+def session_fingerprint(date_dir: Path, session_id: str) -> int:
+    """Total size of a session's files - changes whenever it grows"""
+    total = 0
+    for suffix in ('.json', '.jsonl'):
+        path = date_dir / f"{session_id}{suffix}"
+        if path.exists():
+            total += path.stat().st_size
+    return total
+
+
+def _archive(directory: str) -> SessionArchive:
+    archive = _archives.get(directory)
+    if archive is None:
+        archive = _archives[directory] = SessionArchive(directory)
+    return archive
+
+
+def parse_session(job: Tuple[str, str]) -> Optional[Dict]:
+    """Worker: load one session and keep only the trainable turns"""
+    location, session_id = job
+    try:
+        if location.endswith('.arc'):
+            path = Path(location)
+            session = _archive(str(path.parent)).get(session_id, month=path.stem)
+        else:
+            session = read_session(Path(location), session_id)
+    except Exception:
+        return None
+    if not session:
+        return None
+
+    messages = [
+        {'role': m['role'], 'content': m['content']}
+        for m in session.get('messages', [])
+        if m.get('role') in ('user', 'assistant') and str(m.get('content', '')).strip()
+    ]
+    return {'session_id': session_id, 'messages': messages}
+
+
+def content_hash(messages: List[Dict]) -> str:
+    """Exact-duplicate key: whitespace/case-normalized conversation"""
+    normalized = "\n".join(
+        f"{m['role']}:{' '.join(str(m['content']).lower().split())}" for m in messages
+    )
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def simhash(messages: List[Dict]) -> int:
+    """64-bit SimHash over word 3-shingles of the conversation"""
+    words = re.findall(r'\w+', " ".join(str(m['content']) for m in messages).lower())
+    shingles = [" ".join(words[i:i + 3]) for i in range(max(len(words) - 2, 1))]
+    weights = [0] * SIMHASH_BITS
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'little')
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit, w in enumerate(weights) if w > 0)
+
+
+class NearDuplicateIndex:
+    """SimHash store with banded lookup for Hamming-distance queries"""
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        self.band_bits = SIMHASH_BITS // SIMHASH_BANDS
+        self.buckets: Dict[Tuple[int, int], List[int]] = {}
+
+    def _bands(self, value: int):
+        mask = (1 << self.band_bits) - 1
+        for band in range(SIMHASH_BANDS):
+            yield band, value >> (band * self.band_bits) & mask
+
+    def find(self, value: int) -> bool:
+        for key in self._bands(value):
+            for other in self.buckets.get(key, ()):
+                if bin(value ^ other).count('1') <= self.max_distance:
+                    return True
+        return False
+
+    def add(self, value: int):
+        for key in self._bands(value):
+            self.buckets.setdefault(key, []).append(value)
+
+
+class ShardWriter:
+    """
+    gzip JSONL shards that roll over after max_bytes of uncompressed data
+
+    (The compressed size isn't known until zlib flushes its buffers, so
+    the bound is on what goes in; shards come out several times smaller.)
+    """
+
+    def __init__(self, shard_dir: Path, start_index: int, max_bytes: int):
+        self.shard_dir = shard_dir
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        self.index = start_index
+        self.max_bytes = max_bytes
+        self.written: List[str] = []
+        self._raw = None
+        self._gz = None
+        self._size = 0
+
+    def write(self, record: Dict) -> str:
+        if self._gz is None:
+            self._open()
+        data = (json.dumps(record, ensure_ascii=False) + '\n').encode()
+        self._gz.write(data)
+        self._size += len(data)
+        name = self.written[-1]
+        if self._size >= self.max_bytes:
+            self.close()
+        return name
+
+    def _open(self):
+        name = f"train-{self.index:05d}.jsonl.gz"
+        self.index += 1
+        self._raw = open(self.shard_dir / name, 'wb')
+        self._size = 0
+        self._gz = gzip.GzipFile(fileobj=self._raw, mode='wb')
+        self.written.append(name)
+
+    def close(self):
+        if self._gz is not None:
+            self._gz.close()
+            self._raw.close()
+            self._gz = self._raw = None
+
+
+class TrainingExporter:
+    """Export new sessions since the last run into deduplicated shards"""
+
+    def __init__(self, sessions_dir: Path, training_dir: Path,
+                 shard_bytes: int = 64 * 1024 * 1024, workers: Optional[int] = None,
+                 pool_threshold: int = 32, near_duplicate_distance: int = 3,
+                 archive_dir: Optional[Path] = None, processes: bool = True):
+        self.sessions_dir = Path(sessions_dir)
+        self.archive_dir = Path(archive_dir) if archive_dir else self.sessions_dir.parent / "session_archive"
+        self.training_dir = Path(training_dir)
+        self.shard_dir = self.training_dir / "shards"
+        self.manifest_path = self.training_dir / "export_manifest.json"
+        self.shard_bytes = shard_bytes
+        self.workers = workers or max(1, min(multiprocessing.cpu_count() - 1, 8))
+        self.pool_threshold = pool_threshold
+        self.processes = processes
+        self.near_duplicate_distance = near_duplicate_distance
+        self.last_stats = None
+
+    def _load_manifest(self) -> Dict:
+        if self.manifest_path.exists():
+            try:
+                return json.loads(self.manifest_path.read_text())
+            except ValueError:
+                pass
+        return {'sessions': {}, 'hashes': [], 'simhashes': [], 'next_shard': 0}
+
+    def _save_manifest(self, manifest: Dict):
+        tmp = self.manifest_path.with_suffix('.json.tmp')
+        tmp.write_text(json.dumps(manifest))
+        tmp.replace(self.manifest_path)
+
+    def pending_sessions(self, manifest: Dict) -> List[Tuple[str, str, int]]:
+        """(location, session_id, fingerprint) for new or grown sessions"""
+        pending = []
+        archive = SessionArchive(self.archive_dir)
+        for summary in archive.summaries():
+            sid = summary['session_id']
+            if sid not in manifest['sessions']:
+                pending.append((str(archive.location(sid)), sid, 'archived'))
+        if not self.sessions_dir.exists():
+            return pending
+        for date_dir in sorted(self.sessions_dir.iterdir()):
+            if not date_dir.is_dir():
+                continue
+            ids = {p.name.split('.')[0] for p in date_dir.glob("*.json*") if not p.name.endswith('.tmp')}
+            for sid in sorted(ids):
+                fingerprint = session_fingerprint(date_dir, sid)
+                known = manifest['sessions'].get(sid)
+                if known is None or known['fingerprint'] != fingerprint:
+                    pending.append((str(date_dir), sid, fingerprint))
+        return pending
+
+    def _parse_all(self, jobs: List[Tuple[str, str]]) -> List[Optional[Dict]]:
+        chunksize = max(1, len(jobs) // (self.workers * 4))
+        if len(jobs) < self.pool_threshold or self.workers == 1:
+            _archives.clear()  # archives may have been repacked since the last export
+            return [parse_session(job) for job in jobs]
+        if not self.processes:
+            _archives.clear()
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                return list(pool.map(parse_session, jobs))
+        # spawn: the API server is multithreaded, and forking it isn't safe
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as pool:
+            return list(pool.map(parse_session, jobs, chunksize=chunksize))
+
+    def export(self) -> Dict:
+        """Run one incremental export; returns throughput stats"""
+        start = time.monotonic()
+        manifest = self._load_manifest()
+        pending = self.pending_sessions(manifest)
+
+        stats = {
+            'sessions_scanned': len(manifest['sessions']) + len(pending),
+            'sessions_new': len(pending),
+            'exported': 0,
+            'continued': 0,
+            'exact_duplicates': 0,
+            'near_duplicates': 0,
+            'empty': 0,
+            'messages': 0,
+            'shards': [],
+            'workers': self.workers if len(pending) >= self.pool_threshold else 1
+        }
+
+        exact = set(manifest['hashes'])
+        near = NearDuplicateIndex(self.near_duplicate_distance)
+        for value in manifest['simhashes']:
+            near.add(value)
+
+        writer = ShardWriter(self.shard_dir, manifest['next_shard'], self.shard_bytes)
+        parsed = self._parse_all([(date_dir, sid) for date_dir, sid, _ in pending])
+        now = datetime.now().isoformat()
+
+        try:
+            for (_, sid, fingerprint), result in zip(pending, parsed):
+                known = manifest['sessions'].get(sid) or {}
+                done = known.get('messages', 0)
+                entry = {'fingerprint': fingerprint, 'exported_at': now,
+                         'shard': known.get('shard'), 'messages': done}
+                manifest['sessions'][sid] = entry
+                messages = result['messages'][done:] if result else []
+                if not messages:
+                    stats['empty'] += 1
+                    continue
+
+                entry['messages'] = done + len(messages)
+                digest = content_hash(messages)
+                if digest in exact:
+                    stats['exact_duplicates'] += 1
+                    continue
+                signature = simhash(messages)
+                if near.find(signature):
+                    stats['near_duplicates'] += 1
+                    continue
+
+                record = {'messages': messages}
+                if done:
+                    record.update(session_id=sid, continues_from=done)
+                    stats['continued'] += 1
+                entry['shard'] = writer.write(record)
+                exact.add(digest)
+                near.add(signature)
+                manifest['hashes'].append(digest)
+                manifest['simhashes'].append(signature)
+                stats['exported'] += 1
+                stats['messages'] += len(messages)
+        finally:
+            writer.close()
+
+        manifest['next_shard'] = writer.index
+        manifest['last_export'] = now
+        self._save_manifest(manifest)
+
+        elapsed = time.monotonic() - start
+        shard_bytes = sum((self.shard_dir / name).stat().st_size for name in writer.written)
+        stats['shards'] = writer.written
+        stats['bytes_written'] = shard_bytes
+        stats['seconds'] = round(elapsed, 3)
+        stats['sessions_per_sec'] = round(len(pending) / elapsed, 1) if elapsed else 0.0
+        stats['mb_per_sec'] = round(shard_bytes / 1024 / 1024 / elapsed, 3) if elapsed else 0.0
+        self.last_stats = stats
+
+        print(f"📦 Exported {stats['exported']}/{stats['sessions_new']} new sessions "
+              f"({stats['exact_duplicates']} exact + {stats['near_duplicates']} near dupes dropped) "
+              f"in {stats['seconds']}s - {stats['sessions_per_sec']} sessions/s")
+        return stats
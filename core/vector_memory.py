@@ -0,0 +1,285 @@
+"""
+Semantic Memory
+Embeds episodes and facts into a memory-mapped NumPy matrix for similarity recall
+
+Layout (memory/semantic/):
+- vectors.f32   contiguous float32 matrix, one L2-normalized row per item
+                (vectors.<generation>.f32 once compacted)
+- items.jsonl   append-only log: {"row", "kind", "ref", "text", "payload"}
+                or {"row", "deleted": true} tombstones; after a compaction
+                its first line is {"vectors": <file name>}, naming the
+                matrix its rows refer to
+
+Search is a single matrix-vector product over the live rows plus an
+argpartition for top-k; deleted rows and other kinds are masked out
+with per-row NumPy arrays kept in step with add/delete. Deleted and
+replaced rows stay in place until compact() rewrites both files, which
+happens automatically once tombstones pass a fraction of the matrix.
+Compaction writes a new generation of the matrix, then swaps in the
+items log that names it; that one rename switches both files, so a
+crash leaves either the old pair or the new one.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+class HashingEmbedder:
+    """
+    Model-free embedder: signed feature hashing of words and word bigrams
+
+    Deterministic across processes (uses blake2b, not hash()), so vectors
+    written today still match queries tomorrow.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        words = re.findall(r'\w+', text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = [0.0] * self.dim
+        for feature in self._features(text):
+            digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], 'little') % self.dim
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[bucket] += sign
+
+        norm = math.sqrt(sum(v * v for v in vector))
+        if norm:
+            vector = [v / norm for v in vector]
+        return np.asarray(vector, dtype=np.float32)
+
+
+class VectorIndex:
+    """Append-only memory-mapped vector store with tombstones and compaction"""
+
+    def __init__(self, storage_path: str = "memory/semantic", dim: int = 256,
+                 initial_capacity: int = 1024, compact_ratio: float = 0.25):
+        self.storage_path = Path(storage_path)
+        self.storage_path.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.storage_path / "vectors.f32"
+        self.items_path = self.storage_path / "items.jsonl"
+        self.dim = dim
+        self.compact_ratio = compact_ratio
+
+        self._lock = threading.RLock()
+        self.items: List[Optional[Dict]] = []   # row -> item, None once deleted
+        self.by_ref: Dict[str, int] = {}
+        self.deleted = 0
+        self.live = np.zeros(0, dtype=bool)              # row -> not deleted
+        self.kind_codes = np.zeros(0, dtype=np.int32)    # row -> index into _kind_ids
+        self._kind_ids: Dict[str, int] = {}
+
+        self._replay()
+        self._remove_stale_files()
+        self.capacity = max(initial_capacity, len(self.items))
+        self._open_matrix(self.capacity)
+        self._mark_rows()
+
+    def _replay(self):
+        """Rebuild row metadata from the append log"""
+        if not self.items_path.exists():
+            return
+        with open(self.items_path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn final line
+                if 'vectors' in entry:
+                    self.vectors_path = self.storage_path / entry['vectors']
+                    continue
+                row = entry['row']
+                if entry.get('deleted'):
+                    if row < len(self.items) and self.items[row] is not None:
+                        self.by_ref.pop(self.items[row]['ref'], None)
+                        self.items[row] = None
+                        self.deleted += 1
+                    continue
+                self.items.append(entry)
+                self.by_ref[entry['ref']] = row
+
+    def _remove_stale_files(self):
+        """Matrices and logs left behind by a compaction that didn't finish (or just finished)"""
+        for path in self.storage_path.glob("vectors*.f32"):
+            if path != self.vectors_path:
+                path.unlink(missing_ok=True)
+        self.items_path.with_suffix('.jsonl.tmp').unlink(missing_ok=True)
+
+    def _open_matrix(self, capacity: int):
+        """(Re)map the vector file with room for `capacity` rows"""
+        needed = capacity * self.dim * 4
+        mode = 'r+b' if self.vectors_path.exists() else 'w+b'
+        with open(self.vectors_path, mode) as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() < needed:
+                f.truncate(needed)
+        self.matrix = np.memmap(self.vectors_path, dtype=np.float32, mode='r+',
+                                shape=(capacity, self.dim))
+        self.capacity = capacity
+        if len(self.live) < capacity:
+            grow = capacity - len(self.live)
+            self.live = np.concatenate([self.live, np.zeros(grow, dtype=bool)])
+            self.kind_codes = np.concatenate([self.kind_codes, np.zeros(grow, dtype=np.int32)])
+
+    def _mark_rows(self):
+        """Rebuild the live and kind masks from self.items"""
+        self.live[:] = False
+        for row, item in enumerate(self.items):
+            if item is not None:
+                self._mark(row, item['kind'])
+
+    def _mark(self, row: int, kind: str):
+        self.live[row] = True
+        self.kind_codes[row] = self._kind_ids.setdefault(kind, len(self._kind_ids))
+
+    def add(self, ref: str, vector: np.ndarray, kind: str = 'general',
+            text: str = '', payload: Any = None) -> int:
+        """Append a vector; re-adding a ref replaces the old row (compacting once enough rows are dead)"""
+        with self._lock:
+            if ref in self.by_ref:
+                self._tombstone(self.by_ref[ref])
+
+            row = len(self.items)
+            if row >= self.capacity:
+                self.matrix.flush()
+                self._open_matrix(self.capacity * 2)
+
+            # Vector first, then the log line that makes the row visible
+            self.matrix[row] = vector
+            self.matrix.flush()
+            entry = {'row': row, 'kind': kind, 'ref': ref, 'text': text[:500], 'payload': payload}
+            with open(self.items_path, 'a') as f:
+                f.write(json.dumps(entry, default=str) + '\n')
+
+            self.items.append(entry)
+            self.by_ref[ref] = row
+            self._mark(row, kind)
+            if self.deleted > self.compact_ratio * len(self.items):
+                self.compact()
+            return self.by_ref[ref]
+
+    def delete(self, ref: str) -> bool:
+        """Tombstone a ref; compacts once enough rows are dead"""
+        with self._lock:
+            row = self.by_ref.get(ref)
+            if row is None:
+                return False
+            self._tombstone(row)
+            if self.deleted > self.compact_ratio * len(self.items):
+                self.compact()
+            return True
+
+    def _tombstone(self, row: int):
+        item = self.items[row]
+        self.by_ref.pop(item['ref'], None)
+        self.items[row] = None
+        self.live[row] = False
+        self.deleted += 1
+        with open(self.items_path, 'a') as f:
+            f.write(json.dumps({'row': row, 'deleted': True}) + '\n')
+
+    def search(self, vector: np.ndarray, k: int = 5, kinds: Optional[List[str]] = None,
+               min_score: float = 0.0) -> List[Dict]:
+        """Cosine top-k over live rows (vectors are pre-normalized)"""
+        with self._lock:
+            count = len(self.items)
+            if count == 0:
+                return []
+
+            scores = np.asarray(self.matrix[:count] @ vector, dtype=np.float32)
+            live = self.live[:count]
+            if kinds is not None:
+                codes = [self._kind_ids[kind] for kind in kinds if kind in self._kind_ids]
+                live = live & np.isin(self.kind_codes[:count], codes)
+            scores[~live] = -np.inf
+
+            k = min(k, int(live.sum()))
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+
+            results = []
+            for row in top:
+                score = float(scores[row])
+                if score < min_score:
+                    break
+                item = self.items[row]
+                results.append({
+                    'kind': item['kind'],
+                    'ref': item['ref'],
+                    'text': item['text'],
+                    'payload': item.get('payload'),
+                    'score': round(score, 4)
+                })
+            return results
+
+    def compact(self):
+        """Rewrite both files with only the live rows"""
+        with self._lock:
+            live_rows = [row for row, item in enumerate(self.items) if item is not None]
+            capacity = max(len(live_rows) * 2, 1024)
+
+            generation = int(self.vectors_path.suffixes[0][1:]) + 1 if len(self.vectors_path.suffixes) > 1 else 1
+            new_vectors = self.storage_path / f"vectors.{generation}.f32"
+            tmp_items = self.items_path.with_suffix('.jsonl.tmp')
+            packed = np.memmap(new_vectors, dtype=np.float32, mode='w+', shape=(capacity, self.dim))
+            items = []
+            with open(tmp_items, 'w') as f:
+                f.write(json.dumps({'vectors': new_vectors.name}) + '\n')
+                for new_row, old_row in enumerate(live_rows):
+                    packed[new_row] = self.matrix[old_row]
+                    entry = dict(self.items[old_row], row=new_row)
+                    items.append(entry)
+                    f.write(json.dumps(entry, default=str) + '\n')
+            packed.flush()
+            del packed
+
+            del self.matrix
+            os.replace(tmp_items, self.items_path)  # the commit point: the log now names new_vectors
+            self.vectors_path.unlink(missing_ok=True)
+            self.vectors_path = new_vectors
+
+            self.items = items
+            self.by_ref = {entry['ref']: entry['row'] for entry in items}
+            self.deleted = 0
+            self.live = np.zeros(0, dtype=bool)
+            self.kind_codes = np.zeros(0, dtype=np.int32)
+            self._open_matrix(capacity)
+            self._mark_rows()
+
+    def __len__(self):
+        return len(self.items) - self.deleted
+
+
+class SemanticMemory:
+    """Embed-and-search layer used by AdvancedMemory"""
+
+    def __init__(self, storage_path: str = "memory/semantic", embedder=None):
+        self.embedder = embedder or HashingEmbedder()
+        self.index = VectorIndex(storage_path, dim=self.embedder.dim)
+
+    def remember(self, ref: str, text: str, kind: str = 'general', payload: Any = None):
+        """Embed text and store it under ref"""
+        if text and text.strip():
+            self.index.add(ref, self.embedder.embed(text), kind=kind, text=text, payload=payload)
+
+    def forget(self, ref: str) -> bool:
+        return self.index.delete(ref)
+
+    def search(self, query: str, k: int = 5, kinds: Optional[List[str]] = None,
+               min_score: float = 0.05) -> List[Dict]:
+        """Items most similar to the query"""
+        return self.index.search(self.embedder.embed(query), k=k, kinds=kinds, min_score=min_score)
@@ -9,6 +9,7 @@ from pathlib import Path
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from urllib.parse import parse_qs, urlparse
 import threading
+from datetime import datetime
 
 # Add project root to path
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -25,14 +26,17 @@ from core.logging_system import LoggingSystem
 from core.memory_system import AdvancedMemory
 from core.resource_monitor import get_monitor, get_controller
 from core.comprehensive_status import status_monitor as comprehensive_monitor
-from core.tool_executor import ToolExecutor
+from core.tool_executor import ToolExecutor, SpeculativeToolDispatcher
+from core.intent_router import get_fast_path_router
+from core.tool_cost_model import get_tool_cost_model
+from core.append_writer import get_append_writer
 from core.user_manager import user_manager
 from scripts.smart_parser import parse_tool_declarations, remove_tool_declarations
 from core.ai_protocol import get_system_prompt
 from tools import generate_tools_description
 from core.performance_optimization import (
-    OptimizedProjectContext, OptimizedWorkflowExecutor, 
-    get_cache, get_resource_manager
+    OptimizedWorkflowExecutor, get_cache, get_project_context,
+    get_resource_manager
 )
 
 # Initialize logging and memory
@@ -60,6 +64,38 @@ def get_cached_driver():
             print(f"⚠️ Failed to initialize driver: {e}")
     return _cached_driver, _cached_pm
 
+# Training export runs on a background thread; one job at a time
+_export_lock = threading.Lock()
+_export_job = {'status': 'idle'}
+
+def start_export_job(export_format='jsonl'):
+    """Start a training export unless one is already running"""
+    global _export_job
+    with _export_lock:
+        if _export_job['status'] == 'running':
+            return {'success': True, **_export_job}
+        _export_job = {
+            'status': 'running',
+            'started_at': datetime.now().isoformat(),
+            'export_path': str(logging_system.training_dir / "shards")
+        }
+    
+    def run():
+        global _export_job
+        try:
+            # threads, not processes: spawned workers would re-import this server
+            logging_system.export_for_training(export_format, processes=False)
+            result = {'status': 'done', 'stats': logging_system.last_export_stats}
+        except Exception as e:
+            print(f"❌ Training export failed: {e}")
+            result = {'status': 'failed', 'error': str(e)}
+        with _export_lock:
+            _export_job = {**_export_job, **result, 'finished_at': datetime.now().isoformat()}
+    
+    threading.Thread(target=run, name="training-export", daemon=True).start()
+    with _export_lock:
+        return {'success': True, **_export_job}
+
 class APIHandler(BaseHTTPRequestHandler):
     def do_OPTIONS(self):
         """Handle CORS preflight"""
@@ -81,6 +117,14 @@ class APIHandler(BaseHTTPRequestHandler):
             self.handle_get_resources()
         elif path == '/api/resources/settings':
             self.handle_get_settings()
+        elif path == '/api/router/stats':
+            self.handle_router_stats()
+        elif path == '/api/storage/stats':
+            self.handle_storage_stats()
+        elif path == '/api/tools/stats':
+            self.handle_tool_stats()
+        elif path == '/api/sessions/export/status':
+            self.handle_export_status()
         else:
             self.send_error(404)
     
@@ -287,6 +331,7 @@ class APIHandler(BaseHTTPRequestHandler):
         Handle chat requests with intelligent tool execution
         Supports normal, web, and commander modes
         """
+        dispatcher = None
         try:
             # Read request body
             content_length = int(self.headers['Content-Length'])
@@ -312,18 +357,22 @@ class APIHandler(BaseHTTPRequestHandler):
             
             print(f"💬 Chat [{mode}]: {message[:50]}...")
             
-            # Get driver
-            driver, pm = get_cached_driver()
-            if not driver:
-                self.send_error(500, "Driver not initialized")
-                return
-            
             # Create tool executor for this request
             tool_executor = ToolExecutor(
                 commander_mode=commander_mode,
                 web_search_mode=web_mode
             )
             
+            # Fast path: answer trivial requests without calling the model
+            if self.try_fast_path(message, mode, tool_executor, data.get('session_id') or 'default'):
+                return
+            
+            # Get driver
+            driver, pm = get_cached_driver()
+            if not driver:
+                self.send_error(500, "Driver not initialized")
+                return
+            
             # Generate tools description for system prompt
             tools_desc = generate_tools_description(
                 commander_mode=commander_mode,
@@ -333,8 +382,8 @@ class APIHandler(BaseHTTPRequestHandler):
             # Get system prompt with tools
             # Enhanced: Commander mode now includes full development capabilities with caching
             try:
-                # Use optimized project context with caching
-                opt_context = OptimizedProjectContext(str(PROJECT_ROOT))
+                # Watched project context: served from cache, rebuilt in the background on changes
+                opt_context = get_project_context(str(PROJECT_ROOT))
                 project_context = opt_context.get_ai_context() if commander_mode else ""
             except Exception as e:
                 logging_system.error(f"Failed to build optimized project context: {e}")
@@ -374,12 +423,37 @@ class APIHandler(BaseHTTPRequestHandler):
                 self.wfile.write(chunk.encode())
                 self.wfile.flush()
             
+            # Tool progress can arrive from worker threads, so serialize writes
+            stream_lock = threading.Lock()
+            
+            def send_tool_progress(tool_name, progress_message):
+                progress_chunk = json.dumps({
+                    "type": "tool_progress",
+                    "tool": tool_name,
+                    "message": progress_message
+                }) + "\n"
+                with stream_lock:
+                    try:
+                        self.wfile.write(progress_chunk.encode())
+                        self.wfile.flush()
+                    except (BrokenPipeError, ValueError):
+                        pass
+            
+            # Dispatch tools as soon as each </TOOLS> closes so their latency
+            # overlaps the rest of generation
+            dispatcher = SpeculativeToolDispatcher(
+                tool_executor,
+                parse_tool_declarations,
+                progress_callback=send_tool_progress
+            )
+            
             # Phase 1: Get AI response (may contain tool declarations)
             ai_response = ""
             full_response = ""  # Track complete response for frontend
             for token in driver.generate(chat_history, stream=True):
                 ai_response += token
                 # Don't stream raw tokens yet - wait to check for tools
+                dispatcher.feed(ai_response)
             
             # Phase 2: Check for tool declarations
             tool_declarations = parse_tool_declarations(ai_response)
@@ -392,16 +466,20 @@ class APIHandler(BaseHTTPRequestHandler):
                 if clean_ai_response.strip():
                     for char in clean_ai_response:
                         chunk = json.dumps({"type": "token", "token": char}) + "\n"
-                        try:
-                            self.wfile.write(chunk.encode())
-                            self.wfile.flush()
-                        except BrokenPipeError:
-                            # Client disconnected, stop streaming
-                            pass
+                        with stream_lock:
+                            try:
+                                self.wfile.write(chunk.encode())
+                                self.wfile.flush()
+                            except BrokenPipeError:
+                                # Client disconnected, stop streaming
+                                pass
                     full_response += clean_ai_response
                 
-                # Execute tools
-                tool_results = tool_executor.execute_tools(tool_declarations)
+                # Join speculative runs and execute whatever is left
+                tool_results = dispatcher.resolve(tool_declarations)
+                if dispatcher.dispatched:
+                    print(f"⚡ Speculative tools: {dispatcher.reused}/{dispatcher.dispatched} reused")
+                dispatcher.close()
                 
                 # Format results for user
                 user_results = tool_executor.format_for_user(tool_results)
@@ -415,7 +493,10 @@ class APIHandler(BaseHTTPRequestHandler):
                     full_response += f"\n{user_results}\n"
                 
                 # Phase 3: Give AI the tool results for final response
-                ai_results = tool_executor.format_results(tool_results)
+                ai_results = tool_executor.format_results(tool_results, query=message)
+                dropped = sum(stat['dropped_tokens'] for stat in tool_executor.last_format_stats)
+                if dropped:
+                    print(f"✂️ Trimmed ~{dropped} tokens of tool output from follow-up prompt")
                 
                 # Add tool results to history and ask AI to provide final answer
                 follow_up = f"""Previous AI response: {clean_ai_response}
@@ -490,6 +571,98 @@ Now provide a natural, helpful response based on the tool results above. Be conc
                 self.wfile.flush()
             except:
                 pass
+        finally:
+            # Drop any speculative tool runs the response never used
+            if dispatcher:
+                dispatcher.close()
+    
+    def try_fast_path(self, message, mode, tool_executor, session_key):
+        """
+        Answer trivially answerable requests (time, system/user info)
+        straight from a tool or known facts. Returns True when handled.
+        """
+        try:
+            pm = ProjectManager(str(PROJECT_ROOT))
+            config = pm.get_active_project_config()
+        except Exception:
+            config = {}
+        
+        router = get_fast_path_router()
+        try:
+            routed = router.route(
+                message, tool_executor,
+                context=get_context(session_key),
+                project_config=config
+            )
+        except Exception as e:
+            print(f"⚠️ Fast path failed, falling back to model: {e}")
+            return False
+        
+        if not routed:
+            return False
+        
+        source = "facts" if routed['from_facts'] else "tool"
+        print(f"⚡ Fast path [{routed['intent']}/{source}] - model skipped "
+              f"(fire rate {router.get_stats()['fire_rate']:.0%})")
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('X-Content-Type-Options', 'nosniff')
+        self.end_headers()
+        
+        answer = routed['answer']
+        token_chunk = json.dumps({"type": "token", "token": answer}) + "\n"
+        done_chunk = json.dumps({
+            "type": "done",
+            "full_response": answer,
+            "model": config.get('active_model_tag', 'unknown') if config else 'unknown',
+            "mode": mode,
+            "fast_path": routed['intent']
+        }) + "\n"
+        try:
+            self.wfile.write(token_chunk.encode())
+            self.wfile.write(done_chunk.encode())
+            self.wfile.flush()
+        except BrokenPipeError:
+            pass
+        return True
+    
+    def handle_router_stats(self):
+        """Get fast-path router statistics"""
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(json.dumps(get_fast_path_router().get_stats()).encode())
+        except Exception as e:
+            self.send_error(500, str(e))
+    
+    def handle_tool_stats(self):
+        """Get learned per-tool latency quantiles and failure rates"""
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(json.dumps(get_tool_cost_model().get_stats()).encode())
+        except Exception as e:
+            self.send_error(500, str(e))
+    
+    def handle_storage_stats(self):
+        """Get append writer queue depth and write latency, plus session archive size"""
+        try:
+            stats = get_append_writer().get_metrics()
+            stats['session_archive'] = logging_system.archive.get_stats()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(json.dumps(stats).encode())
+        except Exception as e:
+            self.send_error(500, str(e))
     
     def handle_commander_parse(self):
         """Parse natural language command (preview mode)"""
@@ -560,9 +733,7 @@ Now provide a natural, helpful response based on the tool results above. Be conc
     def handle_dev_analyze(self):
         """Analyze project for development context (with caching)"""
         try:
-            from core.performance_optimization import OptimizedProjectContext
-            
-            opt_context = OptimizedProjectContext(str(PROJECT_ROOT))
+            opt_context = get_project_context(str(PROJECT_ROOT))
             
             # Check if force refresh requested
             content_length = int(self.headers.get('Content-Length', 0))
@@ -572,8 +743,11 @@ Now provide a natural, helpful response based on the tool results above. Be conc
                 data = json.loads(body)
                 force_refresh = data.get('force_refresh', False)
             
-            context = opt_context.get_context(force_refresh=force_refresh)
-            ai_context = opt_context.get_ai_context(force_refresh=force_refresh)
+            if force_refresh:
+                context, ai_context = opt_context.refresh()
+            else:
+                context = opt_context.get_context()
+                ai_context = opt_context.get_ai_context()
             
             self.send_response(200)
             self.send_header('Content-Type', 'application/json')
@@ -757,23 +931,30 @@ Now provide a natural, helpful response based on the tool results above. Be conc
                 'user_id': user_id,
                 'user_name': user_name,
                 'model': active_model,
-                'started_at': logging_system.current_session['started_at']
+                'started_at': logging_system.get_session_log(session_id).session['started_at']
             }).encode())
             
         except Exception as e:
             self.send_json_error(str(e))
     
     def handle_save_session(self):
-        """Save current session"""
+        """Save a session, journaling any messages the client has that we don't"""
         try:
-            logging_system.save_session()
+            content_length = int(self.headers.get('Content-Length', 0))
+            data = json.loads(self.rfile.read(content_length)) if content_length else {}
+            session_id = data.get('session_id')
+            
+            added = 0
+            if session_id and data.get('messages'):
+                added = logging_system.sync_messages(session_id, data['messages'])
+            logging_system.save_session(session_id)
             
             self.send_response(200)
             self.send_header('Content-Type', 'application/json')
             self.send_header('Access-Control-Allow-Origin', '*')
             self.end_headers()
             
-            self.wfile.write(json.dumps({'success': True}).encode())
+            self.wfile.write(json.dumps({'success': True, 'messages_added': added}).encode())
             
         except Exception as e:
             self.send_json_error(str(e))
@@ -791,35 +972,25 @@ Now provide a natural, helpful response based on the tool results above. Be conc
                 limit = data.get('limit', 100)
                 offset = data.get('offset', 0)
             
-            sessions_dir = logging_system.base_path / "sessions"
             sessions = []
             
-            if sessions_dir.exists():
-                for month_dir in sorted(sessions_dir.iterdir(), reverse=True):
-                    if month_dir.is_dir():
-                        for session_file in sorted(month_dir.glob("*.json"), reverse=True):
-                            try:
-                                import json
-                                session_data = json.loads(session_file.read_text())
-                                messages = session_data.get('messages', [])
-                                
-                                # Get first user message for preview
-                                first_message = next((m['content'][:100] for m in messages if m['role'] == 'user'), '')
-                                
-                                sessions.append({
-                                    'session_id': session_data['session_id'],
-                                    'started_at': session_data['started_at'],
-                                    'last_updated': session_data.get('last_updated', session_data['started_at']),
-                                    'user_name': session_data.get('user_name', 'Unknown'),
-                                    'message_count': len(messages),
-                                    'total_messages': session_data.get('stats', {}).get('total_messages', len(messages)),
-                                    'user_messages': session_data.get('stats', {}).get('user_messages', 0),
-                                    'assistant_messages': session_data.get('stats', {}).get('assistant_messages', 0),
-                                    'preview': first_message,
-                                    'file_path': str(session_file)
-                                })
-                            except:
-                                continue
+            # Hot sessions, then archived ones straight from their month index
+            for summary in logging_system.iter_session_summaries():
+                try:
+                    sessions.append({
+                        'session_id': summary['session_id'],
+                        'started_at': summary['started_at'],
+                        'last_updated': summary['last_updated'],
+                        'user_name': summary['user_name'],
+                        'message_count': summary['message_count'],
+                        'total_messages': summary['stats']['total_messages'],
+                        'user_messages': summary['stats']['user_messages'],
+                        'assistant_messages': summary['stats']['assistant_messages'],
+                        'preview': summary['preview'],
+                        'file_path': summary['file_path']
+                    })
+                except:
+                    continue
             
             # Apply pagination
             total_sessions = len(sessions)
@@ -844,7 +1015,7 @@ Now provide a natural, helpful response based on the tool results above. Be conc
             self.send_json_error(str(e))
     
     def handle_load_session(self):
-        """Load a specific session"""
+        """Load a specific session, or one page of it (offset/limit or before/after)"""
         try:
             content_length = int(self.headers['Content-Length'])
             body = self.rfile.read(content_length)
@@ -855,23 +1026,18 @@ Now provide a natural, helpful response based on the tool results above. Be conc
                 self.send_json_error("No session_id provided")
                 return
             
-            # Find session file
-            sessions_dir = logging_system.base_path / "sessions"
-            session_file = None
-            
-            for month_dir in sessions_dir.iterdir():
-                if month_dir.is_dir():
-                    potential_file = month_dir / f"{session_id}.json"
-                    if potential_file.exists():
-                        session_file = potential_file
-                        break
-            
-            if not session_file:
+            page = {key: data.get(key) for key in ('offset', 'limit', 'before', 'after')}
+            if any(value is not None for value in page.values()):
+                # One page of messages via the journal's message offset index
+                page = {key: int(value) if value is not None else None for key, value in page.items()}
+                session_data = logging_system.load_session_page(session_id, **page)
+            else:
+                # Snapshot + journal tail, same shape as the old session JSON
+                session_data = logging_system.load_session(session_id)
+            if not session_data:
                 self.send_json_error("Session not found")
                 return
             
-            session_data = json.loads(session_file.read_text())
-            
             self.send_response(200)
             self.send_header('Content-Type', 'application/json')
             self.send_header('Access-Control-Allow-Origin', '*')
@@ -893,25 +1059,37 @@ Now provide a natural, helpful response based on the tool results above. Be conc
             session_id = data.get('session_id')
             
             if session_id:
-                # Export specific session
-                result = logging_system.export_session(session_id, export_format)
+                # Export specific session (one file, cheap enough inline)
+                response = {
+                    'success': True,
+                    'export_path': logging_system.export_session(session_id, export_format)
+                }
             else:
-                # Export all
-                result = logging_system.export_for_training(export_format)
+                # Export all in the background - never block the HTTP thread
+                response = start_export_job(export_format)
             
             self.send_response(200)
             self.send_header('Content-Type', 'application/json')
             self.send_header('Access-Control-Allow-Origin', '*')
             self.end_headers()
             
-            self.wfile.write(json.dumps({
-                'success': True,
-                'export_path': result
-            }).encode())
+            self.wfile.write(json.dumps(response).encode())
             
         except Exception as e:
             self.send_json_error(str(e))
     
+    def handle_export_status(self):
+        """Get state and throughput of the last training export"""
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            with _export_lock:
+                self.wfile.write(json.dumps(_export_job).encode())
+        except Exception as e:
+            self.send_error(500, str(e))
+    
     def handle_delete_session(self):
         """Delete a specific session"""
         try:
@@ -924,24 +1102,11 @@ Now provide a natural, helpful response based on the tool results above. Be conc
                 self.send_json_error("No session_id provided")
                 return
             
-            # Find and delete session file
-            sessions_dir = logging_system.base_path / "sessions"
-            session_file = None
-            
-            for month_dir in sessions_dir.iterdir():
-                if month_dir.is_dir():
-                    potential_file = month_dir / f"{session_id}.json"
-                    if potential_file.exists():
-                        session_file = potential_file
-                        break
-            
-            if not session_file:
+            # Delete the session's snapshot and journal
+            if not logging_system.delete_session(session_id):
                 self.send_json_error("Session not found")
                 return
             
-            # Delete the file
-            session_file.unlink()
-            
             self.send_response(200)
             self.send_header('Content-Type', 'application/json')
             self.send_header('Access-Control-Allow-Origin', '*')
@@ -1260,6 +1425,13 @@ Now provide a natural, helpful response based on the tool results above. Be conc
 def start_server(port=5174):
     """Start the API server"""
     server = HTTPServer(('0.0.0.0', port), APIHandler)
+    
+    # Compact old sessions into the monthly archives off the request path
+    threading.Thread(target=logging_system.archive_sessions, name="session-archive", daemon=True).start()
+    
+    # Start watching the project so commander-mode context is built before the first chat
+    get_project_context(str(PROJECT_ROOT))
+    
     print(f"🚀 API Server running on http://0.0.0.0:{port}")
     print(f"📡 Accessible from Windows at: http://localhost:{port}")
     print(f"📡 Endpoints:")
@@ -1279,7 +1451,7 @@ def start_server(port=5174):
     print(f"   GET  /api/resources/settings - Get performance settings")
     print(f"   POST /api/resources/switch - Switch CPU/GPU")
     print(f"   POST /api/resources/configure - Configure resources")
-    print(f"\n💾 Session Storage: memory/sessions/")
+    print(f"\n💾 Session Storage: memory/sessions/ (archived monthly to memory/session_archive/)")
     print(f"🧠 Memory System: Active")
     print(f"📊 Training Data: memory/training_data/")
     print(f"🎛️ Resource Monitoring: Active")
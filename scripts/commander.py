@@ -14,6 +14,11 @@ import platform
 from datetime import datetime
 from pathlib import Path
 
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.append_writer import get_append_writer
+
 # Detect if running in WSL
 IS_WSL = 'microsoft' in platform.uname().release.lower()
 
@@ -91,11 +96,9 @@ class Commander:
         if len(self.activity_log) > self.max_log_size:
             self.activity_log = self.activity_log[-self.max_log_size:]
         
-        # Also write to file
+        # Also write to file (batched on the shared writer thread)
         log_file = Path(__file__).parent.parent / "logs" / "commander_activity.log"
-        log_file.parent.mkdir(exist_ok=True)
-        with open(log_file, "a") as f:
-            f.write(json.dumps(entry) + "\n")
+        get_append_writer().append(log_file, entry)
     
     def is_safe_app(self, app_name):
         """Check if app is safe to interact with"""
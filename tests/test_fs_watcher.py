@@ -0,0 +1,80 @@
+import os
+import time
+
+# File: tests/test_fs_watcher.py
+# Description: Unit tests for core/fs_watcher.py module.
+# Dependencies: pytest
+# Links: core/fs_watcher.py
+
+import pytest
+
+from core.fs_watcher import ChangeDetector
+
+
+def _tree(root):
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / ".git").mkdir()
+    (root / "src" / "a.py").write_text("a = 1\n")
+    (root / "requirements.txt").write_text("requests\n")
+
+
+def _bump(path):
+    """Move a mtime forward so coarse-timestamp filesystems see the change"""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+
+
+def test_polling_reports_changed_directories_and_watched_files(tmp_path):
+    _tree(tmp_path)
+    detector = ChangeDetector(tmp_path, lambda changes: None, watch_files=["requirements.txt"], use_inotify=False)
+    detector._snapshot()
+    assert detector.poll() == {}
+
+    (tmp_path / "src" / "b.py").write_text("b = 2\n")
+    (tmp_path / "src" / "new" / "deep").mkdir(parents=True)
+    _bump(tmp_path / "src")
+    (tmp_path / ".git" / "HEAD").write_text("ref\n")
+    changes = detector.poll()
+    assert changes == {
+        str(tmp_path / "src"): 'changed',
+        str(tmp_path / "src" / "new"): 'created',
+        str(tmp_path / "src" / "new" / "deep"): 'created',
+    }
+
+    (tmp_path / "requirements.txt").write_text("requests\nflask\n")
+    _bump(tmp_path / "requirements.txt")
+    assert detector.poll() == {str(tmp_path / "requirements.txt"): 'modified'}
+
+    (tmp_path / "src" / "new" / "deep").rmdir()
+    (tmp_path / "src" / "new").rmdir()
+    _bump(tmp_path / "src")
+    changes = detector.poll()
+    assert changes[str(tmp_path / "src" / "new")] == 'deleted'
+    assert str(tmp_path / "src" / "new" / "deep") not in detector._dirs
+
+
+def test_inotify_reports_file_events(tmp_path):
+    _tree(tmp_path)
+    seen = set()
+    detector = ChangeDetector(tmp_path, lambda changes: seen.update(changes.items()))
+    if detector.start() != 'inotify':
+        pytest.skip("inotify not available")
+    try:
+        (tmp_path / "src" / "pkg" / "c.py").write_text("c = 3\n")
+        (tmp_path / "src" / "later").mkdir()
+        (tmp_path / ".git" / "index").write_text("x")
+        deadline = time.monotonic() + 5
+        while (str(tmp_path / "src" / "later"), 'created') not in seen and time.monotonic() < deadline:
+            time.sleep(0.02)
+        # New directories are watched too
+        (tmp_path / "src" / "later" / "d.py").write_text("d = 4\n")
+        (tmp_path / "src" / "a.py").write_text("a = 2\n")
+        while (str(tmp_path / "src" / "a.py"), 'modified') not in seen and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        detector.stop()
+
+    assert (str(tmp_path / "src" / "pkg" / "c.py"), 'created') in seen
+    assert (str(tmp_path / "src" / "later" / "d.py"), 'created') in seen
+    assert (str(tmp_path / "src" / "a.py"), 'modified') in seen
+    assert not any(".git" in path for path, _ in seen)
@@ -0,0 +1,104 @@
+import pytest
+
+# File: tests/test_intent_router.py
+# Description: Unit tests for core/intent_router.py module.
+# Dependencies: pytest
+# Links: core/intent_router.py, scripts/intent_parser.py
+
+from core.intent_router import FastPathRouter
+from core.reasoning import ContextMemory
+
+
+class RecordingExecutor:
+    """Stands in for ToolExecutor and records which tools ran."""
+
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+
+    def execute_tool(self, tool_name, params=None):
+        self.calls.append(tool_name)
+        return self.results[tool_name]
+
+
+@pytest.fixture
+def executor():
+    return RecordingExecutor({
+        'datetime': {'success': True, 'date': 'Monday, October 19, 2026',
+                     'time': '09:15 AM', 'timezone': 'UTC'},
+        'user_info': {'success': True, 'username': 'nova', 'home_dir': '/home/nova',
+                      'shell': '/bin/bash'},
+        'system_info': {'success': False, 'error': 'lscpu missing'},
+    })
+
+
+@pytest.mark.parametrize("message,intent", [
+    ("What time is it?", 'datetime'),
+    ("what's the date today", 'datetime'),
+    ("who am i", 'user_info'),
+    ("What's my username?", 'user_info'),
+    ("what is my system info", 'system_info'),
+])
+def test_classify_high_confidence(message, intent):
+    """Short, unambiguous questions map to a single tool."""
+    assert FastPathRouter().classify(message) == intent
+
+
+@pytest.mark.parametrize("message", [
+    "What time is it in Tokyo and who won the game?",
+    "write a function that prints what time it is",
+    "remind me of the date of the meeting",
+    "open steam",
+])
+def test_classify_rejects_ambiguous(message):
+    """Anything beyond the strict patterns goes to the model."""
+    assert FastPathRouter().classify(message) is None
+
+
+def test_route_runs_tool_and_records_facts(executor):
+    """Datetime answers come from a fresh tool run and land in the context."""
+    context = ContextMemory()
+    routed = FastPathRouter().route("what time is it?", executor, context=context)
+    assert routed['intent'] == 'datetime'
+    assert "09:15 AM" in routed['answer']
+    assert executor.calls == ['datetime']
+    assert context.facts['current_time'] == '09:15 AM'
+
+
+def test_route_answers_from_known_facts(executor):
+    """Known user facts skip the tool entirely."""
+    context = ContextMemory()
+    context.facts.update({'username': 'ada', 'home_dir': '/home/ada', 'shell': '/bin/zsh'})
+    router = FastPathRouter()
+    routed = router.route("who am i", executor, context=context)
+    assert routed['from_facts'] is True
+    assert "ada" in routed['answer']
+    assert executor.calls == []
+    assert router.get_stats()['from_facts'] == 1
+
+
+def test_route_falls_back_on_tool_failure(executor):
+    """A failing tool hands the request back to the model."""
+    router = FastPathRouter()
+    assert router.route("what is my system info", executor) is None
+    assert router.get_stats()['tool_failures'] == 1
+
+
+def test_route_respects_project_switch(executor):
+    """Projects can turn the fast path off."""
+    router = FastPathRouter()
+    config = {'fast_path': {'enabled': False}}
+    assert router.route("what time is it", executor, project_config=config) is None
+    assert executor.calls == []
+
+
+def test_stats_fire_rate(executor):
+    """Fire rate counts every routed request, fired or not."""
+    router = FastPathRouter()
+    router.route("what time is it", executor)
+    router.route("explain quicksort", executor)
+    stats = router.get_stats()
+    assert stats['requests'] == 2
+    assert stats['fired'] == 1
+    assert stats['by_intent']['datetime'] == 1
+    assert stats['fire_rate'] == 0.5
@@ -0,0 +1,464 @@
+import gzip
+import json
+
+import pytest
+
+# File: tests/test_logging_system.py
+# Description: Unit tests for core/logging_system.py module.
+# Dependencies: pytest
+# Links: core/logging_system.py, scripts/api_server.py
+
+import core.logging_system as logging_module
+from core.logging_system import LoggingSystem
+from core.session_archive import SessionArchive
+from core.training_export import TrainingExporter, parse_session
+
+
+@pytest.fixture
+def make_logger(tmp_path, monkeypatch):
+    """LoggingSystem factory that leaves pytest's signal handlers alone."""
+    monkeypatch.setattr(logging_module.signal, 'signal', lambda *args: None)
+    monkeypatch.setattr(logging_module.atexit, 'register', lambda *args: None)
+
+    def make(**kwargs):
+        return LoggingSystem(base_path=str(tmp_path / "memory"), **kwargs)
+    return make
+
+
+def test_messages_append_to_journal(make_logger):
+    """Each message is one appended line, not a rewrite of the session."""
+    logger = make_logger()
+    sid = logger.start_session("Ada", {'mode': 'chat'})
+    for i in range(20):
+        logger.log_message('user' if i % 2 == 0 else 'assistant', f"message {i}")
+    logger.writer.flush()
+
+    lines = logger.journal_file.read_text().splitlines()
+    assert len(lines) == 21
+    assert json.loads(lines[-1])['message']['content'] == "message 19"
+    # Tail is still small, so no snapshot was needed yet
+    assert not logger.session_file.exists()
+
+    loaded = make_logger().load_session(sid)
+    assert loaded['user_name'] == "Ada"
+    assert loaded['metadata'] == {'mode': 'chat'}
+    assert len(loaded['messages']) == 20
+    assert loaded['stats'] == {'total_messages': 20, 'user_messages': 10,
+                               'assistant_messages': 10, 'errors': 0}
+
+
+def test_snapshot_plus_tail_matches_live_session(make_logger):
+    """Loading replays only the journal past the latest snapshot."""
+    logger = make_logger(snapshot_min_bytes=512)
+    sid = logger.start_session()
+    for i in range(50):
+        logger.log_message('user', "x" * 40 + str(i))
+    logger.log_error('tool', 'boom')
+    logger.writer.flush()
+
+    snapshot = json.loads(logger.session_file.read_text())
+    assert 0 < snapshot['_journal_offset'] < logger.journal_file.stat().st_size
+
+    loaded = make_logger().load_session(sid)
+    expected = logger.load_session(sid)
+    assert loaded == expected
+    assert '_journal_offset' not in loaded
+    assert loaded['stats']['errors'] == 1
+
+
+def test_legacy_session_json_still_loads(make_logger):
+    """Whole-file sessions written before the journal still load and list."""
+    logger = make_logger()
+    legacy = {'session_id': 'abc123', 'user_name': 'Old', 'started_at': '2025-01-01T00:00:00',
+              'messages': [{'role': 'user', 'content': 'hi'}], 'stats': {}, 'errors': []}
+    day = logger.sessions_dir / "2025-01-01"
+    day.mkdir()
+    (day / "abc123.json").write_text(json.dumps(legacy, indent=2))
+
+    assert logger.load_session('abc123') == legacy
+    assert [s['session_id'] for s, _ in logger.iter_sessions()] == ['abc123']
+    assert logger.delete_session('abc123')
+    assert logger.load_session('abc123') is None
+
+
+def test_errors_go_through_group_commit_writer(make_logger):
+    """log_error appends to the daily errors file via the shared writer."""
+    logger = make_logger()
+    logger.log_error('tool', 'first')
+    logger.log_error('tool', 'second')
+    logger.writer.flush()
+
+    error_file = next(logger.errors_dir.glob("errors_*.jsonl"))
+    assert [json.loads(l)['message'] for l in error_file.read_text().splitlines()] == ['first', 'second']
+
+
+def _read_shards(shard_dir):
+    return [json.loads(line) for shard in sorted(shard_dir.glob("*.jsonl.gz"))
+            for line in gzip.open(shard, 'rt')]
+
+
+def test_training_export_is_incremental_and_deduplicated(make_logger):
+    """Second runs only pick up new sessions; duplicate chats are dropped."""
+    logger = make_logger()
+    chats = [
+        ("how do I reverse a list in python", "use reversed() or slicing with [::-1]"),
+        ("how do I reverse a list in python", "use reversed() or slicing with [::-1]"),
+        ("How do I reverse a list in Python?", "Use reversed() or slicing with [::-1]!"),
+        ("what is a docker volume", "persistent storage managed by docker"),
+    ]
+    for user, assistant in chats:
+        logger.start_session()
+        logger.log_message('user', user)
+        logger.log_message('assistant', assistant)
+    logger.save_session()
+
+    exporter = TrainingExporter(logger.sessions_dir, logger.training_dir, workers=1)
+    stats = exporter.export()
+    assert stats['sessions_new'] == 4
+    assert stats['exported'] == 2
+    assert stats['exact_duplicates'] + stats['near_duplicates'] == 2
+    assert len(_read_shards(exporter.shard_dir)) == 2
+
+    assert exporter.export()['sessions_new'] == 0
+
+    logger.start_session()
+    logger.log_message('user', "explain git rebase versus merge")
+    logger.save_session()
+    stats = exporter.export()
+    assert stats['sessions_new'] == 1 and stats['exported'] == 1
+    assert stats['shards'] == ['train-00001.jsonl.gz']
+    assert len(_read_shards(exporter.shard_dir)) == 3
+
+
+def test_grown_session_exports_only_new_turns(make_logger):
+    logger = make_logger()
+    sid = logger.start_session()
+    logger.log_message('user', 'what is a mutex')
+    logger.log_message('assistant', 'a lock that only one thread can hold at a time')
+    logger.save_session()
+    exporter = TrainingExporter(logger.sessions_dir, logger.training_dir, workers=1)
+    exporter.export()
+
+    logger.log_message('user', 'and a semaphore')
+    logger.log_message('assistant', 'a counter that lets up to n threads in')
+    logger.save_session()
+    stats = exporter.export()
+    assert stats['exported'] == 1 and stats['continued'] == 1
+    records = _read_shards(exporter.shard_dir)
+    assert len(records) == 2
+    assert records[1]['session_id'] == sid and records[1]['continues_from'] == 2
+    assert [m['content'] for m in records[1]['messages']] == [
+        'and a semaphore', 'a counter that lets up to n threads in']
+
+
+def test_threaded_export_matches_inline(make_logger):
+    logger = make_logger()
+    for i in range(6):
+        logger.start_session()
+        logger.log_message('user', f"question {i} about topic {i * 7919}")
+    logger.save_session()
+    stats = TrainingExporter(logger.sessions_dir, logger.training_dir, workers=3,
+                             pool_threshold=2, processes=False).export()
+    assert stats['workers'] == 3 and stats['exported'] == 6
+
+
+def test_shards_roll_over_at_size_bound(make_logger):
+    logger = make_logger()
+    for i in range(6):
+        logger.start_session()
+        logger.log_message('user', f"question {i} " + " ".join(f"w{i}_{j}" for j in range(300)))
+    logger.save_session()
+
+    stats = TrainingExporter(logger.sessions_dir, logger.training_dir,
+                             shard_bytes=1024, workers=1).export()
+    assert stats['exported'] == 6
+    assert len(stats['shards']) > 1
+
+
+def test_export_session_writes_single_file(make_logger):
+    logger = make_logger()
+    sid = logger.start_session()
+    logger.log_message('user', 'hello')
+    logger.log_message('system', 'ignored')
+    path = logger.export_session(sid)
+    assert json.loads(open(path).read()) == {'messages': [{'role': 'user', 'content': 'hello'}]}
+
+
+def test_concurrent_sessions_log_independently(make_logger):
+    """Each session id has its own log; threads never mix messages."""
+    import threading
+    logger = make_logger()
+    ids = [logger.start_session(f"user{i}") for i in range(4)]
+
+    def chat(sid):
+        for i in range(25):
+            logger.log_message('user', f"{sid}:{i}", session_id=sid)
+
+    threads = [threading.Thread(target=chat, args=(sid,)) for sid in ids]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for sid in ids:
+        loaded = make_logger().load_session(sid)
+        assert [m['content'] for m in loaded['messages']] == [f"{sid}:{i}" for i in range(25)]
+
+
+def test_resume_waits_for_eviction_save(make_logger):
+    import threading
+    logger = make_logger()
+    sid = logger.start_session()
+    logger.log_message('user', 'one', session_id=sid)
+    log = logger.sessions[sid]
+    release, saving = threading.Event(), threading.Event()
+    original = log.save
+
+    def slow_save():
+        saving.set()
+        release.wait(5)
+        return original()
+
+    log.save = slow_save
+    evictor = threading.Thread(target=logger.evict_idle, kwargs={'max_idle': 0})
+    evictor.start()
+    assert saving.wait(5)
+    resumed = []
+    resumer = threading.Thread(target=lambda: resumed.append(logger.get_session_log(sid)))
+    resumer.start()
+    resumer.join(0.2)
+    assert not resumed  # still waiting on the final save
+    release.set()
+    evictor.join(5)
+    resumer.join(5)
+    assert resumed[0] is not log
+    assert [m['content'] for m in resumed[0].session['messages']] == ['one']
+
+
+def test_idle_sessions_are_evicted_and_resumed(make_logger):
+    logger = make_logger(max_open=2)
+    first = logger.start_session()
+    logger.log_message('user', 'one', session_id=first)
+    assert logger.evict_idle(max_idle=0) == 1
+    assert first not in logger.sessions
+
+    logger.log_message('assistant', 'two', session_id=first)
+    assert first in logger.sessions
+    assert [m['content'] for m in make_logger().load_session(first)['messages']] == ['one', 'two']
+
+    for _ in range(3):
+        logger.start_session()
+    assert len(logger.sessions) <= 2
+
+    with pytest.raises(ValueError):
+        logger.log_message('user', 'lost', session_id='missing')
+
+
+def test_sync_messages_appends_only_new(make_logger):
+    logger = make_logger()
+    sid = logger.start_session()
+    client = [{'role': 'user', 'content': 'hi', 'timestamp': '2026-01-01T00:00:00'},
+              {'role': 'assistant', 'content': 'hello'}]
+    assert logger.sync_messages(sid, client) == 2
+    client.append({'role': 'user', 'content': 'bye'})
+    assert logger.sync_messages(sid, client) == 1
+    logger.save_session(sid)
+
+    loaded = make_logger().load_session(sid)
+    assert [m['content'] for m in loaded['messages']] == ['hi', 'hello', 'bye']
+    assert loaded['messages'][0]['timestamp'] == '2026-01-01T00:00:00'
+
+
+def test_session_pages_come_from_message_index(make_logger):
+    """Pages match slices of the full session, and the index follows appends."""
+    logger = make_logger(snapshot_min_bytes=256)
+    sid = logger.start_session("Ada")
+    for i in range(30):
+        logger.log_message('user' if i % 2 == 0 else 'assistant', f"m{i}")
+    logger.log_error('tool', 'boom')
+
+    full = logger.load_session(sid)
+    page = make_logger().load_session_page(sid, limit=5)
+    assert [m['content'] for m in page['messages']] == ['m25', 'm26', 'm27', 'm28', 'm29']
+    assert page['page'] == {'start': 25, 'end': 30, 'total_messages': 30,
+                            'has_more_before': True, 'has_more_after': False}
+    assert page['stats'] == full['stats']
+    assert page['user_name'] == 'Ada' and page['errors'] == full['errors']
+
+    assert logger.load_session_page(sid, offset=10, limit=3)['messages'] == full['messages'][10:13]
+    assert logger.load_session_page(sid, before=25, limit=5)['messages'] == full['messages'][20:25]
+    assert logger.load_session_page(sid, after=27)['messages'] == full['messages'][28:]
+
+    logger.log_message('user', 'late')
+    page = logger.load_session_page(sid, after=29)
+    assert [m['content'] for m in page['messages']] == ['late']
+    assert (logger.journal_file.with_suffix('.midx')).exists()
+
+
+def test_legacy_session_pages(make_logger):
+    logger = make_logger()
+    day = logger.sessions_dir / "2025-01-01"
+    day.mkdir()
+    legacy = {'session_id': 'old1', 'messages': [{'role': 'user', 'content': str(i)} for i in range(10)],
+              'stats': {'total_messages': 10, 'user_messages': 10, 'assistant_messages': 0, 'errors': 0}}
+    (day / "old1.json").write_text(json.dumps(legacy))
+
+    page = logger.load_session_page('old1', offset=8, limit=5)
+    assert [m['content'] for m in page['messages']] == ['8', '9']
+    assert page['page']['has_more_before'] and not page['page']['has_more_after']
+
+    # Resumed: the journal only holds what came after the conversion
+    logger.log_message('user', 'resumed', session_id='old1')
+    page = make_logger().load_session_page('old1', limit=3)
+    assert [m['content'] for m in page['messages']] == ['8', '9', 'resumed']
+    assert page['page']['total_messages'] == 11
+
+
+def _storage_footprint(*roots):
+    files = [p for root in roots if root.exists() for p in root.rglob("*")]
+    return len(files), sum(p.stat().st_size for p in files if p.is_file())
+
+
+def test_old_sessions_move_to_compressed_monthly_archive(make_logger):
+    """Archiving cuts bytes and inodes by 5x+ and reads stay transparent."""
+    logger = make_logger()
+    topics = ["python lists", "docker volumes", "git rebase", "sql joins", "rust lifetimes"]
+    for day in range(1, 21):
+        date_dir = logger.sessions_dir / f"2025-03-{day:02d}"
+        date_dir.mkdir()
+        for n in range(3):
+            sid = f"s{day:02d}{n}"
+            messages = [{'role': 'user' if i % 2 == 0 else 'assistant',
+                         'content': f"Question {i} about {topics[(day + i) % 5]}: how does it work in practice?",
+                         'timestamp': f"2025-03-{day:02d}T10:{i:02d}:00", 'metadata': {}}
+                        for i in range(12)]
+            session = {'session_id': sid, 'user_name': 'Ada', 'started_at': f"2025-03-{day:02d}T10:00:00",
+                       'messages': messages, 'errors': [],
+                       'stats': {'total_messages': 12, 'user_messages': 6, 'assistant_messages': 6, 'errors': 0}}
+            (date_dir / f"{sid}.json").write_text(json.dumps(session, indent=2))
+    live = logger.start_session()
+    logger.log_message('user', 'still here')
+
+    before = _storage_footprint(logger.sessions_dir)
+    original = logger.load_session('s050')
+    stats = logger.archive_sessions(older_than_days=30)
+    assert stats['sessions'] == 60
+    after = _storage_footprint(logger.sessions_dir, logger.archive.archive_dir)
+
+    assert before[0] >= 5 * after[0]
+    assert before[1] >= 5 * after[1]
+
+    assert logger.load_session('s050') == original
+    page = logger.load_session_page('s050', limit=2)
+    assert page['messages'] == original['messages'][-2:]
+    summaries = list(logger.iter_session_summaries())
+    assert summaries[0]['session_id'] == live
+    assert {s['session_id'] for s in summaries} >= {'s050', 's201'}
+    assert next(s for s in summaries if s['session_id'] == 's050')['preview'].startswith("Question 0")
+
+    stats = TrainingExporter(logger.sessions_dir, logger.training_dir, workers=1).export()
+    assert stats['sessions_new'] == 61
+    assert stats['empty'] == 0
+
+    assert logger.delete_session('s011')
+    assert logger.load_session('s011') is None
+    assert logger.load_session('s012') is not None
+
+    # Writing to an archived session brings it back to the hot tier
+    logger.log_message('user', 'follow-up', session_id='s050')
+    assert not logger.archive.contains('s050')
+    assert logger.load_session('s050')['messages'][-1]['content'] == 'follow-up'
+    page = logger.load_session_page('s050', offset=10, limit=5)
+    assert [m['content'] for m in page['messages']] == [
+        original['messages'][10]['content'], original['messages'][11]['content'], 'follow-up']
+    assert page['page']['total_messages'] == 13
+
+
+def test_session_resumed_during_archiving_stays_hot(make_logger):
+    logger = make_logger()
+    day = logger.sessions_dir / "2025-03-01"
+    day.mkdir()
+    for sid in ("a1", "a2"):
+        session = {'session_id': sid, 'started_at': '2025-03-01T10:00:00',
+                   'messages': [{'role': 'user', 'content': sid, 'timestamp': '2025-03-01T10:00:00'}],
+                   'errors': [], 'stats': {'total_messages': 1, 'user_messages': 1,
+                                           'assistant_messages': 0, 'errors': 0}}
+        (day / f"{sid}.json").write_text(json.dumps(session))
+    add = logger.archive.add
+
+    def add_then_resume(batch):
+        add(batch)
+        logger.log_message('user', 'back again', session_id='a1')
+
+    logger.archive.add = add_then_resume
+    assert logger.archive_sessions(older_than_days=30)['sessions'] == 1
+    assert not logger.archive.contains('a1') and logger.archive.contains('a2')
+    assert [m['content'] for m in logger.load_session('a1')['messages']] == ['a1', 'back again']
+
+
+def _archive_sessions(root, count):
+    archive = SessionArchive(root, block_bytes=512)
+    archive.add([(f"2025-03-{n % 28 + 1:02d}", {'session_id': f"s{n}", 'started_at': f"2025-03-01T10:{n:02d}:00",
+                  'messages': [{'role': 'user', 'content': f"question {n}"},
+                               {'role': 'assistant', 'content': f"answer {n}"}]})
+                 for n in range(count)])
+    archive.add([("2025-04-01", {'session_id': 'april', 'messages': [{'role': 'user', 'content': 'hi'}]})])
+    return archive
+
+
+def test_archive_remove_failure_keeps_the_month(tmp_path, monkeypatch):
+    """A repack that fails part way leaves the old archive and index in place."""
+    archive = _archive_sessions(tmp_path, 10)
+
+    def broken(self, path, index):
+        raise OSError("disk full")
+    monkeypatch.setattr(SessionArchive, '_write_index', broken)
+    with pytest.raises(OSError):
+        archive.remove('s3')
+    monkeypatch.undo()
+
+    reopened = SessionArchive(tmp_path)
+    assert all(reopened.get(f"s{n}")['messages'][1]['content'] == f"answer {n}" for n in range(10))
+
+    assert reopened.remove('s3')
+    assert SessionArchive(tmp_path).get('s3') is None
+    assert SessionArchive(tmp_path).get('s4')['session_id'] == 's4'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['2025-03.arc', '2025-03.idx.gz', '2025-04.arc', '2025-04.idx.gz']
+
+
+def test_archive_add_crash_before_index_save_is_not_duplicated(tmp_path, monkeypatch):
+    """Blocks written without their index are cut, so re-archiving doesn't duplicate them."""
+    archive = _archive_sessions(tmp_path, 10)
+    late = [("2025-03-20", {'session_id': 'late', 'messages': [{'role': 'user', 'content': 'late'}]})]
+
+    def crash(self, month, index):
+        raise OSError("power cut")
+    monkeypatch.setattr(SessionArchive, '_save_index', crash)
+    with pytest.raises(OSError):
+        archive.add(late)
+    monkeypatch.undo()
+
+    reopened = SessionArchive(tmp_path)
+    assert not reopened.contains('late')
+    reopened.add(late)
+    stored = [s['session_id'] for _, _, sessions in SessionArchive(tmp_path)._blocks('2025-03') for s in sessions]
+    assert sorted(stored) == sorted([f"s{n}" for n in range(10)] + ['late'])
+    assert SessionArchive(tmp_path).get('late')['messages'][0]['content'] == 'late'
+
+
+def test_parse_session_opens_each_archive_once(tmp_path, monkeypatch):
+    """Export workers reuse one archive and only load the session's month index."""
+    _archive_sessions(tmp_path, 10)
+    opened = []
+    original = SessionArchive.__init__
+
+    def counting(self, *args, **kwargs):
+        opened.append(args)
+        original(self, *args, **kwargs)
+    monkeypatch.setattr(SessionArchive, '__init__', counting)
+    monkeypatch.setattr(SessionArchive, '_location_map', lambda self: pytest.fail("loaded every month"))
+
+    location = str(tmp_path / "2025-03.arc")
+    parsed = [parse_session((location, f"s{n}")) for n in range(10)]
+    assert [p['messages'][1]['content'] for p in parsed] == [f"answer {n}" for n in range(10)]
+    assert len(opened) == 1
@@ -0,0 +1,319 @@
+import json
+import pickle
+import sqlite3
+
+import pytest
+
+# File: tests/test_memory_system.py
+# Description: Unit tests for core/memory_system.py module.
+# Dependencies: pytest
+# Links: core/memory_system.py
+
+from core.episode_archive import EpisodeArchive
+from core.memory_system import AdvancedMemory, EpisodicMemory, LongTermMemory, ShortTermMemory
+from core.vector_memory import HashingEmbedder, VectorIndex
+
+
+@pytest.fixture
+def long_term(tmp_path):
+    memory = LongTermMemory(str(tmp_path / "long_term.db"), flush_interval=60)
+    yield memory
+    memory.close()
+
+
+def test_store_and_recall_survive_reopen(tmp_path):
+    """Values are written per key and come back after a restart."""
+    path = str(tmp_path / "long_term.db")
+    memory = LongTermMemory(path)
+    memory.store('theme', {'name': 'dark'}, category='prefs')
+    memory.store('voice', True, category='prefs')
+    memory.forget('voice', category='prefs')
+    memory.close()
+
+    reopened = LongTermMemory(path)
+    assert reopened.recall('theme', category='prefs') == {'name': 'dark'}
+    assert reopened.recall('voice', category='prefs') is None
+    reopened.close()
+
+
+def test_recall_batches_access_counts(long_term, tmp_path):
+    """Recalls only touch disk when the access counters are flushed."""
+    long_term.store('k', 'v')
+    for _ in range(3):
+        long_term.recall('k')
+
+    db = sqlite3.connect(str(tmp_path / "long_term.db"))
+    count = lambda: db.execute("SELECT accessed_count FROM memories WHERE key = 'k'").fetchone()[0]
+    assert count() == 0
+
+    long_term.flush()
+    assert count() == 3
+    db.close()
+
+
+def test_migrates_legacy_pickle(tmp_path):
+    """An existing long_term.pkl is imported once and set aside."""
+    legacy = tmp_path / "long_term.pkl"
+    with open(legacy, 'wb') as f:
+        pickle.dump({'general': {'name': {
+            'value': 'Nova', 'stored_at': '2026-01-01T00:00:00', 'accessed_count': 4
+        }}}, f)
+
+    memory = LongTermMemory(str(legacy))
+    assert memory.storage_path.suffix == '.db'
+    assert memory.recall('name') == 'Nova'
+    assert memory.get_category('general')['name']['accessed_count'] == 5
+    assert not legacy.exists()
+    assert (tmp_path / "long_term.pkl.migrated").exists()
+    memory.close()
+
+
+def test_search_covers_archive_from_previous_runs(tmp_path):
+    """Episodes written before this process started are still searchable."""
+    archive = tmp_path / "episodic"
+    archive.mkdir()
+    old = {'conversation': [{'role': 'user', 'content': 'configure the flux capacitor'}],
+           'metadata': {'session_id': 'old'}, 'stored_at': '2025-01-05T10:00:00'}
+    (archive / "2025-01.jsonl").write_text(json.dumps(old) + "\n")
+
+    episodic = EpisodicMemory(str(archive))
+    episodic.store_episode({'conversation': [{'role': 'user', 'content': 'flux capacitor flux capacitor wiring'}],
+                            'metadata': {'session_id': 'new', 'mode': 'commander'}})
+    episodic.store_episode({'conversation': [{'role': 'user', 'content': 'unrelated chat'}],
+                            'metadata': {'session_id': 'new'}})
+
+    results = episodic.search_episodes("flux capacitor")
+    assert [r['metadata']['session_id'] for r in results] == ['new', 'old']
+    assert episodic.search_episodes("flux", until="2025-01-05")[0]['metadata']['session_id'] == 'old'
+    assert episodic.search_episodes("flux", since="2026-01-01", metadata={'mode': 'commander'})
+    assert episodic.search_episodes("flux", metadata={'session_id': 'missing'}) == []
+    episodic.index.close()
+
+
+def test_search_index_catches_up_incrementally(tmp_path):
+    """Reopening only indexes lines appended since the last sync."""
+    archive = tmp_path / "episodic"
+    episodic = EpisodicMemory(str(archive))
+    episodic.store_episode({'conversation': [{'role': 'user', 'content': 'first'}]})
+    episodic.writer.flush()
+    episodic.index.close()
+
+    with open(next(archive.glob("*.jsonl")), 'a') as f:
+        f.write(json.dumps({'conversation': [{'role': 'user', 'content': 'second'}],
+                            'stored_at': '2026-01-01T00:00:00'}) + "\n")
+
+    reopened = EpisodicMemory(str(archive))
+    assert reopened.index.count() == 2
+    assert len(reopened.search_episodes("second")) == 1
+    reopened.index.close()
+
+
+def test_search_index_does_not_skip_bytes_from_other_writers(tmp_path):
+    """An episode appended after another process's line leaves that line for sync()."""
+    archive = tmp_path / "episodic"
+    episodic = EpisodicMemory(str(archive))
+    episodic.store_episode({'conversation': [{'role': 'user', 'content': 'first'}]})
+    episodic.writer.flush()
+    path = next(archive.glob("*.jsonl"))
+
+    # Another process appends a line; ours lands after it
+    with open(path, 'a') as f:
+        f.write(json.dumps({'conversation': [{'role': 'user', 'content': 'foreign'}],
+                            'stored_at': '2026-01-01T00:00:00'}) + "\n")
+    episodic.store_episode({'conversation': [{'role': 'user', 'content': 'third'}]})
+    episodic.writer.flush()
+
+    assert len(episodic.search_episodes("foreign")) == 1
+    assert episodic.index.count() == 3
+    episodic.index.close()
+
+    reopened = EpisodicMemory(str(archive))
+    assert reopened.index.count() == 3
+    reopened.index.close()
+
+
+def test_vector_index_topk_tombstones_and_compaction(tmp_path):
+    """Deleted rows never come back and compaction keeps live rows searchable."""
+    embedder = HashingEmbedder(dim=64)
+    index = VectorIndex(str(tmp_path / "semantic"), dim=64, initial_capacity=2)
+    texts = {'a': "python list comprehension", 'b': "rust borrow checker",
+             'c': "python asyncio event loop", 'd': "cooking pasta"}
+    for ref, text in texts.items():
+        index.add(ref, embedder.embed(text), text=text)
+    assert index.capacity >= 4
+
+    hits = index.search(embedder.embed("python event loop"), k=2)
+    assert [h['ref'] for h in hits] == ['c', 'a']
+
+    index.delete('c')
+    index.delete('d')  # 2 of 4 dead -> compacts
+    assert index.deleted == 0 and len(index.items) == 2
+    assert [h['ref'] for h in index.search(embedder.embed("python event loop"), k=3)][0] == 'a'
+
+    reopened = VectorIndex(str(tmp_path / "semantic"), dim=64)
+    assert sorted(reopened.by_ref) == ['a', 'b']
+    assert reopened.search(embedder.embed("borrow checker"), k=1)[0]['ref'] == 'b'
+
+
+def test_vector_index_readding_refs_stays_bounded(tmp_path):
+    """Re-indexing the same refs compacts instead of growing the files forever."""
+    embedder = HashingEmbedder(dim=32)
+    index = VectorIndex(str(tmp_path / "semantic"), dim=32, initial_capacity=4)
+    for i in range(200):
+        index.add(f"fact:{i % 3}", embedder.embed(f"fact number {i}"), kind='fact', text=f"fact number {i}")
+    index.add('episode:1', embedder.embed("fact about an episode"), kind='episode')
+
+    assert len(index) == 4
+    assert len(index.items) <= 8
+    assert sum(1 for _ in open(tmp_path / "semantic" / "items.jsonl")) <= 16
+    assert {h['ref'] for h in index.search(embedder.embed("fact number"), k=10, kinds=['fact'])} == \
+        {'fact:0', 'fact:1', 'fact:2'}
+    assert [h['ref'] for h in index.search(embedder.embed("episode"), k=10, kinds=['episode'])] == ['episode:1']
+
+
+def test_vector_index_compaction_switches_files_atomically(tmp_path, monkeypatch):
+    """A compaction cut off before its commit leaves the old files usable, and one that commits cleans up."""
+    import core.vector_memory as vector_memory
+
+    embedder = HashingEmbedder(dim=32)
+    storage = tmp_path / "semantic"
+    index = VectorIndex(str(storage), dim=32, compact_ratio=10)
+    for ref, text in {'a': "alpha particle", 'b': "beta decay", 'c': "gamma ray"}.items():
+        index.add(ref, embedder.embed(text), text=text)
+    index.delete('a')
+
+    def crash(src, dst):
+        raise OSError("power cut")
+    monkeypatch.setattr(vector_memory.os, 'replace', crash)
+    with pytest.raises(OSError):
+        index.compact()
+    monkeypatch.undo()
+
+    reopened = VectorIndex(str(storage), dim=32)
+    assert reopened.search(embedder.embed("gamma ray"), k=1)[0]['ref'] == 'c'
+    assert sorted(p.name for p in storage.iterdir()) == ['items.jsonl', 'vectors.f32']
+
+    reopened.compact()
+    reopened.add('d', embedder.embed("delta wing"), text="delta wing")
+    again = VectorIndex(str(storage), dim=32)
+    assert [again.search(embedder.embed(text), k=1)[0]['ref'] for text in ("beta decay", "gamma ray", "delta wing")] \
+        == ['b', 'c', 'd']
+    assert sorted(p.name for p in storage.iterdir()) == ['items.jsonl', 'vectors.1.f32']
+
+
+def test_recall_similar_finds_facts_and_episodes(tmp_path, monkeypatch):
+    """AdvancedMemory recalls by meaning across facts and episodes."""
+    monkeypatch.chdir(tmp_path)
+    memory = AdvancedMemory()
+    memory.remember('editor', 'prefers neovim with a dark theme', 'long')
+    memory.save_episode([{'role': 'user', 'content': 'help me deploy the flask app to docker'}],
+                        {'session_id': 's1'})
+
+    assert memory.recall_similar("which editor theme", kinds=['fact'])[0]['payload']['key'] == 'editor'
+    episode = memory.recall_similar("docker deployment for flask", k=1, kinds=['episode'])[0]
+    assert episode['payload']['session_id'] == 's1'
+
+    memory.long_term.forget('editor')
+    assert memory.recall_similar("which editor theme", kinds=['fact']) == []
+    memory.episodic.writer.flush()  # before monkeypatch restores the working directory
+    memory.long_term.close()
+    memory.episodic.index.close()
+
+
+def test_short_term_window_and_counters():
+    """Recall is a dict hit and counters follow items out of the window."""
+    short = ShortTermMemory(capacity=3)
+    short.store('a', 1)
+    short.store('a', 2)
+    short.store('b', 3)
+    assert short.recall('a') == 2
+    assert short.counters['a'] == {'stores': 2, 'accesses': 1, 'last_used': short.counters['a']['last_used']}
+
+    short.store('c', 4)  # evicts the first 'a'
+    assert short.counters['a']['stores'] == 1
+    short.store('d', 5)  # evicts the last 'a'
+    assert short.recall('a') is None
+    assert 'a' not in short.counters
+    assert len(short.memory) == 3
+
+
+def test_consolidate_is_incremental_and_batched(tmp_path, monkeypatch):
+    """Only touched keys are scored and promotions land in one batch."""
+    monkeypatch.chdir(tmp_path)
+    memory = AdvancedMemory(consolidation_interval=None)
+    batches = []
+    original = memory.long_term.store_many
+    monkeypatch.setattr(memory.long_term, 'store_many',
+                        lambda items, category: (batches.append(list(items)), original(items, category)))
+
+    for _ in range(3):
+        memory.remember('project', 'novaforge')
+    memory.remember('once', 'rarely used')
+    memory.short_term.recall('favorite')  # unknown key, no effect
+    memory.remember('lang', 'python')
+    memory.recall('lang')
+    memory.recall('lang')
+
+    assert memory.consolidate() == 2
+    assert sorted(key for key, _ in batches[0]) == ['lang', 'project']
+    assert memory.long_term.recall('project', category='consolidated') == 'novaforge'
+
+    # Nothing touched since the last pass -> nothing to do
+    assert memory.consolidate() == 0
+    assert len(batches) == 1
+    memory.long_term.close()
+    memory.episodic.index.close()
+
+
+def test_consolidation_score_decays_with_idle_time(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    memory = AdvancedMemory(consolidation_interval=None, consolidation_half_life=100)
+    counter = {'stores': 4, 'accesses': 0, 'last_used': 1000.0}
+    assert memory.consolidation_score(counter, now=1000.0) == 4
+    assert memory.consolidation_score(counter, now=1100.0) == 2
+    memory.long_term.close()
+    memory.episodic.index.close()
+
+
+def test_recent_episodes_survive_restart(tmp_path):
+    """get_recent_episodes reads the archive tail, not just this process."""
+    archive = tmp_path / "episodic"
+    first = EpisodicMemory(str(archive))
+    for i in range(5):
+        first.store_episode({'conversation': [], 'metadata': {'session_id': f"s{i % 2}"}, 'n': i})
+    first.writer.flush()
+    first.index.close()
+
+    second = EpisodicMemory(str(archive))
+    assert second.episodes == []
+    assert [e['n'] for e in second.get_recent_episodes(3)] == [2, 3, 4]
+    assert [e['n'] for e in second.get_episodes_between(session_id='s1')] == [1, 3]
+    month = second.archive.months()[0]
+    assert second.archive.get(month, 0)['n'] == 0
+    assert second.archive.get(month, -1)['n'] == 4
+    second.index.close()
+
+
+def test_offset_index_date_range_and_catch_up(tmp_path):
+    """Sidecars catch up on foreign writes and date scans span months."""
+    archive = tmp_path / "episodic"
+    archive.mkdir()
+    rows = {
+        "2026-01.jsonl": ['2026-01-10T09:00:00', '2026-01-20T09:00:00'],
+        "2026-02.jsonl": ['2026-02-01T09:00:00', '2026-02-15T09:00:00'],
+    }
+    for name, stamps in rows.items():
+        (archive / name).write_text("".join(json.dumps({'stored_at': ts}) + "\n" for ts in stamps))
+
+    reader = EpisodeArchive(str(archive))
+    found = list(reader.scan(since='2026-01-15', until='2026-02-10'))
+    assert [e['stored_at'][:10] for e in found] == ['2026-01-20', '2026-02-01']
+    assert (archive / "2026-02.idx").exists()
+    # A bare-date upper bound includes that whole day, as in search_episodes
+    assert [e['stored_at'][:10] for e in reader.scan(until='2026-01-20')] == ['2026-01-10', '2026-01-20']
+
+    with open(archive / "2026-02.jsonl", 'a') as f:
+        f.write(json.dumps({'stored_at': '2026-02-20T09:00:00'}) + "\n")
+    assert reader.tail(1)[0]['stored_at'] == '2026-02-20T09:00:00'
+    assert reader.count() == 5
+    reader.close()
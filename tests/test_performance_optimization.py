@@ -0,0 +1,380 @@
+import os
+import time
+
+import pytest
+
+# File: tests/test_performance_optimization.py
+# Description: Unit tests for core/performance_optimization.py module.
+# Dependencies: pytest
+# Links: core/performance_optimization.py
+
+import core.performance_optimization as perf
+import core.project_context as project_context
+from core.performance_optimization import BatchOperationOptimizer, PerformanceCache
+
+
+@pytest.fixture
+def make_cache(tmp_path):
+    caches = []
+
+    def make(**kwargs):
+        cache = PerformanceCache(cache_dir=str(tmp_path / "cache"), **kwargs)
+        caches.append(cache)
+        return cache
+    yield make
+    for cache in caches:
+        cache.close()
+
+
+def test_memory_tier_is_byte_bounded_lru(make_cache):
+    cache = make_cache(max_memory_bytes=1000)
+    for i in range(10):
+        cache.set("file_analysis", f"f{i}", "x" * 200)
+    cache.get("file_analysis", "f6")  # refresh f6
+
+    cache.set("file_analysis", "f10", "x" * 200)
+    stats = cache.get_stats()
+    assert stats['memory_bytes'] <= 1000
+    assert "file_analysis:f6" in cache.memory_cache
+    assert "file_analysis:f0" not in cache.memory_cache
+    assert stats['by_type']['file_analysis']['evictions'] >= 6
+
+    # Evicted from memory, still served from disk
+    assert cache.get("file_analysis", "f0") == "x" * 200
+    assert cache.get_stats()['by_type']['file_analysis']['disk_hits'] == 1
+
+
+def test_single_file_backend_and_background_expiry(make_cache, tmp_path):
+    (tmp_path / "cache").mkdir()
+    (tmp_path / "cache" / "0123abcd.json").write_text("{}")  # old per-entry file
+    cache = make_cache(sweep_interval=0.05)
+    assert not list((tmp_path / "cache").glob("*.json"))
+
+    cache.set("git_status", "repo", {"clean": True}, ttl=0.1)
+    cache.set("project_context", "repo", {"files": 3})
+    time.sleep(0.3)
+    stats = cache.get_stats()
+    assert stats['disk_entries'] == 1
+    assert "git_status:repo" not in cache.memory_cache
+    assert cache.get("git_status", "repo") is None
+    assert cache.get_stats()['by_type']['git_status']['misses'] == 1
+
+
+def test_processes_share_and_see_each_others_changes(make_cache):
+    """Two cache instances on one file behave like two processes."""
+    server, cli = make_cache(), make_cache()
+    server.set("tool_results", "k", [1])
+    assert cli.get("tool_results", "k") == [1]
+
+    cli.set("tool_results", "k", [2])
+    assert server.get("tool_results", "k") == [2]
+
+    server.invalidate("tool_results")
+    assert cli.get("tool_results", "k") is None
+
+
+def test_stats_per_cache_type(make_cache):
+    cache = make_cache()
+    cache.set("workflow_results", "a", {"ok": True})
+    cache.get("workflow_results", "a")
+    cache.get("workflow_results", "missing")
+    by_type = cache.get_stats()['by_type']['workflow_results']
+    assert by_type['hits'] == 1 and by_type['misses'] == 1 and by_type['hit_rate'] == 0.5
+
+
+class CountingExecutor:
+    def __init__(self):
+        self.calls = []
+
+    def execute_tool(self, tool_name, params):
+        path = params['file_path']
+        self.calls.append((tool_name, path))
+        with open(path) as f:
+            return {'success': True, 'tool': tool_name, 'content': f.read()}
+
+
+@pytest.fixture
+def optimizer_factory(make_cache, monkeypatch):
+    monkeypatch.setattr(perf, '_global_cache', make_cache())
+
+    def make(**kwargs):
+        executor = CountingExecutor()
+        return BatchOperationOptimizer(executor, **kwargs), executor
+    return make
+
+
+def _write(path, text, mtime_ns):
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_unchanged_files_are_reused_and_changed_ones_recomputed(optimizer_factory, tmp_path):
+    optimizer, executor = optimizer_factory()
+    a, b = tmp_path / "a.py", tmp_path / "b.py"
+    old = time.time_ns() - 3600 * 10**9
+    _write(a, "x = 1\n", old)
+    _write(b, "y = 2\n", old)
+
+    first = optimizer.analyze_multiple_files([str(a), str(b)])
+    second = optimizer.analyze_multiple_files([str(a), str(b)])
+    assert first == second
+    assert len(executor.calls) == 2
+
+    _write(a, "x = 10\n", old + 10**9)
+    assert optimizer.analyze_multiple_files([str(a)])[str(a)]['content'] == "x = 10\n"
+    assert len(executor.calls) == 3
+
+    # A second optimizer (or process) reuses the same entries
+    other, other_executor = optimizer_factory()
+    other.check_multiple_syntax([str(b)])
+    other.check_multiple_syntax([str(b), "notes.txt"])
+    assert other_executor.calls == [('check_syntax', str(b))]
+
+
+def test_content_hash_fallback_survives_touch(optimizer_factory, tmp_path):
+    path = tmp_path / "c.py"
+    old = time.time_ns() - 3600 * 10**9
+    _write(path, "z = 3\n", old)
+
+    hashed, executor = optimizer_factory(use_content_hash=True)
+    hashed.analyze_multiple_files([str(path)])
+    os.utime(path, ns=(old + 5 * 10**9, old + 5 * 10**9))
+    hashed.analyze_multiple_files([str(path)])
+    assert len(executor.calls) == 1
+    assert hashed.analysis_cache.stats['hash_hits'] == 1
+
+    os.utime(path, ns=(old + 9 * 10**9, old + 9 * 10**9))
+    plain, plain_executor = optimizer_factory()
+    plain.analyze_multiple_files([str(path)])
+    assert len(plain_executor.calls) == 1
+
+
+def test_racy_entries_are_confirmed_by_hash(optimizer_factory, tmp_path):
+    """A same-size rewrite inside the same mtime tick is still detected."""
+    optimizer, executor = optimizer_factory()
+    path = tmp_path / "d.py"
+    now = time.time_ns()
+    _write(path, "a = 1\n", now)
+    optimizer.analyze_multiple_files([str(path)])
+
+    _write(path, "a = 2\n", now)
+    result = optimizer.analyze_multiple_files([str(path)])
+    assert result[str(path)]['content'] == "a = 2\n"
+    assert len(executor.calls) == 2
+
+
+def test_rewrite_during_analysis_is_not_cached_under_the_new_hash(make_cache, tmp_path):
+    """The hash of a racy file is taken before the analysis, not after."""
+    file_cache = perf.FileResultCache(make_cache(), "file_analysis")
+    path = tmp_path / "e.py"
+    now = time.time_ns()
+    _write(path, "b = 1\n", now)
+
+    cached, fingerprint = file_cache.lookup(str(path))
+    assert cached is None and fingerprint['sha256']
+    result = {'content': path.read_text()}
+    _write(path, "b = 2\n", now)  # rewritten before the result is stored, same stamp
+    file_cache.store(str(path), result, fingerprint)
+
+    assert file_cache.lookup(str(path))[0] is None
+
+
+class FakeController:
+    def __init__(self, cpu_threads, limiter=False, percent=100):
+        self.cpu_threads = cpu_threads
+        self.usage_limiter_enabled = limiter
+        self.percent = percent
+
+    def get_current_settings(self):
+        return {'actual_cpu_usage': self.percent}
+
+
+def test_worker_count_follows_controller_limits(monkeypatch):
+    monkeypatch.setattr(perf.os, 'sched_getaffinity', lambda pid: set(range(8)), raising=False)
+    assert perf.batch_worker_count() == 8
+    assert perf.batch_worker_count(FakeController(cpu_threads=4)) == 4
+    assert perf.batch_worker_count(FakeController(cpu_threads=16, limiter=True, percent=25)) == 2
+    assert perf.batch_worker_count(FakeController(cpu_threads=16), requested=3) == 3
+    assert perf.batch_worker_count(FakeController(cpu_threads=0)) == 1
+
+
+def test_process_pool_batch_matches_serial(optimizer_factory, tmp_path, monkeypatch):
+    files = []
+    for i in range(40):
+        path = tmp_path / f"m{i}.py"
+        path.write_text(f"def f{i}(x):\n    return x + {i}\n" + ("def broken(:\n" if i % 10 == 0 else ""))
+        files.append(str(path))
+
+    monkeypatch.setattr(perf, 'batch_worker_count', lambda controller=None, requested=None: 2)
+    optimizer, executor = optimizer_factory(controller=FakeController(2), pool_threshold=8, max_chunk=4)
+    streamed = list(optimizer.iter_file_results("check_syntax", files))
+    assert executor.calls == []
+    assert optimizer.last_batch_stats['workers'] == 2
+    assert sorted(path for path, _ in streamed) == sorted(files)
+    assert sum(not result['valid'] for _, result in streamed) == 4
+
+    # Second run is all cache hits, in-process
+    again = optimizer.check_multiple_syntax(files)
+    assert again == dict(streamed)
+    assert optimizer.last_batch_stats['cached'] == 40
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_watched_context_follows_the_tree(make_cache, tmp_path, monkeypatch, use_inotify):
+    cache = make_cache()
+    monkeypatch.setattr(perf, '_global_cache', cache)
+    monkeypatch.setattr(project_context, 'SNAPSHOT_DIR', tmp_path / "snapshots")
+    project = tmp_path / "project"
+    (project / "src").mkdir(parents=True)
+    for name in ("a.py", "b.py", "c.py"):
+        (project / "src" / name).write_text("x = 1\n")
+    (project / "requirements.txt").write_text("requests\n")
+
+    context = perf.OptimizedProjectContext(str(project), debounce=0.05)
+    backend = context.watch(use_inotify=use_inotify, poll_interval=0.05)
+    try:
+        if use_inotify and backend != 'inotify':
+            pytest.skip("inotify not available")
+        assert _wait_for(lambda: context.stats['rebuilds'] == 1)
+        assert context.get_context()['structure']['code_files'] == 3
+
+        # A content edit only drops that file's cached results
+        cached_path = str(project / "src" / "a.py")
+        cache.set("file_analysis", cached_path, {'result': 1})
+        (project / "src" / "a.py").write_text("x = 2\n")
+        if use_inotify:
+            assert _wait_for(lambda: cache.get("file_analysis", cached_path) is None)
+        time.sleep(0.2)
+        assert context.stats['invalidations'] == 0
+
+        (project / "src" / "d.py").write_text("y = 1\n")
+        assert _wait_for(lambda: context.get_context()['structure']['code_files'] == 4)
+
+        (project / "requirements.txt").write_text("requests\nflask\n")
+        os.utime(project / "requirements.txt", ns=(time.time_ns(), time.time_ns() + 10_000_000))
+        assert _wait_for(lambda: 'Flask' in context.get_context()['frameworks'])
+        assert 'Flask' in context.get_ai_context()
+        assert context.stats['invalidations'] >= 2
+    finally:
+        context.stop()
+
+
+def test_stale_snapshot_is_served_while_rebuilding(make_cache, tmp_path, monkeypatch):
+    monkeypatch.setattr(perf, '_global_cache', make_cache())
+    monkeypatch.setattr(project_context, 'SNAPSHOT_DIR', tmp_path / ".snapshots")
+    (tmp_path / "main.py").write_text("print('hi')\n")
+    context = perf.OptimizedProjectContext(str(tmp_path))
+    first = context.get_context()
+    context.invalidate()
+
+    from core.project_context import ProjectContextAnalyzer
+    original = ProjectContextAnalyzer.analyze_project
+
+    def slow(self):
+        time.sleep(0.3)
+        return original(self)
+    monkeypatch.setattr(ProjectContextAnalyzer, 'analyze_project', slow)
+
+    started = time.monotonic()
+    assert context.get_context() == first
+    assert time.monotonic() - started < 0.2
+    assert _wait_for(lambda: context.stats['rebuilds'] == 2)
+
+
+def test_concurrent_misses_compute_once(make_cache):
+    import threading
+
+    cache = make_cache()
+    calls = []
+
+    def analyze():
+        calls.append(1)
+        time.sleep(0.2)
+        return {'languages': ['Python']}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("project_context", "/p", analyze)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{'languages': ['Python']}] * 8
+    counters = cache.get_stats()['by_type']['project_context']
+    assert counters['fills'] == 1 and counters['coalesced'] == 7
+
+    # Failures reach every waiter and aren't cached
+    def broken():
+        time.sleep(0.1)
+        raise RuntimeError("boom")
+    errors = []
+
+    def call():
+        try:
+            cache.get_or_compute("workflow_results", "w", broken)
+        except RuntimeError as e:
+            errors.append(e)
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 3
+    assert cache.get("workflow_results", "w") is None
+
+
+def test_stale_value_is_served_while_one_refresh_runs(make_cache):
+    cache = make_cache()
+    cache.set("project_context", "/p", "old", ttl=-1)  # expired, but within the grace period
+    cache.set("git_status", "/p", "old", ttl=-1)       # no grace period
+    assert cache.get("project_context", "/p") is None
+
+    calls = []
+
+    def analyze():
+        calls.append(1)
+        time.sleep(0.2)
+        return "new"
+
+    started = time.monotonic()
+    assert cache.get_or_compute("project_context", "/p", analyze) == "old"
+    assert cache.get_or_compute("project_context", "/p", analyze) == "old"
+    assert time.monotonic() - started < 0.15
+    assert _wait_for(lambda: cache.get("project_context", "/p") == "new")
+    assert len(calls) == 1
+    assert cache.get_stats()['by_type']['project_context']['stale_hits'] == 2
+
+    # The sweeper keeps values inside their grace period
+    cache.set("project_context", "/q", "old", ttl=-1)
+    assert cache.sweep_expired() == 1
+    assert cache.get_or_compute("project_context", "/q", lambda: "new") == "old"
+    assert cache.get_or_compute("git_status", "/p", lambda: "new") == "new"
+
+
+def test_workflow_results_are_shared(make_cache, monkeypatch):
+    monkeypatch.setattr(perf, '_global_cache', make_cache())
+    runs = []
+
+    class FakeWorkflow:
+        def execute_workflow(self, name, params):
+            runs.append(name)
+            return {'success': True, 'workflow': name}
+
+    executor = perf.OptimizedWorkflowExecutor(None, ".")
+    executor.workflow = FakeWorkflow()
+    first = executor.execute_workflow("code_review", {'path': 'a.py'})
+    second = executor.execute_workflow("code_review", {'path': 'a.py'})
+    assert runs == ["code_review"]
+    assert first == {'success': True, 'workflow': 'code_review', 'from_cache': False}
+    assert second['from_cache'] is True
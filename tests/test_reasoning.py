@@ -0,0 +1,53 @@
+import gzip
+import json
+import pickle
+
+# File: tests/test_reasoning.py
+# Description: Unit tests for core/reasoning.py module.
+# Dependencies: pytest
+# Links: core/reasoning.py, scripts/api_server.py
+
+from core.reasoning import ContextMemory, ReasoningSessions
+
+
+def test_registry_spills_lru_and_reloads_lazily(tmp_path):
+    """Sessions past the cap are written out and come back on next access."""
+    registry = ReasoningSessions(max_sessions=2, state_dir=tmp_path)
+    for sid in ('a', 'b'):
+        context, reasoning, _ = registry.get(sid)
+        context.facts['owner'] = sid
+        reasoning.record_result('web_search', True, 1.5)
+
+    registry.get('a')       # 'b' is now least recently used
+    registry.get('c')
+    assert 'b' not in registry and len(registry) == 2
+    assert (tmp_path / "b.json.gz").exists()
+
+    context, reasoning, _ = registry.get('b')
+    assert context.facts == {'owner': 'b'}
+    assert reasoning.tool_avg_time == {'web_search': 1.5}
+    assert registry.get_stats()['spills'] == 2
+
+
+def test_registry_respects_memory_budget(tmp_path):
+    registry = ReasoningSessions(max_sessions=100, max_bytes=3000, state_dir=tmp_path, resize_every=1)
+    for i in range(10):
+        context = registry.get(f"s{i}")[0]
+        context.add_conversation_turn("q" * 500, "a" * 500, [])
+        registry.get(f"s{i}")
+    stats = registry.get_stats()
+    assert stats['resident_bytes'] <= 3000
+    assert stats['resident'] < 10
+    assert registry.get('s0')[0].conversation_history[0]['user'] == "q" * 500
+
+
+def test_legacy_pickle_is_migrated(tmp_path):
+    with open(tmp_path / "old.pkl", 'wb') as f:
+        pickle.dump({'facts': {'os': 'linux'}, 'tool_history': [], 'conversation_history': [],
+                     'user_preferences': {}}, f)
+
+    context = ContextMemory(session_dir=tmp_path)
+    assert context.load_session('old')['facts'] == {'os': 'linux'}
+    assert not (tmp_path / "old.pkl").exists()
+    with gzip.open(tmp_path / "old.json.gz", 'rt') as f:
+        assert json.load(f)['facts'] == {'os': 'linux'}
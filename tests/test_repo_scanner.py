@@ -0,0 +1,106 @@
+import os
+
+# File: tests/test_repo_scanner.py
+# Description: Unit tests for core/repo_scanner.py module.
+# Dependencies: pytest
+# Links: core/repo_scanner.py, tools/code/code_tools.py
+
+from core.repo_scanner import (
+    GitIgnore, LanguageVisitor, LineCountVisitor, RepoScanner, StructureVisitor, TodoVisitor, is_ignored, list_dir
+)
+from tools.code.code_tools import count_lines, find_todos
+
+
+def _project(root):
+    files = {
+        "app.py": "# TODO: split this\nx = 1\n\n",
+        "src/util.py": "def f():\n    return 1  # FIXME later\n",
+        "src/web/index.js": "// TODO wire up\nconst a = 1;\n",
+        "node_modules/lib/index.js": "// TODO not ours\n",
+        "target/out.py": "y = 2\n",
+        ".hidden/notes.md": "# TODO hidden\n",
+        "logs/run.log": "TODO: ignored by .gitignore\n",
+        "generated/keep.py": "z = 3\n",
+        "generated/skip.py": "# TODO generated\n",
+        ".gitignore": "logs/\ngenerated/*\n!generated/keep.py\n",
+    }
+    for name, text in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+
+def test_gitignore_rules():
+    ignore = GitIgnore('', ["# comment", "*.log", "/build/", "docs/**/*.tmp", "!keep.log", "a?c"])
+    assert ignore.match("x/y/err.log", False) is True
+    assert ignore.match("keep.log", False) is False
+    assert ignore.match("build", True) is True
+    assert ignore.match("build", False) is None       # directory-only pattern
+    assert ignore.match("src/build", True) is None    # anchored to the root
+    assert ignore.match("docs/a/b/x.tmp", False) is True
+    assert ignore.match("docs/x.tmp", False) is True
+    assert ignore.match("abc", False) is True
+
+    nested = GitIgnore('src', ["*.gen"])
+    assert is_ignored([ignore, nested], "src/a.gen", False)
+    assert not is_ignored([ignore, nested], "a.gen", False)
+
+
+def test_one_walk_feeds_every_visitor(tmp_path):
+    _project(tmp_path)
+    languages, structure, todos, lines = LanguageVisitor(), StructureVisitor(), TodoVisitor(), LineCountVisitor()
+    scanner = RepoScanner(tmp_path, [languages, structure, todos, lines], workers=1)
+    stats = scanner.scan()
+
+    # node_modules is skipped by every visitor, so never listed; target only by LanguageVisitor
+    assert stats['pruned'] == 1
+    assert stats['ignored'] == 2  # logs/ and generated/skip.py
+    assert languages.result()['Python'] == 3
+    assert "target" in structure.result()['directories']
+    assert sorted(todos.result()['todos']) == ["app.py", "src/util.py", "src/web/index.js"]
+    assert todos.result()['todos']["src/util.py"] == [{"line": 2, "tag": "FIXME", "message": "later"}]
+    counts = lines.result()
+    assert counts['by_extension']['.py'] == {"files": 4, "total_lines": 7, "blank_lines": 1, "code_lines": 6}
+    assert counts['total_files'] == 5
+
+
+def test_symlinked_directories_are_not_files_or_walked(tmp_path):
+    _project(tmp_path)
+    os.symlink(tmp_path / "src", tmp_path / "src_link")
+    os.symlink(tmp_path / "app.py", tmp_path / "app_link.py")
+    listing = list_dir(str(tmp_path), '', [StructureVisitor()], ())
+    names = {entry.name for entry in listing.files}
+    assert "app_link.py" in names and "src_link" not in names
+    assert "src_link" not in {name for name, _ in listing.children}
+
+    languages = LanguageVisitor()
+    RepoScanner(tmp_path, [languages], workers=1).scan()
+    assert languages.result()['Python'] == 4  # the linked file counts, the linked directory isn't walked
+
+
+def test_parallel_walk_matches_serial(tmp_path):
+    for i in range(40):
+        for j in range(5):
+            path = tmp_path / f"pkg{i}" / f"mod{j}.py"
+            path.parent.mkdir(exist_ok=True)
+            path.write_text(f"# TODO item {i}.{j}\n" + "x = 1\n" * j)
+
+    results = []
+    for workers in (1, 4):
+        structure, lines = StructureVisitor(), LineCountVisitor()
+        stats = RepoScanner(tmp_path, [structure, lines], workers=workers, parallel_after=5).scan()
+        results.append((structure.result(), lines.result()))
+        assert stats['workers'] == workers
+        assert stats['dirs'] == 41
+    assert results[0] == results[1]
+
+
+def test_code_tools_use_the_scanner(tmp_path):
+    _project(tmp_path)
+    todos = find_todos(str(tmp_path))
+    assert todos['success'] and todos['total_found'] == 3 and todos['file_count'] == 3
+    assert not todos['truncated']
+
+    lines = count_lines(str(tmp_path), extensions=['.js'])
+    assert lines['success'] and lines['total_files'] == 1 and lines['code_lines'] == 2
+    assert not count_lines(str(tmp_path / "missing"))['success']
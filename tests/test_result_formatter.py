@@ -0,0 +1,71 @@
+import pytest
+
+# File: tests/test_result_formatter.py
+# Description: Unit tests for core/result_formatter.py module.
+# Dependencies: pytest
+# Links: core/result_formatter.py, core/tool_executor.py
+
+from core.result_formatter import ResultFormatter, estimate_tokens
+from core.tool_cost_model import ToolCostModel
+from core.tool_executor import ToolExecutor
+
+
+def test_small_result_is_untouched():
+    """Results under budget keep every field and report nothing dropped."""
+    formatter = ResultFormatter(per_call_budget=200)
+    lines, stats = formatter.format_result(
+        {'success': True, 'tool': 'datetime', 'message': 'It is noon', 'date': '2026-01-01'}
+    )
+    assert lines == ['It is noon', 'date: 2026-01-01']
+    assert stats['dropped_tokens'] == 0
+
+
+def test_long_text_keeps_head_and_tail():
+    """Without a query, oversized text keeps its start and end."""
+    text = "HEAD " + ("filler " * 2000) + " TAIL"
+    formatter = ResultFormatter(per_call_budget=100)
+    lines, stats = formatter.format_result({'success': True, 'tool': 'read_file', 'content': text})
+    rendered = "\n".join(lines)
+    assert "HEAD" in rendered and "TAIL" in rendered
+    assert "chars omitted" in rendered
+    assert stats['dropped_tokens'] > 0
+    assert estimate_tokens(rendered) < 150
+
+
+def test_query_selects_relevant_passages():
+    """With a query, passages mentioning its terms are kept over the head."""
+    paragraphs = [f"Paragraph {i} talks about nothing much." * 5 for i in range(60)]
+    paragraphs[42] = "The flux capacitor requires 1.21 gigawatts."
+    text = "\n\n".join(paragraphs)
+    formatter = ResultFormatter(per_call_budget=80)
+    lines, _ = formatter.format_result(
+        {'success': True, 'tool': 'read_file', 'content': text},
+        query="what power does the flux capacitor need?"
+    )
+    rendered = "\n".join(lines)
+    assert "gigawatts" in rendered
+    assert "Paragraph 0 " not in rendered
+
+
+def test_long_lists_are_cut_with_count():
+    """Lists over budget keep leading items and say how many were dropped."""
+    processes = [{'pid': i, 'name': f'proc{i}'} for i in range(500)]
+    formatter = ResultFormatter(per_call_budget=100)
+    lines, stats = formatter.format_result(
+        {'success': True, 'tool': 'list_processes', 'processes': processes, 'count': 500}
+    )
+    assert lines[0] == 'count: 500'
+    assert "more]" in lines[1]
+    assert stats['dropped_tokens'] > 0
+
+
+def test_executor_records_format_stats():
+    """ToolExecutor.format_results exposes per-call stats for logging."""
+    executor = ToolExecutor(result_token_budget=50, cost_model=ToolCostModel(None))
+    out = executor.format_results([
+        {'success': True, 'tool': 'read_file', 'content': 'x' * 5000},
+        {'success': False, 'tool': 'open_app', 'error': 'PERMISSION_DENIED'},
+    ])
+    assert "✅ read_file:" in out
+    assert "❌ open_app FAILED:" in out
+    assert executor.last_format_stats[0]['dropped_tokens'] > 0
@@ -0,0 +1,162 @@
+import os
+import shutil
+import subprocess
+import time
+
+import pytest
+
+# File: tests/test_scan_snapshot.py
+# Description: Unit tests for core/scan_snapshot.py module.
+# Dependencies: pytest
+# Links: core/scan_snapshot.py, core/repo_scanner.py, core/project_context.py
+
+from core.project_context import ProjectContextAnalyzer
+from core.repo_scanner import LanguageVisitor, StructureVisitor, scan
+from core.scan_snapshot import ScanSnapshot
+
+
+def _write(root, files):
+    for name, text in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+
+def _age(root):
+    """Backdate every directory so its mtime is trusted by the snapshot"""
+    old = time.time() - 60
+    for dirpath, _, _ in os.walk(root):
+        os.utime(dirpath, (old, old))
+
+
+def _full(root):
+    languages, structure = LanguageVisitor(), StructureVisitor()
+    scan(root, [languages, structure])
+    return languages.result(), structure.result()
+
+
+def _incremental(root, path, **kwargs):
+    languages, structure = LanguageVisitor(), StructureVisitor()
+    stats = ScanSnapshot(root, [languages, structure], path, **kwargs).scan()
+    return (languages.result(), structure.result()), stats
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "project"
+    _write(root, {
+        "app.py": "x = 1\n",
+        "src/util.py": "y = 2\n",
+        "src/web/index.js": "const a = 1;\n",
+        "src/web/style.css": "a {}\n",
+        "docs/readme.md": "# Docs\n",
+        "node_modules/lib/index.js": "ignored\n",
+        "logs/run.py": "ignored by .gitignore\n",
+        ".gitignore": "logs/\n",
+    })
+    _age(root)
+    return root
+
+
+def test_rescan_relists_only_changed_directories(project, tmp_path):
+    path = tmp_path / "snapshot.json"
+    result, stats = _incremental(project, path)
+    assert stats['mode'] == 'full'
+    assert result == _full(project)
+
+    result, stats = _incremental(project, path)
+    assert stats['mode'] == 'mtime'
+    assert stats['relisted'] == 0
+    assert result == _full(project)
+
+    (project / "src" / "web" / "app.ts").write_text("let b = 2;\n")
+    (project / "app.py").write_text("x = 2\n")  # content only: no directory changes
+    result, stats = _incremental(project, path)
+    assert stats['relisted'] == 1
+    assert result == _full(project)
+    assert result[0]['TypeScript'] == 1
+
+
+def test_rescan_follows_added_removed_and_renamed_directories(project, tmp_path):
+    path = tmp_path / "snapshot.json"
+    _incremental(project, path)
+
+    _write(project, {"lib/core/engine.go": "package core\n", "lib/core/deep/x.rs": "fn main() {}\n"})
+    shutil.rmtree(project / "docs")
+    os.rename(project / "src" / "web", project / "src" / "site")
+    result, _ = _incremental(project, path)
+    assert result == _full(project)
+    assert result[0]['Go'] == 1 and result[0]['Rust'] == 1
+    assert 'Markdown' not in result[0]
+
+    shutil.rmtree(project / "lib" / "core" / "deep")
+    result, _ = _incremental(project, path)
+    assert result == _full(project)
+    assert 'Rust' not in result[0]
+
+
+def test_changed_gitignore_rescans_its_subtree(project, tmp_path):
+    path = tmp_path / "snapshot.json"
+    _incremental(project, path)
+
+    (project / ".gitignore").write_text("src/web/\n")
+    result, _ = _incremental(project, path)
+    assert result == _full(project)
+    assert 'Python' in result[0] and 'JavaScript' not in result[0]
+    assert result[0]['Python'] == 3  # app.py, src/util.py and the no longer ignored logs/run.py
+
+
+def test_snapshot_is_rebuilt_for_other_visitors(project, tmp_path):
+    path = tmp_path / "snapshot.json"
+    _incremental(project, path)
+    languages = LanguageVisitor()
+    stats = ScanSnapshot(project, [languages], path).scan()
+    assert stats['mode'] == 'full'
+    assert languages.result() == _full(project)[0]
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+def test_git_mode_follows_status_and_head(project, tmp_path):
+    def git(*args):
+        subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+                       cwd=project, check=True, capture_output=True)
+
+    git("init", "-q")
+    git("add", "-A")
+    git("commit", "-q", "-m", "initial")
+    _age(project)
+    path = tmp_path / "snapshot.json"
+    _incremental(project, path, use_git=True)
+
+    result, stats = _incremental(project, path, use_git=True)
+    assert stats['mode'] == 'git'
+    assert stats['checked'] == 0 and stats['relisted'] == 0
+
+    _write(project, {"pkg/mod/new.go": "package mod\n"})  # untracked, in a new directory
+    (project / "src" / "util.py").unlink()
+    result, stats = _incremental(project, path, use_git=True)
+    assert stats['mode'] == 'git'
+    assert result == _full(project)
+    assert result[0]['Go'] == 1 and result[0]['Python'] == 1
+
+    git("add", "-A")
+    git("commit", "-q", "-m", "second")
+    git("checkout", "-q", "HEAD~1")  # moves HEAD: files come back and go away without status entries
+    result, stats = _incremental(project, path, use_git=True)
+    assert stats['mode'] == 'git'
+    assert result == _full(project)
+    assert 'Go' not in result[0]
+
+
+def test_analyzer_uses_snapshot(project, tmp_path):
+    snapshots = tmp_path / "snapshots"
+    first = ProjectContextAnalyzer(str(project), snapshot_dir=str(snapshots)).analyze_project()
+    analyzer = ProjectContextAnalyzer(str(project), snapshot_dir=str(snapshots))
+    second = analyzer.analyze_project()
+    assert analyzer.scan_stats['mode'] == 'mtime'
+    assert analyzer.scan_stats['relisted'] == 0
+    assert second['languages'] == first['languages']
+    assert second['structure'] == first['structure']
+
+    full = ProjectContextAnalyzer(str(project), incremental=False).analyze_project()
+    assert full['languages'] == second['languages']
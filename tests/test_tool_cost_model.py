@@ -0,0 +1,70 @@
+import json
+import random
+
+# File: tests/test_tool_cost_model.py
+# Description: Unit tests for core/tool_cost_model.py module.
+# Dependencies: pytest
+# Links: core/tool_cost_model.py, core/tool_executor.py
+
+from core.tool_cost_model import QuantileSketch, ToolCostModel, param_class
+
+
+def test_sketch_quantiles_within_relative_error():
+    rng = random.Random(7)
+    values = sorted(rng.lognormvariate(0, 1) for _ in range(5000))
+    sketch = QuantileSketch()
+    for v in values:
+        sketch.add(v)
+    for q in (0.5, 0.9, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(sketch.quantile(q) - exact) / exact < 0.05
+    assert len(sketch.buckets) < 300
+
+
+def test_param_class_groups_by_shape():
+    assert param_class({'query': 'short', 'progress_callback': print}) == 'query'
+    assert param_class({'query': 'x' * 500}) == 'query+'
+    assert param_class(None) == '-'
+
+
+def test_timeout_needs_history_and_tracks_p99():
+    model = ToolCostModel(min_samples=10, min_timeout=0.1)
+    assert model.timeout('web_search') is None
+    for i in range(100):
+        model.record('web_search', {'query': 'q'}, 0.5 if i < 95 else 2.0, True)
+    assert 5.5 < model.timeout('web_search', {'query': 'q'}) < 6.5
+    assert 0.45 < model.estimate('web_search', {'query': 'q'}) < 0.55
+    assert model.estimate('unknown_tool', default=1.0) == 1.0
+
+
+def test_skip_after_failures_with_probe_and_recovery():
+    model = ToolCostModel(skip_after=3, retry_after=0)
+    for _ in range(10):
+        model.record('flaky', {}, 0.1, False)
+    # retry_after=0: every call is a probe
+    assert not model.should_skip('flaky', {})
+
+    model.retry_after = 3600
+    assert model.should_skip('flaky', {})
+    assert not model.should_skip('flaky', {'other': 1})  # different param class
+    model.record('flaky', {}, 0.1, True)
+    assert not model.should_skip('flaky', {})
+
+
+def test_model_persists_and_reloads(tmp_path):
+    path = tmp_path / "tool_costs.json"
+    model = ToolCostModel(path)
+    for _ in range(30):
+        model.record('datetime', None, 0.01, True)
+    model.save()
+    assert json.loads(path.read_text())['tools']['datetime']['successes'] == 30
+
+    reloaded = ToolCostModel(path)
+    assert reloaded.get_stats()['tools']['datetime']['runs'] == 30
+    assert reloaded.timeout('datetime') == reloaded.min_timeout
+
+
+def test_save_without_new_records_writes_nothing(tmp_path):
+    path = tmp_path / "tool_costs.json"
+    ToolCostModel(path).save()
+    assert not path.exists()
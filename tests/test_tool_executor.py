@@ -0,0 +1,343 @@
+import asyncio
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+# File: tests/test_tool_executor.py
+# Description: Unit tests for core/tool_executor.py module.
+# Dependencies: pytest
+# Links: core/tool_executor.py, tools/__init__.py
+
+import core.tool_executor as tool_executor_module
+from core.tool_cost_model import ToolCostModel
+from core.tool_executor import ToolExecutor, SpeculativeToolDispatcher
+from scripts.smart_parser import parse_tool_declarations
+from tools import TOOLS
+
+
+@pytest.fixture(autouse=True)
+def cost_model(monkeypatch):
+    """Fresh in-memory cost model so runs don't touch memory/tool_costs.json."""
+    model = ToolCostModel(None)
+    monkeypatch.setattr(tool_executor_module, 'get_tool_cost_model', lambda: model)
+    return model
+
+
+@pytest.fixture
+def fake_tools(monkeypatch):
+    """Registers a throwaway tool module and registry category for tests."""
+    module = types.ModuleType("fake_tool_module")
+
+    def echo(text="hi"):
+        return {'success': True, 'message': text}
+
+    def slow_search(query, progress_callback=None):
+        if progress_callback:
+            progress_callback(f"searching {query}")
+            progress_callback("done")
+        return {'success': True, 'message': f"results for {query}"}
+
+    async def async_wait(seconds=0.2):
+        await asyncio.sleep(seconds)
+        return {'success': True, 'message': f"waited {seconds}",
+                'thread': threading.current_thread().name}
+
+    async def async_fail():
+        raise ValueError("boom")
+
+    def blocking_wait(seconds=0.2):
+        time.sleep(seconds)
+        return {'success': True, 'message': f"blocked {seconds}",
+                'thread': threading.current_thread().name}
+
+    calls = []
+
+    def touch(name="x"):
+        calls.append(name)
+        return {'success': True, 'message': f"touched {name}"}
+
+    def peek(seconds=0.1):
+        time.sleep(seconds)
+        return {'success': True, 'message': 'peeked', 'seen': list(calls)}
+
+    module.calls = calls
+    module.touch = touch
+    module.peek = peek
+    module.echo = echo
+    module.slow_search = slow_search
+    module.async_wait = async_wait
+    module.async_fail = async_fail
+    module.blocking_wait = blocking_wait
+    monkeypatch.setitem(sys.modules, "fake_tool_module", module)
+    monkeypatch.setitem(TOOLS, "fake", {
+        "echo": {
+            "module": "fake_tool_module",
+            "function": "echo",
+            "description": "Echo text",
+            "params": {"text": "string"},
+            "requires_commander": False,
+        },
+        "slow_search": {
+            "module": "fake_tool_module",
+            "function": "slow_search",
+            "description": "Search with progress",
+            "params": {"query": "string"},
+            "requires_commander": False,
+            "supports_progress": True,
+        },
+        "touch": {
+            "module": "fake_tool_module",
+            "function": "touch",
+            "description": "Side-effecting tool",
+            "params": {"name": "string"},
+            "requires_commander": False,
+            "side_effects": True,
+        },
+        "peek": {
+            "module": "fake_tool_module",
+            "function": "peek",
+            "description": "Slow read of what touch wrote",
+            "params": {"seconds": "float"},
+            "requires_commander": False,
+        },
+        "async_wait": {
+            "module": "fake_tool_module",
+            "function": "async_wait",
+            "description": "Sleep asynchronously",
+            "params": {"seconds": "float"},
+            "requires_commander": False,
+        },
+        "async_fail": {
+            "module": "fake_tool_module",
+            "function": "async_fail",
+            "description": "Always raises",
+            "params": {},
+            "requires_commander": False,
+        },
+        "blocking_wait": {
+            "module": "fake_tool_module",
+            "function": "blocking_wait",
+            "description": "Sleep on the calling thread",
+            "params": {"seconds": "float"},
+            "requires_commander": False,
+        },
+    })
+    return module
+
+
+def test_execute_tool_not_found():
+    """Unknown tools report TOOL_NOT_FOUND instead of raising."""
+    executor = ToolExecutor()
+    result = executor.execute_tool("does_not_exist")
+    assert result['success'] is False
+    assert result['error'] == 'TOOL_NOT_FOUND'
+
+
+def test_progress_callback_forwarded(fake_tools):
+    """Tools declaring supports_progress receive a tool-tagged callback."""
+    executor = ToolExecutor()
+    events = []
+    result = executor.execute_tool(
+        "slow_search", {"query": "python"},
+        progress_callback=lambda tool, msg: events.append((tool, msg))
+    )
+    assert result['success'] is True
+    assert events == [("slow_search", "searching python"), ("slow_search", "done")]
+
+
+def test_progress_callback_not_passed_to_plain_tools(fake_tools):
+    """Tools without supports_progress never see a progress_callback kwarg."""
+    executor = ToolExecutor()
+    events = []
+    results = executor.execute_tools(
+        [{'tool': 'echo', 'params': {'text': 'hello'}},
+         {'tool': 'slow_search', 'params': {'query': 'x'}}],
+        progress_callback=lambda tool, msg: events.append(tool)
+    )
+    assert [r['success'] for r in results] == [True, True]
+    assert results[0]['message'] == 'hello'
+    assert events == ['slow_search', 'slow_search']
+
+
+def test_async_tool_runs_on_shared_loop(fake_tools):
+    """Coroutine tools run on the long-lived runtime thread, not a fresh loop."""
+    executor = ToolExecutor()
+    first = executor.execute_tool("async_wait", {"seconds": 0})
+    second = executor.execute_tool("async_wait", {"seconds": 0})
+    assert first['success'] is True
+    assert first['tool'] == "async_wait"
+    assert first['thread'] == second['thread'] == "novaforge-async-tools"
+
+
+def test_async_tool_error_is_reported(fake_tools):
+    """Exceptions raised inside coroutine tools become EXECUTION_ERROR results."""
+    result = ToolExecutor().execute_tool("async_fail")
+    assert result['success'] is False
+    assert result['error'] == 'EXECUTION_ERROR'
+    assert "boom" in result['message']
+
+
+def test_mixed_batch_keeps_order_and_overlaps(fake_tools):
+    """Async tools in a batch run concurrently and results keep declaration order."""
+    executor = ToolExecutor()
+    start = time.monotonic()
+    results = executor.execute_tools([
+        {'tool': 'async_wait', 'params': {'seconds': 0.3}},
+        {'tool': 'echo', 'params': {'text': 'sync'}},
+        {'tool': 'async_wait', 'params': {'seconds': 0.3}},
+    ])
+    elapsed = time.monotonic() - start
+    assert [r['tool'] for r in results] == ['async_wait', 'echo', 'async_wait']
+    assert all(r['success'] for r in results)
+    assert elapsed < 0.55
+
+
+def test_speculative_dispatch_on_closing_tag(fake_tools):
+    """Read-only tools start as soon as their </TOOLS> block closes."""
+    executor = ToolExecutor()
+    dispatcher = SpeculativeToolDispatcher(executor, parse_tool_declarations)
+    response = ""
+    for token in ['Let me check. <TO', 'OLS>echo(text="a")</TO', 'OLS> and more text']:
+        response += token
+        dispatcher.feed(response)
+    assert dispatcher.dispatched == 1
+
+    results = dispatcher.resolve(parse_tool_declarations(response))
+    dispatcher.close()
+    assert results[0]['message'] == 'a'
+    assert dispatcher.reused == 1
+
+
+def test_side_effect_tools_wait_for_final_parse(fake_tools):
+    """Side-effecting tools, and everything declared after them, only run once confirmed."""
+    executor = ToolExecutor()
+    dispatcher = SpeculativeToolDispatcher(executor, parse_tool_declarations)
+    response = '<TOOLS>echo(text="a")</TOOLS><TOOLS>touch(name="file")</TOOLS><TOOLS>echo(text="b")</TOOLS>'
+    dispatcher.feed(response)
+    assert fake_tools.calls == []
+    assert dispatcher.dispatched == 1
+
+    results = dispatcher.resolve(parse_tool_declarations(response))
+    dispatcher.close()
+    assert fake_tools.calls == ['file']
+    assert [r['tool'] for r in results] == ['echo', 'touch', 'echo']
+    assert dispatcher.reused == 1
+
+
+def test_speculative_read_finishes_before_the_write_after_it(fake_tools):
+    """A slow speculative read declared before a write doesn't see that write."""
+    executor = ToolExecutor()
+    dispatcher = SpeculativeToolDispatcher(executor, parse_tool_declarations)
+    response = '<TOOLS>peek(seconds=0.3)</TOOLS><TOOLS>touch(name="late")</TOOLS>'
+    dispatcher.feed(response)
+    assert dispatcher.dispatched == 1
+
+    results = dispatcher.resolve(parse_tool_declarations(response))
+    dispatcher.close()
+    assert dispatcher.reused == 1
+    assert results[0]['seen'] == []
+    assert fake_tools.calls == ['late']
+
+
+def test_unconfirmed_speculation_is_discarded(fake_tools):
+    """Speculative results the final parse does not request are dropped."""
+    executor = ToolExecutor()
+    dispatcher = SpeculativeToolDispatcher(executor, parse_tool_declarations)
+    dispatcher.feed('<TOOLS>echo(text="early")</TOOLS>')
+    results = dispatcher.resolve([{'tool': 'echo', 'params': {'text': 'final'}}])
+    dispatcher.close()
+    assert results[0]['message'] == 'final'
+    assert dispatcher.reused == 0
+
+
+def test_slow_read_only_sync_tools_run_in_parallel(fake_tools):
+    """Read-only sync tools overlap in the pool; side-effect tools stay inline."""
+    results = ToolExecutor().execute_tools([
+        {'tool': 'blocking_wait', 'params': {'seconds': 0.3}},
+        {'tool': 'blocking_wait', 'params': {'seconds': 0.3}},
+        {'tool': 'touch', 'params': {'name': 'a'}},
+    ])
+    assert [r['tool'] for r in results] == ['blocking_wait', 'blocking_wait', 'touch']
+    assert all(r['thread'].startswith('tool-batch') for r in results[:2])
+    assert fake_tools.calls == ['a']
+
+
+def test_runs_feed_the_cost_model(fake_tools, cost_model):
+    executor = ToolExecutor()
+    executor.execute_tool('echo', {'text': 'x'})
+    executor.execute_tools([{'tool': 'async_fail', 'params': {}}, {'tool': 'async_wait', 'params': {'seconds': 0.05}}])
+    time.sleep(0.05)
+    stats = cost_model.get_stats()['tools']
+    assert stats['echo']['runs'] == 1
+    assert stats['async_fail']['consecutive_failures'] == 1
+    assert stats['async_wait']['p50'] >= 0.04
+
+
+def test_adaptive_timeout_cuts_off_slow_runs(fake_tools, cost_model):
+    cost_model.min_timeout = 0.05
+    for tool, seconds in (('async_wait', 0.02), ('blocking_wait', 0.06)):  # slow enough for the pool
+        for _ in range(cost_model.min_samples):
+            cost_model.record(tool, {'seconds': 1}, seconds, True)
+    start = time.monotonic()
+    results = ToolExecutor().execute_tools([
+        {'tool': 'async_wait', 'params': {'seconds': 1}},
+        {'tool': 'blocking_wait', 'params': {'seconds': 1}},
+        {'tool': 'echo', 'params': {}},
+    ])
+    assert results[0]['error'] == results[1]['error'] == 'TIMEOUT'
+    assert 'cancelled' in results[0]['message']
+    assert 'still running' in results[1]['message']  # a pool thread can't be stopped
+    assert results[2]['success']
+    assert time.monotonic() - start < 0.5
+
+    # A cancelled run is a failure sample at the limit
+    stats = cost_model.get_stats()['tools']
+    assert stats['async_wait']['consecutive_failures'] == 1
+    assert stats['async_wait']['runs'] == cost_model.min_samples + 1
+
+    # One that kept running is recorded once, when it completes
+    assert stats['blocking_wait']['runs'] == cost_model.min_samples
+    deadline = time.monotonic() + 3
+    while cost_model.get_stats()['tools']['blocking_wait']['runs'] == cost_model.min_samples \
+            and time.monotonic() < deadline:
+        time.sleep(0.05)
+    time.sleep(0.05)
+    stats = cost_model.get_stats()['tools']['blocking_wait']
+    assert stats['runs'] == cost_model.min_samples + 1
+    assert stats['consecutive_failures'] == 0
+
+
+def test_batch_keeps_read_write_order(fake_tools):
+    """Reads see the writes declared before them, and not the ones after."""
+    results = ToolExecutor().execute_tools([
+        {'tool': 'peek', 'params': {'seconds': 0.2}},
+        {'tool': 'touch', 'params': {'name': 'a'}},
+        {'tool': 'peek', 'params': {'seconds': 0.1}},
+        {'tool': 'peek', 'params': {'seconds': 0.1}},
+        {'tool': 'touch', 'params': {'name': 'b'}},
+        {'tool': 'peek', 'params': {'seconds': 0.1}},
+    ])
+    assert [r.get('seen') for r in results] == [[], None, ['a'], ['a'], None, ['a', 'b']]
+
+
+def test_read_after_create_sees_the_file(tmp_path):
+    path = str(tmp_path / "notes.txt")
+    executor = ToolExecutor(commander_mode=True, cost_model=ToolCostModel(None))
+    for _ in range(20):
+        results = executor.execute_tools([
+            {'tool': 'create_file_with_content', 'params': {'path': path, 'content': 'hello'}},
+            {'tool': 'read_file', 'params': {'path': path}},
+        ])
+        assert results[1]['success'], results[1]
+        (tmp_path / "notes.txt").unlink()
+
+
+def test_chronically_failing_tool_is_skipped(fake_tools, cost_model):
+    executor = ToolExecutor()
+    for _ in range(cost_model.skip_after + 3):
+        executor.execute_tools([{'tool': 'async_fail', 'params': {}}])
+    time.sleep(0.05)
+    assert executor.execute_tool('async_fail')['error'] == 'TOOL_SKIPPED'
@@ -36,6 +36,7 @@ TOOLS = {
             "description": "Capture a screenshot of the screen",
             "params": {},
             "requires_commander": True,
+            "side_effects": True,  # Never run speculatively
             "requires_verification": False
         },
         "open_app": {
@@ -44,6 +45,7 @@ TOOLS = {
             "description": "Open a desktop application",
             "params": {"app": "string"},
             "requires_commander": True,
+            "side_effects": True,  # Never run speculatively
             "requires_verification": False
         },
         "close_app": {
@@ -52,6 +54,7 @@ TOOLS = {
             "description": "Close a running application",
             "params": {"app": "string"},
             "requires_commander": True,
+            "side_effects": True,  # Never run speculatively
             "requires_verification": False
         },
         "check_app": {
@@ -86,6 +89,7 @@ TOOLS = {
             "description": "Open a URL in the browser",
             "params": {"url": "string"},
             "requires_commander": False,
+            "side_effects": True,  # Never run speculatively
             "requires_verification": False
         },
         "web_search": {
@@ -95,6 +99,7 @@ TOOLS = {
             "params": {"query": "string", "max_results": "int"},
             "requires_commander": False,
             "requires_web": True,
+            "supports_progress": True,  # Accepts progress_callback for live updates
             "requires_verification": True  # Web results need verification
         },
         "deep_research": {
@@ -104,6 +109,7 @@ TOOLS = {
             "params": {"query": "string", "max_results": "int", "scrape_top": "int"},
             "requires_commander": False,
             "requires_web": True,
+            "supports_progress": True,  # Accepts progress_callback for live updates
             "requires_verification": True
         },
         "fact_check": {
@@ -113,6 +119,25 @@ TOOLS = {
             "params": {"claim": "string"},
             "requires_commander": False,
             "requires_web": True,
+            "supports_progress": True,  # Accepts progress_callback for live updates
+            "requires_verification": True
+        },
+        "multi_search": {
+            "module": "tools.web.multi_search",
+            "function": "search",  # async - runs on the shared event loop
+            "description": "🔎 MULTI SEARCH: Query Grokipedia, Google, DuckDuckGo and Wikipedia concurrently and return the combined content with an overall confidence score.",
+            "params": {"query": "string"},
+            "requires_commander": False,
+            "requires_web": True,
+            "requires_verification": True
+        },
+        "grokipedia_search": {
+            "module": "tools.web.grokipedia_js",
+            "function": "grokipedia_search_async",  # async - runs on the shared event loop
+            "description": "🌟 GROKIPEDIA: Render and read a Grokipedia article directly (JavaScript-rendered). Falls back to related articles when there is no exact match.",
+            "params": {"query": "string"},
+            "requires_commander": False,
+            "requires_web": True,
             "requires_verification": True
         },
         "scrape_webpage": {
@@ -141,6 +166,7 @@ TOOLS = {
             "description": "Move the mouse cursor to coordinates",
             "params": {"x": "int", "y": "int"},
             "requires_commander": True,
+            "side_effects": True,  # Never run speculatively
             "requires_verification": False
         },
         "mouse_click": {
@@ -149,6 +175,7 @@ TOOLS = {
             "description": "Click the mouse button",
             "params": {"button": "string", "double": "bool"},
             "requires_commander": True,
+            "side_effects": True,  # Never run speculatively
             "requires_verification": False
         },
         "keyboard_type": {
@@ -157,6 +184,7 @@ TOOLS = {
             "description": "Type text using keyboard",
             "params": {"text": "string"},
             "requires_commander": True,
+            "side_effects": True,  # Never run speculatively
             "requires_verification": False
         },
         "keyboard_press": {
@@ -165,6 +193,7 @@ TOOLS = {
             "description": "Press a special key",
             "params": {"key": "string"},
             "requires_commander": True,
+            "side_effects": True,  # Never run speculatively
             "requires_verification": False
         }
     },
@@ -183,6 +212,7 @@ TOOLS = {
             "description": "✍️ WRITE FILE: Write or create a file with content. Creates directories if needed.",
             "params": {"path": "string", "content": "string"},
             "requires_commander": True,  # Writing requires permission
+            "side_effects": True,  # Never run speculatively
             "requires_verification": True
         },
         "list_files": {
@@ -235,6 +265,7 @@ TOOLS = {
             "description": "📁 CREATE DIRECTORY: Create a directory anywhere on the system. Full PC access like Copilot.",
             "params": {"path": "string", "parents": "bool"},
             "requires_commander": True,
+            "side_effects": True,  # Never run speculatively
             "requires_verification": False
         },
         "create_file_with_content": {
@@ -243,6 +274,7 @@ TOOLS = {
             "description": "📝 CREATE FILE: Create a file with content anywhere on the system. Full PC access.",
             "params": {"path": "string", "content": "string", "overwrite": "bool"},
             "requires_commander": True,
+            "side_effects": True,  # Never run speculatively
             "requires_verification": False
         },
         "create_project_structure": {
@@ -251,6 +283,7 @@ TOOLS = {
             "description": "🏗️ CREATE PROJECT: Create entire project structure from specification. Like Copilot - create full project layouts anywhere.",
             "params": {"base_path": "string", "structure": "dict"},
             "requires_commander": True,
+            "side_effects": True,  # Never run speculatively
             "requires_verification": True
         },
         "get_current_directory": {
@@ -267,6 +300,7 @@ TOOLS = {
             "description": "📂 CHANGE DIR: Change current working directory.",
             "params": {"path": "string"},
             "requires_commander": True,
+            "side_effects": True,  # Never run speculatively
             "requires_verification": False
         },
         "create_project_from_template": {
@@ -275,6 +309,7 @@ TOOLS = {
             "description": "🎨 CREATE FROM TEMPLATE: Create complete project from template (python-cli, python-api, nodejs-app, react-app, html-website). Like Copilot - instant project setup!",
             "params": {"template_name": "string", "project_path": "string"},
             "requires_commander": True,
+            "side_effects": True,  # Never run speculatively
             "requires_verification": True
         },
         "list_project_templates": {
@@ -299,6 +334,7 @@ TOOLS = {
             "description": "⚡ QUICK PROJECT: Create project in default workspace. Convenience function - user can specify full paths elsewhere too!",
             "params": {"project_name": "string", "template": "string"},
             "requires_commander": True,
+            "side_effects": True,  # Never run speculatively
             "requires_verification": True
         },
         "list_workspace_projects": {
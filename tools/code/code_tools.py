@@ -5,6 +5,8 @@ import re
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 
+from core.repo_scanner import LineCountVisitor, TodoVisitor, scan
+
 
 def analyze_file(file_path: str) -> Dict[str, Any]:
     """
@@ -173,66 +175,13 @@ def find_todos(directory: str) -> Dict[str, Any]:
                 "error": f"Path is not a directory: {directory}"
             }
         
-        # Patterns to search for
-        todo_pattern = re.compile(
-            r'(?:#|//|/\*|\*|<!--|;)\s*(TODO|FIXME|HACK|XXX|NOTE|BUG)[\s:]*(.+)',
-            re.IGNORECASE
-        )
-        
-        # File extensions to search
-        code_extensions = {
-            '.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.cpp', '.c', '.h', 
-            '.hpp', '.cs', '.rb', '.go', '.rs', '.php', '.swift', '.kt', '.sh',
-            '.bash', '.yml', '.yaml', '.xml', '.html', '.css', '.scss', '.md'
-        }
-        
-        todos = {}
-        total_found = 0
-        max_results = 500  # Limit total results
-        
-        # Search through files
-        for file_path in dir_path.rglob('*'):
-            if total_found >= max_results:
-                break
-                
-            if file_path.is_file() and file_path.suffix in code_extensions:
-                # Skip hidden files and common directories to ignore
-                if any(part.startswith('.') for part in file_path.parts):
-                    continue
-                if any(d in file_path.parts for d in ['node_modules', 'venv', '__pycache__', '.git']):
-                    continue
-                
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        for line_num, line in enumerate(f, 1):
-                            if total_found >= max_results:
-                                break
-                            
-                            match = todo_pattern.search(line)
-                            if match:
-                                tag, message = match.groups()
-                                rel_path = str(file_path.relative_to(dir_path))
-                                
-                                if rel_path not in todos:
-                                    todos[rel_path] = []
-                                
-                                todos[rel_path].append({
-                                    "line": line_num,
-                                    "tag": tag.upper(),
-                                    "message": message.strip()[:200]  # Limit message length
-                                })
-                                total_found += 1
-                
-                except (UnicodeDecodeError, PermissionError):
-                    continue  # Skip files we can't read
+        visitor = TodoVisitor()
+        scan(dir_path, [visitor])
         
         return {
             "success": True,
             "directory": str(dir_path),
-            "total_found": total_found,
-            "file_count": len(todos),
-            "todos": todos,
-            "truncated": total_found >= max_results
+            **visitor.result()
         }
         
     except Exception as e:
@@ -269,85 +218,13 @@ def count_lines(directory: str, extensions: Optional[List[str]] = None) -> Dict[
                 "error": f"Path is not a directory: {directory}"
             }
         
-        # Default code extensions if none provided
-        if extensions is None:
-            extensions = [
-                '.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.cpp', '.c', '.h',
-                '.hpp', '.cs', '.rb', '.go', '.rs', '.php', '.swift', '.kt', '.sh',
-                '.bash', '.html', '.css', '.scss', '.sass', '.less', '.sql', '.r'
-            ]
-        
-        stats_by_extension = {}
-        total_files = 0
-        total_lines = 0
-        total_blank = 0
-        total_code = 0
-        
-        max_files = 5000  # Limit number of files to process
-        
-        # Process files
-        for file_path in dir_path.rglob('*'):
-            if total_files >= max_files:
-                break
-            
-            if not file_path.is_file():
-                continue
-            
-            # Skip hidden files and common directories to ignore
-            if any(part.startswith('.') for part in file_path.parts):
-                continue
-            if any(d in file_path.parts for d in ['node_modules', 'venv', '__pycache__', '.git', 'build', 'dist']):
-                continue
-            
-            ext = file_path.suffix
-            if ext not in extensions:
-                continue
-            
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                    
-                file_total = len(lines)
-                file_blank = sum(1 for line in lines if not line.strip())
-                file_code = file_total - file_blank
-                
-                if ext not in stats_by_extension:
-                    stats_by_extension[ext] = {
-                        "files": 0,
-                        "total_lines": 0,
-                        "blank_lines": 0,
-                        "code_lines": 0
-                    }
-                
-                stats_by_extension[ext]["files"] += 1
-                stats_by_extension[ext]["total_lines"] += file_total
-                stats_by_extension[ext]["blank_lines"] += file_blank
-                stats_by_extension[ext]["code_lines"] += file_code
-                
-                total_files += 1
-                total_lines += file_total
-                total_blank += file_blank
-                total_code += file_code
-                
-            except (UnicodeDecodeError, PermissionError):
-                continue  # Skip files we can't read
-        
-        # Sort by code lines
-        sorted_stats = dict(sorted(
-            stats_by_extension.items(),
-            key=lambda x: x[1]["code_lines"],
-            reverse=True
-        ))
+        visitor = LineCountVisitor(extensions)
+        scan(dir_path, [visitor])
         
         return {
             "success": True,
             "directory": str(dir_path),
-            "total_files": total_files,
-            "total_lines": total_lines,
-            "blank_lines": total_blank,
-            "code_lines": total_code,
-            "by_extension": sorted_stats,
-            "truncated": total_files >= max_files
+            **visitor.result()
         }
         
     except Exception as e:
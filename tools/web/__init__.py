@@ -3,7 +3,6 @@ Web Search Tool Registry - Production Multi-Source Search
 """
 
 from tools.web.multi_search import search as multi_search
-import asyncio
 
 async def production_web_search(query: str) -> dict:
     """
@@ -19,8 +18,9 @@ async def production_web_search(query: str) -> dict:
 
 
 def web_search(query: str) -> dict:
-    """Synchronous wrapper for web search"""
-    return asyncio.run(production_web_search(query))
+    """Synchronous wrapper for web search (runs on the shared event loop)"""
+    from core.async_runtime import run_async
+    return run_async(production_web_search(query))
 
 
 # Tool definition for AI system
@@ -4,6 +4,7 @@
 Comprehensive web access with Google, Bing, DuckDuckGo, and more
 """
 
+import copy
 import requests
 import json
 import time
@@ -892,6 +893,14 @@ def get_research_engine():
         _research_engine = DeepResearchEngine()
     return _research_engine
 
+def _with_progress(engine, progress_callback):
+    """Per-call copy of a shared engine with its own progress callback (calls may run concurrently)"""
+    engine = copy.copy(engine)
+    engine.progress_callback = progress_callback
+    if isinstance(engine, DeepResearchEngine):
+        engine.search_engine = _with_progress(engine.search_engine, progress_callback)
+    return engine
+
 
 # AI Tool Functions
 def advanced_web_search(query, max_results=10, progress_callback=None):
@@ -900,8 +909,7 @@ def advanced_web_search(query, max_results=10, progress_callback=None):
     Searches Grokipedia (PRIMARY), Wikipedia (SECONDARY), Google, and more
     PRIORITY: Grokipedia > Wikipedia > Google > Others (knowledge bases first!)
     """
-    engine = get_search_engine()
-    engine.progress_callback = progress_callback
+    engine = _with_progress(get_search_engine(), progress_callback)
     
     results = engine.parallel_search(
         query, 
@@ -928,9 +936,7 @@ def deep_web_research(query, max_results=15, scrape_top=5, progress_callback=Non
     Best for comprehensive research on a topic
     5-step process: Search → Analyze → Scrape → Verify → Summarize
     """
-    engine = get_research_engine()
-    engine.search_engine.progress_callback = progress_callback
-    engine.progress_callback = progress_callback
+    engine = _with_progress(get_research_engine(), progress_callback)
     
     return engine.deep_research(query, max_results=max_results, scrape_top=scrape_top)
 
@@ -940,8 +946,7 @@ def quick_fact_check(claim, progress_callback=None):
     AI Tool: Quick fact checking across multiple sources
     Verifies claims by checking knowledge bases and search engines
     """
-    engine = get_research_engine()
-    engine.search_engine.progress_callback = progress_callback
+    engine = _with_progress(get_research_engine(), progress_callback)
     
     return engine.quick_fact_check(claim)
 
@@ -356,8 +356,8 @@ def get_grok_engine():
     return _grok_engine
 
 
-# Synchronous wrapper functions for AI tools
-def grokipedia_search(query: str) -> Dict:
+# Async AI tools - run on the shared event loop by ToolExecutor
+async def grokipedia_search_async(query: str) -> Dict:
     """
     AI Tool: Fast Grokipedia search
     PRIMARY knowledge source - verified, comprehensive, up-to-date
@@ -370,40 +370,33 @@ def grokipedia_search(query: str) -> Dict:
         }
     
     engine = get_grok_engine()
+    result = await engine.search_direct_article(query)
     
-    # Run async search in sync context
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        result = loop.run_until_complete(engine.search_direct_article(query))
-        
-        if result:
-            return {
-                'query': query,
-                'success': True,
-                'title': result.get('title'),
-                'summary': result.get('summary', '')[:500],
-                'content_preview': result.get('content', '')[:1000],
-                'url': result.get('url'),
-                'word_count': result.get('word_count', 0),
-                'verified': True,
-                'source': 'grokipedia',
-                'search_time': result.get('search_time')
-            }
-        else:
-            # Fallback to general search
-            results = loop.run_until_complete(engine.search_general(query, max_results=3))
-            return {
-                'query': query,
-                'success': len(results) > 0,
-                'results': results[:3],
-                'message': f"Found {len(results)} related articles"
-            }
-    finally:
-        loop.close()
+    if result:
+        return {
+            'query': query,
+            'success': True,
+            'title': result.get('title'),
+            'summary': result.get('summary', '')[:500],
+            'content_preview': result.get('content', '')[:1000],
+            'url': result.get('url'),
+            'word_count': result.get('word_count', 0),
+            'verified': True,
+            'source': 'grokipedia',
+            'search_time': result.get('search_time')
+        }
+    else:
+        # Fallback to general search
+        results = await engine.search_general(query, max_results=3)
+        return {
+            'query': query,
+            'success': len(results) > 0,
+            'results': results[:3],
+            'message': f"Found {len(results)} related articles"
+        }
 
 
-def grokipedia_deep_research(query: str) -> Dict:
+async def grokipedia_deep_research_async(query: str) -> Dict:
     """
     AI Tool: Comprehensive Grokipedia research
     Full article extraction with complete content
@@ -416,15 +409,20 @@ def grokipedia_deep_research(query: str) -> Dict:
         }
     
     engine = get_grok_engine()
-    
-    # Run async research in sync context
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        result = loop.run_until_complete(engine.deep_research(query))
-        return result
-    finally:
-        loop.close()
+    return await engine.deep_research(query)
+
+
+# Synchronous wrappers for non-async callers (reuse the shared event loop)
+def grokipedia_search(query: str) -> Dict:
+    """Sync wrapper around grokipedia_search_async"""
+    from core.async_runtime import run_async
+    return run_async(grokipedia_search_async(query))
+
+
+def grokipedia_deep_research(query: str) -> Dict:
+    """Sync wrapper around grokipedia_deep_research_async"""
+    from core.async_runtime import run_async
+    return run_async(grokipedia_deep_research_async(query))
 
 
 if __name__ == "__main__":